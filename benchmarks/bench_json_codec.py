@@ -0,0 +1,142 @@
+"""
+Benchmark: stdlib json vs orjson on device, ticket and rule payloads.
+
+For each payload it measures
+  - decode:   bytes -> Python objects (what the client does with every upstream body)
+  - validate: decode + Pydantic validation and mapping to the MCP response models
+  - encode:   MCP response model -> JSON bytes (what the API response class renders)
+
+By default the payloads are generated in the shape of Tufin's responses. To measure recorded
+payloads instead, save raw upstream bodies as devices.json, tickets.json and rules.json (the
+GraphQL "data" object) in a directory and pass --payload-dir.
+
+Usage (from the project root):
+    python -m benchmarks.bench_json_codec --devices 5000 --tickets 1000 --rules 5000 --repeat 5
+    python -m benchmarks.bench_json_codec --payload-dir ./recorded
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.app.core.json_codec import ORJSON_CODEC, STDLIB_CODEC, JsonCodec
+from src.app.models.securechange import TicketListResponse, TicketResponse, TufinTicketListResponse
+from src.app.models.securetrack import (
+    DeviceListResponse, DeviceResponse, RuleQueryResponse, TufinDeviceListResponse
+)
+
+def make_devices(count: int) -> Dict[str, Any]:
+    vendors = [("Cisco", "asa"), ("Palo Alto Networks", "Panorama_ng_fw"), ("Checkpoint", "cp_smrt_cntr")]
+    devices = []
+    for i in range(count):
+        vendor, model = vendors[i % len(vendors)]
+        devices.append({
+            "id": str(i), "name": f"fw-{i:05d}.dc{i % 7}.example.com", "vendor": vendor, "model": model,
+            "status": "Started", "ip": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "latest_revision": str(1000 + i), "virtual_type": "context" if i % 3 else None,
+            "parent_id": i // 10 if i % 3 else None, "domain_id": str(i % 4 + 1), "domain_name": "Default",
+            "OS_Version": "9.1.3", "offline": False, "topology": True, "module_uid": f"{i:08x}-aaaa-bbbb",
+            "rule_usage_mode": "rule_usage", "licenses": {"license": [
+                {"type": "security", "status": "valid", "sku": "SKU-1", "expiration": "2030-01-01", "used": 1}
+            ]},
+        })
+    return {"device": devices, "count": count, "total": count}
+
+def make_tickets(count: int) -> Dict[str, Any]:
+    tickets = []
+    for i in range(count):
+        tickets.append({
+            "id": i, "subject": f"Open access for app {i}", "status": "In Progress" if i % 4 else "Resolved",
+            "priority": "Normal", "requester": "jdoe", "requester_id": 42, "domain_name": "Default",
+            "workflow": {"id": 3, "name": "Access Request"},
+            "create_date": {"date": "2024-01-01T10:00:00Z"}, "update_date": {"date": "2024-01-02T10:00:00Z"},
+            "current_step": {"id": 7, "name": "Risk Review"}, "sla_status": "ok", "business_duration": 3600,
+            "steps": {"step": [{"id": s, "name": f"Step {s}", "skipped": False, "redone": False,
+                                "tasks": {"task": [{"id": s * 10, "name": "Task", "status": "DONE",
+                                                    "assignee": "jdoe", "assignee_id": 42}]}}
+                               for s in range(3)]},
+        })
+    return {"ticket": tickets}
+
+def make_rules(count: int) -> Dict[str, Any]:
+    values = []
+    for i in range(count):
+        values.append({
+            "id": f"rule-{i}", "name": f"Allow web {i}", "action": "accept" if i % 5 else "drop",
+            "comment": "Auto-generated benchmark rule", "disabled": False, "implicit": False,
+            "metadata": {"certificationStatus": "CERTIFIED", "technicalOwner": "netops",
+                         "applicationOwner": None, "ruleDescription": "web access", "businessOwner": None},
+            "source": {"text": f"10.0.{i % 256}.0/24", "zones": [{"text": "inside"}]},
+            "destination": {"text": "any", "zones": [{"text": "outside"}]},
+            "service": {"text": "tcp/443"}, "application": {"text": "any"}, "user": {"text": "any"},
+            "installOn": {"text": "fw-00001"}, "vpn": {"text": "any"},
+        })
+    return {"rules": {"count": count, "values": values}}
+
+def devices_response(data: Any) -> Any:
+    # Same mapping as GET /api/v1/devices
+    parsed = TufinDeviceListResponse.model_validate(data)
+    devices = [DeviceResponse.model_validate(device) for device in parsed.device]
+    return DeviceListResponse(devices=devices, total=parsed.total, count=parsed.count)
+
+def tickets_response(data: Any) -> Any:
+    # Same mapping as GET /api/v1/tickets
+    parsed = TufinTicketListResponse.model_validate(data)
+    tickets = [TicketResponse.model_validate(ticket) for ticket in parsed.ticket]
+    return TicketListResponse(tickets=tickets, total=len(tickets))
+
+def rules_response(data: Any) -> Any:
+    return RuleQueryResponse.model_validate(data)
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def bench(codec: JsonCodec, raw: bytes, build: Callable[[Any], Any], repeat: int) -> Tuple[float, float, float]:
+    decode = best_of(repeat, lambda: codec.loads(raw))
+    validate = best_of(repeat, lambda: build(codec.loads(raw)))
+    response = build(codec.loads(raw)).model_dump(mode="json", by_alias=True)
+    encode = best_of(repeat, lambda: codec.dumps(response))
+    return decode, validate, encode
+
+def load_payloads(args: argparse.Namespace) -> List[Tuple[str, bytes, Callable[[Any], Any]]]:
+    builders = {"devices": devices_response, "tickets": tickets_response, "rules": rules_response}
+    if args.payload_dir:
+        payloads = []
+        for name, build in builders.items():
+            path = os.path.join(args.payload_dir, f"{name}.json")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    payloads.append((name, f.read(), build))
+        return payloads
+    generated = {"devices": make_devices(args.devices), "tickets": make_tickets(args.tickets), "rules": make_rules(args.rules)}
+    return [(name, json.dumps(generated[name]).encode(), build) for name, build in builders.items()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best run is reported")
+    parser.add_argument("--payload-dir", help="Directory with recorded devices.json / tickets.json / rules.json")
+    args = parser.parse_args()
+
+    codecs = [STDLIB_CODEC] + ([ORJSON_CODEC] if ORJSON_CODEC is not None else [])
+    if ORJSON_CODEC is None:
+        print("orjson is not installed; only the stdlib codec is measured (pip install orjson)")
+    for name, raw, build in load_payloads(args):
+        print(f"{name}: {len(raw) / 1024:.0f} KiB")
+        results = {codec.name: bench(codec, raw, build, args.repeat) for codec in codecs}
+        for codec_name, (decode, validate, encode) in results.items():
+            print(f"  {codec_name:<7} decode={decode:8.2f}ms  decode+validate={validate:8.2f}ms  encode={encode:8.2f}ms")
+        if len(results) == 2:
+            (d1, v1, e1), (d2, v2, e2) = results.values()
+            print(f"  speedup decode x{d1 / d2:.1f}  decode+validate x{v1 / v2:.1f}  encode x{e1 / e2:.1f}")
+
+if __name__ == "__main__":
+    main()
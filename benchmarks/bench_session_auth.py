@@ -0,0 +1,70 @@
+"""
+Benchmark: per-call latency of Basic auth vs session auth against a simulated Tufin upstream.
+
+The fake upstream charges an extra delay whenever it has to authenticate credentials
+(as SecureTrack does when it checks the user against LDAP) and a small base delay otherwise.
+
+Usage (from the project root):
+    python -m benchmarks.bench_session_auth --calls 200 --auth-ms 25 --base-ms 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from src.app.clients.auth import TufinSessionAuth
+
+def make_upstream(auth_delay: float, base_delay: float) -> httpx.MockTransport:
+    sessions = set()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        cookie = request.headers.get("Cookie", "")
+        session = cookie.split("JSESSIONID=", 1)[1].split(";", 1)[0] if "JSESSIONID=" in cookie else None
+        # Like SecureTrack, credentials in an Authorization header are always checked, even if a
+        # session cookie is also present (httpx's cookie jar sends it back automatically).
+        if request.headers.get("Authorization", "").startswith("Basic "):
+            await asyncio.sleep(base_delay + auth_delay) # Credential check (e.g. LDAP bind)
+            new_session = f"s{len(sessions) + 1}"
+            sessions.add(new_session)
+            return httpx.Response(200, json={"ok": True}, headers={"Set-Cookie": f"JSESSIONID={new_session}; Path=/"})
+        if session in sessions:
+            await asyncio.sleep(base_delay)
+            return httpx.Response(200, json={"ok": True})
+        return httpx.Response(401)
+
+    return httpx.MockTransport(handler)
+
+async def run(auth: httpx.Auth, calls: int, auth_delay: float, base_delay: float) -> list:
+    latencies = []
+    async with httpx.AsyncClient(transport=make_upstream(auth_delay, base_delay), auth=auth) as client:
+        for _ in range(calls):
+            started = time.perf_counter()
+            response = await client.get("https://securetrack.bench/securetrack/api/devices")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def summarize(name: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{name:<8} calls={len(latencies):<5} mean={statistics.mean(latencies):7.2f}ms "
+          f"p50={statistics.median(latencies):7.2f}ms p95={p95:7.2f}ms")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--auth-ms", type=float, default=25.0, help="Simulated credential check cost per Basic auth call")
+    parser.add_argument("--base-ms", type=float, default=2.0, help="Simulated cost of every call")
+    args = parser.parse_args()
+    auth_delay, base_delay = args.auth_ms / 1000, args.base_ms / 1000
+
+    basic = await run(httpx.BasicAuth("bench", "bench"), args.calls, auth_delay, base_delay)
+    session = await run(TufinSessionAuth("bench", "bench", "securetrack"), args.calls, auth_delay, base_delay)
+    summarize("basic", basic)
+    summarize("session", session)
+    print(f"mean saving per call: {statistics.mean(basic) - statistics.mean(session):.2f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
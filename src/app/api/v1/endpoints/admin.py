@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, status, Query, Request, HTTPException
+from typing import Optional
+
+# Import dependencies
+from ....core.dependencies import require_permission
+from ....clients.tufin import TufinApiClient, get_tufin_client
+from ....cache import admin as cache_admin
+from ....models.cache import CacheListResponse, CachePurgeResponse, CacheWarmUpResponse
+# Import limiter from the new location
+from ....core.limiter import limiter
+# Import logger
+import logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get(
+    "/admin/caches",
+    response_model=CacheListResponse,
+    tags=["Cache Administration"],
+    dependencies=[Depends(require_permission("manage_cache"))]
+)
+@limiter.limit("60/minute")
+async def list_caches(request: Request) -> CacheListResponse:
+    """
+    List cache namespaces with their size, hit ratio and entry age distribution.
+    Requires manage_cache permission.
+    """
+    return CacheListResponse(namespaces=cache_admin.all_stats())
+
+async def _purge(namespace: Optional[str], prefix: Optional[str], key: Optional[str]) -> CachePurgeResponse:
+    try:
+        removed = await cache_admin.purge(namespace, prefix, key)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown cache namespace '{namespace}'")
+    return CachePurgeResponse(removed=removed, total_removed=sum(removed.values()))
+
+@router.delete(
+    "/admin/caches",
+    response_model=CachePurgeResponse,
+    tags=["Cache Administration"],
+    dependencies=[Depends(require_permission("manage_cache"))]
+)
+@limiter.limit("30/minute")
+async def purge_all_caches(
+    request: Request,
+    prefix: Optional[str] = Query(None, description="Only remove keys starting with this prefix (in every namespace)"),
+    key: Optional[str] = Query(None, description="Only remove this exact key (in every namespace), e.g. a device ID")
+) -> CachePurgeResponse:
+    """
+    Purge every cache namespace, or only the exact `key`, or only keys starting with `prefix`.
+    Requires manage_cache permission.
+    """
+    return await _purge(None, prefix, key)
+
+@router.delete(
+    "/admin/caches/{namespace}",
+    response_model=CachePurgeResponse,
+    tags=["Cache Administration"],
+    dependencies=[Depends(require_permission("manage_cache"))]
+)
+@limiter.limit("30/minute")
+async def purge_cache(
+    request: Request,
+    namespace: str,
+    prefix: Optional[str] = Query(None, description="Only remove keys starting with this prefix"),
+    key: Optional[str] = Query(None, description="Only remove this exact key, e.g. a device ID ('12' does not match '120')")
+) -> CachePurgeResponse:
+    """
+    Purge one cache namespace (e.g. 'device', 'rules', 'ticket', 'topology_image'), or only the exact
+    `key`, or only its keys starting with `prefix`. Keys are not domain-scoped.
+    Requires manage_cache permission.
+    """
+    return await _purge(namespace, prefix, key)
+
+@router.post(
+    "/admin/caches/warm",
+    response_model=CacheWarmUpResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Cache Administration"],
+    dependencies=[Depends(require_permission("manage_cache"))]
+)
+@limiter.limit("10/minute")
+async def warm_caches(
+    request: Request,
+    tufin_client: TufinApiClient = Depends(get_tufin_client)
+) -> CacheWarmUpResponse:
+    """
+    Start reloading the device inventory (and per-device entries) from Tufin in the background.
+    Returns immediately; progress is logged and visible in GET /api/v1/admin/caches.
+    Requires manage_cache permission.
+    """
+    started = tufin_client.start_cache_warm_up()
+    return CacheWarmUpResponse(status="started" if started else "already_running")
@@ -4,7 +4,7 @@ from fastapi.exceptions import HTTPException
 
 # Import dependencies
 from ....core.config import UserRole, settings # Add settings
-from ....core.dependencies import require_permission, AuthenticatedUser # Add AuthenticatedUser
+from ....core.dependencies import require_permission, AuthenticatedUser, cache_bypass_requested # Add AuthenticatedUser
 from ....clients.tufin import TufinApiClient, get_tufin_client
 from ....models.securechange import TicketCreate, TicketUpdate, TicketResponse, TicketListResponse # Placeholder models
 # Import limiter from the new location
@@ -112,10 +112,14 @@ async def list_tickets(
     # NOTE: limit/offset are not standard Tufin parameters here, pagination via next/prev links
     # limit: int = Query(100, ge=1, le=1000), 
     # offset: int = Query(0, ge=0),
+    all_pages: bool = Query(False, description="Follow Tufin's next links and return every page"),
+    max_items: Optional[int] = Query(None, ge=1, description="Follow next links until at least this many tickets were collected"),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> TicketListResponse: 
     """
     List SecureChange tickets based on query parameters.
+    By default only Tufin's first batch is returned (continue with `next_link`); with `all_pages`
+    or `max_items` the server follows the next links itself.
     Requires list_tickets permission.
     """
     # Construct filter dict (Verify keys against Tufin API)
@@ -129,7 +133,9 @@ async def list_tickets(
     # Call the client method which returns the parsed Tufin response
     tufin_response = await tufin_client.list_securechange_tickets(
         # Removed limit/offset
-        filters=filters if filters else None
+        filters=filters if filters else None,
+        all_pages=all_pages,
+        max_items=max_items
     )
     
     # Map TufinTicket objects to our MCP API TicketResponse objects
@@ -141,8 +147,8 @@ async def list_tickets(
     # Construct the final MCP API response, including pagination links
     return TicketListResponse(
         tickets=mcp_tickets, 
-        # Total is not in the Tufin list response apparently
-        total=len(mcp_tickets), # Or try to parse from links if needed? Defaulting to count in batch.
+        # Tufin's total when known (reported, or every page followed); otherwise the count in this batch
+        total=tufin_response.total if tufin_response.total is not None else len(mcp_tickets),
         next_link=tufin_response.next.href if tufin_response.next else None,
         previous_link=tufin_response.previous.href if tufin_response.previous else None
     )
@@ -157,14 +163,16 @@ async def list_tickets(
 async def get_ticket(
     request: Request,
     ticket_id: int,
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> TicketResponse:
     """
     Get details for a specific SecureChange ticket.
+    Closed tickets are served from cache; send 'Cache-Control: no-cache' to force a full fetch.
     Requires get_ticket permission.
     """
     # Client returns the detailed TufinTicket model
-    tufin_ticket = await tufin_client.get_securechange_ticket(ticket_id)
+    tufin_ticket = await tufin_client.get_securechange_ticket(ticket_id, bypass_cache=bypass_cache)
     # Map the detailed Tufin model to the simplified MCP response model
     mcp_response = TicketResponse.model_validate(tufin_ticket)
     # Manually add workflow_name if not automatically mapped
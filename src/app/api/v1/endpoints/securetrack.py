@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, status, Query, Request, HTTPException, Response
-from typing import List, Any, Optional
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Any, Optional, AsyncIterator
 
 # Import dependencies
 from ....core.config import UserRole
-from ....core.dependencies import require_permission
+from ....core.dependencies import require_permission, cache_bypass_requested
 from ....clients.tufin import TufinApiClient, get_tufin_client
+from ....core import json_codec
 from ....models.securetrack import (
     DeviceResponse, DeviceListResponse, 
     TopologyPathResponse, # Removed TopologyMapResponse
     DeviceBulkAddRequest, DeviceBulkAddResponse,
     DeviceBulkImportRequest, DeviceBulkImportResponse,
-    RuleQueryRequest, RuleQueryResponse # Add GraphQL Rule models
+    RuleQueryRequest, RuleQueryResponse, RuleDetail # Add GraphQL Rule models
 )
 # Import limiter from the new location
 from ....core.limiter import limiter
@@ -33,44 +35,103 @@ READ_ROLES = [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER]
 @limiter.limit("100/minute")
 async def list_devices(
     request: Request,
-    # Updated filter parameters based on Tufin API info (verify names!)
     status: Optional[str] = Query(None, description="Filter by device status (e.g., 'started', 'stopped')"),
-    name: Optional[str] = Query(None, description="Filter by device name (contains - check Tufin docs for syntax)"),
+    name: Optional[str] = Query(None, description="Filter by device name (case-insensitive substring)"),
     vendor: Optional[str] = Query(None, description="Filter by vendor name"),
-    # Remove limit/offset as they are not supported directly by Tufin REST API apparently
-    # limit: int = Query(100, ge=1, le=1000),
-    # offset: int = Query(0, ge=0),
+    model: Optional[str] = Query(None, description="Filter by device model"),
+    domain_id: Optional[str] = Query(None, description="Filter by domain ID"),
+    virtual_type: Optional[str] = Query(None, description="Filter by virtual type (e.g., 'context', 'management')"),
+    parent_id: Optional[int] = Query(None, description="Filter by parent (management) device ID"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of devices to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> DeviceListResponse:
     """
-    List SecureTrack devices based on query parameters.
+    List SecureTrack devices, filtered and paged by device ID.
+    Filters are exact (case-insensitive) matches, except `name` which matches substrings.
+    Follow `next_cursor` to get the next page; `total` is the number of matching devices.
+    Served from an indexed copy of the cached inventory; send 'Cache-Control: no-cache' to force a fresh listing.
+    With the inventory cache disabled, status, vendor and name are filtered by SecureTrack.
     Requires list_devices permission.
     """
-    # Construct filter dict (Verify keys against Tufin API)
-    filters = {}
-    if status: filters["status"] = status
-    if name: filters["name"] = name # How Tufin handles partial matches needs verification
-    if vendor: filters["vendor"] = vendor
-    
-    # Call the client method
-    tufin_response = await tufin_client.list_securetrack_devices(
-        filters=filters if filters else None
-    )
+    filters = {
+        "status": status, "vendor": vendor, "model": model,
+        "domain_id": domain_id, "virtual_type": virtual_type, "parent_id": parent_id,
+    }
+    try:
+        page = await tufin_client.list_securetrack_devices_page(
+            filters={k: v for k, v in filters.items() if v is not None},
+            limit=limit,
+            cursor=cursor,
+            name_contains=name,
+            bypass_cache=bypass_cache
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Map TufinDevice objects to our MCP API DeviceResponse objects
-    mcp_devices = [
-        DeviceResponse.model_validate(tufin_dev) 
-        for tufin_dev in tufin_response.device # Access device list directly now
-    ]
+    # Map TufinDevice objects to our MCP API DeviceResponse objects (only this page)
+    mcp_devices = [DeviceResponse.model_validate(tufin_dev) for tufin_dev in page.devices]
     
-    # Construct the final MCP API response (using count/total from Tufin)
     return DeviceListResponse(
         devices=mcp_devices, 
-        total=tufin_response.total,
-        count=tufin_response.count 
-        # Removed limit/offset 
+        total=page.total,
+        count=len(mcp_devices),
+        next_cursor=page.next_cursor
     )
 
+async def _first_chunk(chunks: AsyncIterator[Any], default: Any) -> Any:
+    """
+    Awaits the first chunk of a streamed result before the response starts, so upstream errors
+    (bad query, Tufin down) still map to a proper status code instead of a truncated 200.
+    """
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return default
+    except BaseException:
+        await chunks.aclose()
+        raise
+
+@router.get(
+    "/devices/export",
+    response_class=StreamingResponse,
+    tags=["SecureTrack Devices"],
+    dependencies=[Depends(require_permission("export_devices"))],
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One DeviceResponse JSON object per line"}}
+)
+@limiter.limit("10/minute")
+async def export_devices(
+    request: Request,
+    bypass_cache: bool = Depends(cache_bypass_requested),
+    tufin_client: TufinApiClient = Depends(get_tufin_client)
+) -> StreamingResponse:
+    """
+    Export the full device inventory as NDJSON (one DeviceResponse per line), streamed as it is read
+    from the cached inventory or, when there is none, from SecureTrack page by page.
+    Send 'Cache-Control: no-cache' to always read from SecureTrack.
+    Requires export_devices permission.
+    """
+    chunks = tufin_client.iter_securetrack_devices(bypass_cache=bypass_cache)
+    first = await _first_chunk(chunks, [])
+
+    def lines(devices: List[Any]) -> bytes:
+        return b"".join(json_codec.dumps(DeviceResponse.model_validate(device).model_dump(by_alias=True, mode="json")) + b"\n" for device in devices)
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        try:
+            yield lines(first)
+            async for chunk in chunks:
+                yield lines(chunk)
+        except Exception as e:
+            # Headers are already sent: abort the connection so the client cannot mistake a partial export for a complete one
+            logger.error(f"Device export aborted: {e}")
+            raise
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
 @router.get(
     "/devices/{device_id}", 
     response_model=DeviceResponse, 
@@ -81,14 +142,16 @@ async def list_devices(
 async def get_device(
     request: Request,
     device_id: str, # Changed to string based on Tufin schema
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> DeviceResponse:
     """
     Get details for a specific SecureTrack device.
+    Cached until the device's revision changes; send 'Cache-Control: no-cache' to force a fresh fetch.
     Requires get_device permission.
     """
     # Call the client method
-    tufin_device_data = await tufin_client.get_securetrack_device(device_id)
+    tufin_device_data = await tufin_client.get_securetrack_device(device_id, bypass_cache=bypass_cache)
     
     # Map TufinDevice model to our MCP API DeviceResponse model
     mcp_response = DeviceResponse.model_validate(tufin_device_data)
@@ -106,16 +169,18 @@ async def get_topology_path_query(
     src: str = Query(..., description="Source IP address or object name"),
     dst: str = Query(..., description="Destination IP address or object name (with optional port like host:port)"),
     service: str = Query(..., description="Service name (e.g., 'any', 'Facebook') or port/protocol (e.g., 'tcp:80')"),
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> TopologyPathResponse:
     """
     Run a topology path query in SecureTrack using GET.
     Returns a summarized result indicating if traffic is allowed and routed.
+    Results are cached until a device on the path changes; send 'Cache-Control: no-cache' to re-run the query.
     Requires get_topology_path permission.
     """
     # Call the client method - gets the detailed Tufin response model
     tufin_result = await tufin_client.get_topology_path(
-        src=src, dst=dst, service=service
+        src=src, dst=dst, service=service, bypass_cache=bypass_cache
     )
     
     # Process the detailed result into a summary
@@ -159,19 +224,27 @@ async def get_topology_path_image(
     src: str = Query(..., description="Source IP address or object name"),
     dst: str = Query(..., description="Destination IP address or object name (with optional port like host:port)"),
     service: str = Query(..., description="Service name (e.g., 'any', 'Facebook') or port/protocol (e.g., 'tcp:80')"),
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> Response:
     """
     Get the topology path image from SecureTrack.
+    Images are cached on disk until a device on the path changes and are served from the file.
     Requires get_topology_path_image permission.
     Returns image data (e.g., PNG).
     """
     try:
+        # Determine media type (default to png, could be configurable or detected)
+        media_type = "image/png" 
+        image_file = await tufin_client.get_topology_path_image_file(
+            src=src, dst=dst, service=service, bypass_cache=bypass_cache
+        )
+        if image_file is not None:
+            # Sent from disk (sendfile / pathsend where the server supports it)
+            return FileResponse(image_file, media_type=media_type)
         image_bytes = await tufin_client.get_topology_path_image(
             src=src, dst=dst, service=service
         )
-        # Determine media type (default to png, could be configurable or detected)
-        media_type = "image/png" 
         return Response(content=image_bytes, media_type=media_type)
     except HTTPException as e:
         # Re-raise HTTP exceptions from the client
@@ -240,18 +313,21 @@ async def import_managed_devices_bulk(
 async def query_rules_graphql(
     request: Request,
     query_request: RuleQueryRequest,
+    bypass_cache: bool = Depends(cache_bypass_requested),
     tufin_client: TufinApiClient = Depends(get_tufin_client)
 ) -> RuleQueryResponse:
     """
     Query SecureTrack firewall rules using GraphQL and a TQL filter.
     Returns a standard set of rule properties.
+    Results are cached until a device revision changes; send 'Cache-Control: no-cache' to re-run the query.
     Requires query_rules_graphql permission.
     """
     logger.info(f"Received GraphQL rule query with filter: {query_request.tql_filter}")
     
     # Call the client method which returns the parsed GraphQL data dictionary
     graphql_data = await tufin_client.query_rules_graphql(
-        tql_filter=query_request.tql_filter
+        tql_filter=query_request.tql_filter,
+        bypass_cache=bypass_cache
     )
     
     # Validate the received data against our Pydantic response model
@@ -263,4 +339,72 @@ async def query_rules_graphql(
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Failed to parse or validate response from Tufin GraphQL API (Rules Query)"
-        ) 
\ No newline at end of file
+        )
+
+@router.post(
+    "/graphql/rules/stream",
+    response_class=StreamingResponse,
+    tags=["SecureTrack GraphQL"],
+    dependencies=[Depends(require_permission("query_rules_graphql"))],
+    responses={200: {
+        "content": {"application/x-ndjson": {}, "text/event-stream": {}},
+        "description": "Matching rules, one per NDJSON line or SSE 'rule' event"
+    }}
+)
+@limiter.limit("10/minute")
+async def stream_rules_graphql(
+    request: Request,
+    query_request: RuleQueryRequest,
+    format_: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$", description="'ndjson' (default) or 'sse'; defaults to 'sse' for 'Accept: text/event-stream'"),
+    bypass_cache: bool = Depends(cache_bypass_requested),
+    tufin_client: TufinApiClient = Depends(get_tufin_client)
+) -> StreamingResponse:
+    """
+    Query SecureTrack firewall rules with a TQL filter and stream the matches as they arrive,
+    for result sets too large for POST /graphql/rules. Tufin is queried page by page.
+    NDJSON: one rule per line; the number of matching rules is in the X-Total-Count header.
+    SSE: a 'count' event, one 'rule' event per rule, then 'end' (or 'error' if Tufin fails mid-stream).
+    Requires query_rules_graphql permission.
+    """
+    logger.info(f"Received streaming GraphQL rule query with filter: {query_request.tql_filter}")
+    if format_ is None:
+        format_ = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+
+    chunks = tufin_client.iter_rules_graphql(tql_filter=query_request.tql_filter, bypass_cache=bypass_cache)
+    count, first = await _first_chunk(chunks, (0, []))
+
+    def encode(rule: Any) -> bytes:
+        return json_codec.dumps(RuleDetail.model_validate(rule).model_dump(by_alias=True, mode="json"))
+
+    async def rules() -> AsyncIterator[List[Any]]:
+        yield first
+        async for _, chunk in chunks:
+            yield chunk
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in rules():
+                yield b"".join(encode(rule) + b"\n" for rule in chunk)
+        except Exception as e:
+            # Headers are already sent: abort the connection so a partial result is not mistaken for a complete one
+            logger.error(f"Streaming rule query aborted: {e}")
+            raise
+        finally:
+            await chunks.aclose()
+
+    async def sse() -> AsyncIterator[bytes]:
+        try:
+            yield b"event: count\ndata: " + json_codec.dumps({"count": count}) + b"\n\n"
+            async for chunk in rules():
+                yield b"".join(b"event: rule\ndata: " + encode(rule) + b"\n\n" for rule in chunk)
+            yield b"event: end\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming rule query aborted: {e}")
+            detail = e.detail if isinstance(e, HTTPException) else "Rule query failed"
+            yield b"event: error\ndata: " + json_codec.dumps({"detail": detail}) + b"\n\n"
+        finally:
+            await chunks.aclose()
+
+    if format_ == "sse":
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers={"X-Total-Count": str(count)})
@@ -0,0 +1 @@
+# This file makes src/app/cache a Python package
@@ -0,0 +1,71 @@
+import inspect
+import logging
+from typing import Any, Dict, List, Optional
+
+from .base import CACHE_EVICTIONS, CACHE_REGISTRY, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Lookup results that were answered from the cache
+HIT_RESULTS = ("hit", "stale", "revalidated")
+MISS_RESULTS = ("miss",)
+
+# Upper bounds (seconds) of the age buckets reported per namespace; the last bucket is open-ended
+AGE_BUCKETS = ((60.0, "<1m"), (600.0, "1m-10m"), (3600.0, "10m-1h"), (86400.0, "1h-1d"))
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index], 3)
+
+def namespace_stats(cache: Any) -> Dict[str, Any]:
+    """Size, hit ratio and entry age distribution of one cache namespace (an LRUCache or PathImageCache)."""
+    namespace = cache.namespace
+    hits = sum(CACHE_REQUESTS.value(namespace=namespace, result=result) for result in HIT_RESULTS)
+    misses = sum(CACHE_REQUESTS.value(namespace=namespace, result=result) for result in MISS_RESULTS)
+    ages = sorted(entry.age for entry in cache.entries() if not entry.expired)
+    buckets = {label: 0 for _, label in AGE_BUCKETS}
+    buckets[">1d"] = 0
+    for age in ages:
+        label = next((label for bound, label in AGE_BUCKETS if age < bound), ">1d")
+        buckets[label] += 1
+    return {
+        "namespace": namespace,
+        "entries": len(ages),
+        "max_entries": cache.max_entries,
+        "size_bytes": cache.size_bytes,
+        "max_bytes": cache.max_bytes,
+        "ttl": cache.ttl,
+        "hits": int(hits),
+        "misses": int(misses),
+        "bypasses": int(CACHE_REQUESTS.value(namespace=namespace, result="bypass")),
+        "evictions": int(CACHE_EVICTIONS.value(namespace=namespace)),
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        "age_seconds": {
+            "p50": _percentile(ages, 0.5),
+            "p90": _percentile(ages, 0.9),
+            "max": round(ages[-1], 3) if ages else None,
+            "buckets": buckets,
+        },
+    }
+
+def all_stats() -> List[Dict[str, Any]]:
+    return [namespace_stats(CACHE_REGISTRY[namespace]) for namespace in sorted(CACHE_REGISTRY)]
+
+async def purge(namespace: Optional[str] = None, prefix: Optional[str] = None, key: Optional[str] = None) -> Dict[str, int]:
+    """
+    Removes from one namespace (or all) the entry with exactly `key`, or the entries whose key starts
+    with `prefix`, or all entries. Keys are e.g. a device or ticket ID ('12' does not match '120'),
+    'device:12' in the negative cache, or the canonical TQL in 'rules'; they are not domain-scoped.
+    Returns the number of removed entries per namespace. Raises KeyError for an unknown namespace.
+    """
+    if namespace is not None and namespace not in CACHE_REGISTRY:
+        raise KeyError(namespace)
+    namespaces = [namespace] if namespace is not None else sorted(CACHE_REGISTRY)
+    removed = {}
+    for name in namespaces:
+        result = CACHE_REGISTRY[name].purge(prefix, key=key)
+        removed[name] = await result if inspect.isawaitable(result) else result
+    logger.info(f"Purged cache entries (namespace={namespace or '*'}, prefix={prefix!r}, key={key!r}): {removed}")
+    return removed
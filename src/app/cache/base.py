@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from ..core import json_codec
+from ..core.metrics import metrics
+from .compression import Compressor
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = metrics.counter(
+    "tufin_cache_requests_total", "Cache lookups by namespace and result (hit, stale, miss, bypass)."
+)
+CACHE_EVICTIONS = metrics.counter("tufin_cache_evictions_total", "Entries evicted to stay within the size bound.")
+CACHE_ENTRIES = metrics.gauge("tufin_cache_entries", "Entries currently held per cache namespace.")
+CACHE_RESIDENT_BYTES = metrics.gauge(
+    "tufin_cache_resident_bytes", "Serialized (after compression) size of the entries held per cache namespace."
+)
+CACHE_UNCACHEABLE = metrics.counter("tufin_cache_uncacheable_total", "Values not cached because they exceed the byte bound.")
+
+# Every cache registers itself here by namespace (for metrics and cache administration);
+# an LRUCache, or another store with the same statistics/purge surface (e.g. PathImageCache)
+CACHE_REGISTRY: Dict[str, Any] = {}
+
+def make_key(prefix: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """Builds a stable cache key from a prefix and params (order-insensitive, None values skipped)."""
+    if not params:
+        return prefix
+    items = sorted((str(k), str(v)) for k, v in params.items() if v is not None)
+    return prefix + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+class Codec:
+    """Converts a namespace's cached values to JSON-compatible data and back."""
+
+    def __init__(self, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        self.encode = encode
+        self.decode = decode
+
+IDENTITY_CODEC = Codec(lambda value: value, lambda data: data)
+
+def model_codec(model: Any) -> Codec:
+    """Codec for pydantic models; None fields are dropped to keep serialized values compact."""
+    return Codec(lambda value: value.model_dump(mode="json", by_alias=True, exclude_none=True), model.model_validate)
+
+def content_digest(data: bytes) -> str:
+    """Short digest of a serialized value; equal digests mean equal content."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class CacheEntry:
+    __slots__ = ("_value", "_decode", "size", "digest", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, ttl: Optional[float], size: int = 0, decode: Optional[Callable[[Any], Any]] = None,
+                 digest: Optional[str] = None):
+        self._value = value
+        self._decode = decode # Set when the value is held compressed
+        self.size = size
+        self.digest = digest # Of the serialized value; None unless the cache computes digests (or it could not be serialized)
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl if ttl is not None else None
+
+    @property
+    def value(self) -> Any:
+        return self._decode(self._value) if self._decode is not None else self._value
+
+    @property
+    def compressed(self) -> bool:
+        return self._decode is not None
+
+    @property
+    def compressed_data(self) -> Optional[bytes]:
+        """The compressed serialized value as held in memory, or None if held as is."""
+        return self._value if self._decode is not None else None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+class LRUCache:
+    """
+    In-memory LRU cache with optional per-entry TTL, bounded by entry count and by total bytes.
+
+    Each value is sized by its serialized form (the namespace's Codec, then JSON), so a 40 MB rule
+    query result and a 2 KB device count for what they really weigh. With a Compressor, values of
+    at least `compressor.min_bytes` are held compressed and decoded again on every read; this trades
+    CPU per hit for memory, so reserve it for large values. A value larger than `max_bytes` on its
+    own is not cached. Large values should be stored with set_async(), which serializes and
+    compresses them in a worker thread. With `digest=True` each entry also carries a content digest
+    of its serialized value (for callers that detect changed content, e.g. the inventory).
+
+    Not thread-safe; it is only used from the event loop. Lookups are not counted automatically:
+    callers report the outcome with record() so composite caches (e.g. stale-while-revalidate)
+    can distinguish their own results.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        codec: Codec = IDENTITY_CODEC,
+        compressor: Optional[Compressor] = None,
+        digest: bool = False,
+    ):
+        self.namespace = namespace
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.codec = codec
+        self.compressor = compressor
+        self.digest = digest
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        # Optional second tier (e.g. SqliteCacheTier) mirroring writes (given the new CacheEntry); evictions are not mirrored
+        self.backend: Optional[Any] = None
+        # Optional hooks for secondary indexes: on_store(key, value) after a value is stored (also when
+        # refilled from the second tier), on_remove(key) whenever a key leaves (delete, eviction, clear)
+        self.on_store: Optional[Callable[[str, Any], None]] = None
+        self.on_remove: Optional[Callable[[str], None]] = None
+        CACHE_REGISTRY[namespace] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get_entry(key) is not None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def keys(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def entries(self) -> Iterator[CacheEntry]:
+        """All entries, least recently used first, without touching them (for statistics)."""
+        return iter(list(self._entries.values()))
+
+    def record(self, result: str) -> None:
+        CACHE_REQUESTS.inc(namespace=self.namespace, result=result)
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expired:
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else default
+
+    def peek(self, key: str) -> Any:
+        """Returns the value without refreshing its LRU position (None if missing or expired)."""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None and not entry.expired else None
+
+    def _make_entry(self, value: Any, ttl: Optional[float]) -> CacheEntry:
+        try:
+            data = json_codec.dumps(self.codec.encode(value))
+        except Exception as e:
+            # Cannot be sized or compressed; held as is and counted at zero bytes
+            logger.debug(f"Cache '{self.namespace}': cannot serialize value for sizing: {e}")
+            return CacheEntry(value, ttl)
+        digest = content_digest(data) if self.digest else None
+        if self.compressor is not None and len(data) >= self.compressor.min_bytes:
+            compressed = self.compressor.compress(data)
+            decompress, decode = self.compressor.decompress, self.codec.decode
+            return CacheEntry(compressed, ttl, len(compressed), lambda blob: decode(json_codec.loads(decompress(blob))), digest)
+        return CacheEntry(value, ttl, len(data), digest=digest)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        self._store(key, value, self._make_entry(value, ttl), ttl)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Same as set(), but the value is serialized (and compressed) in a worker thread; for large values."""
+        ttl = ttl if ttl is not None else self.ttl
+        entry = await asyncio.to_thread(self._make_entry, value, ttl)
+        self._store(key, value, entry, ttl)
+
+    def _store(self, key: str, value: Any, entry: CacheEntry, ttl: Optional[float]) -> None:
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            logger.info(f"Cache '{self.namespace}': not caching '{key}' ({entry.size} bytes exceed the {self.max_bytes} byte bound)")
+            CACHE_UNCACHEABLE.inc(namespace=self.namespace)
+            self.delete(key) # Drop the previous value as well, it is outdated
+            return
+        self._discard(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        if self.on_store is not None:
+            self.on_store(key, value)
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            CACHE_EVICTIONS.inc(namespace=self.namespace)
+            if self.on_remove is not None:
+                self.on_remove(evicted_key)
+        self._update_gauges()
+        if self.backend is not None:
+            self.backend.write(self.namespace, key, entry, ttl)
+
+    def _discard(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        if self.on_remove is not None:
+            self.on_remove(key)
+        return True
+
+    def _update_gauges(self) -> None:
+        CACHE_ENTRIES.set(len(self._entries), namespace=self.namespace)
+        CACHE_RESIDENT_BYTES.set(self._bytes, namespace=self.namespace)
+
+    def delete(self, key: str) -> bool:
+        removed = self._discard(key)
+        self._update_gauges()
+        if self.backend is not None: # Also when already evicted here: the second tier may still hold it
+            self.backend.remove(self.namespace, key)
+        return removed
+
+    def purge(self, prefix: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Removes the entry with exactly `key`, or those whose key starts with `prefix`, or all entries;
+        returns how many were removed.
+        """
+        if key is not None:
+            return int(self.delete(key))
+        if prefix is None:
+            removed = len(self._entries)
+            self.clear()
+            return removed
+        return sum(self.delete(key) for key in self.keys() if key.startswith(prefix))
+
+    def clear(self) -> None:
+        if self.on_remove is not None:
+            for key in self._entries:
+                self.on_remove(key)
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+        if self.backend is not None:
+            self.backend.clear(self.namespace)
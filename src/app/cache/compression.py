@@ -0,0 +1,54 @@
+import logging
+import threading
+import zlib
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError: # Optional dependency: pip install zstandard
+    zstandard = None
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_ZSTD = "zstd"
+
+class Compressor:
+    """A named compress/decompress pair, applied to serialized cache values of at least `min_bytes`."""
+
+    def __init__(self, name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes], min_bytes: int):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self.min_bytes = min_bytes
+
+def _zstd_compressor(min_bytes: int) -> Compressor:
+    # (De)compressor objects are not safe to share across threads, and large values are compressed
+    # in worker threads (LRUCache.set_async), so each thread gets its own
+    local = threading.local()
+
+    def compress(data: bytes) -> bytes:
+        if not hasattr(local, "compressor"):
+            local.compressor = zstandard.ZstdCompressor(level=3)
+        return local.compressor.compress(data)
+
+    def decompress(data: bytes) -> bytes:
+        if not hasattr(local, "decompressor"):
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.decompressor.decompress(data)
+
+    return Compressor(COMPRESSION_ZSTD, compress, decompress, min_bytes)
+
+def get_compressor(name: str = COMPRESSION_NONE, min_bytes: int = 1024 * 1024) -> Optional[Compressor]:
+    """Returns the requested compressor (None for 'none'); 'zstd' falls back to zlib when zstandard is missing."""
+    name = name.lower()
+    if name == COMPRESSION_NONE:
+        return None
+    if name == COMPRESSION_ZSTD:
+        if zstandard is not None:
+            return _zstd_compressor(min_bytes)
+        logger.warning("TUFIN_CACHE_COMPRESSION='zstd' but zstandard is not installed; using zlib.")
+    elif name != COMPRESSION_ZLIB:
+        logger.warning(f"Unknown TUFIN_CACHE_COMPRESSION '{name}', using zlib.")
+    return Compressor(COMPRESSION_ZLIB, lambda data: zlib.compress(data, 6), zlib.decompress, min_bytes)
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+from ..models.securetrack import TufinDevice
+from .base import LRUCache, model_codec
+from .compression import Compressor
+from .revisions import RevisionTracker
+
+logger = logging.getLogger(__name__)
+
+class DeviceCache:
+    """
+    Per-device cache for get_securetrack_device, valid while the device's latest_revision is unchanged.
+
+    Entries are fed from inventory listings as well as detail calls. An entry is served only if its
+    revision still matches the tracker's current revision for the device; a newer revision seen
+    anywhere drops it. A TTL bounds staleness of fields that change without a new revision (e.g. status).
+    Listings re-store a device only when its revision changed or its entry is gone, so an unchanged
+    inventory refresh does not re-serialize every device; the stored revisions are tracked through
+    the store's on_store/on_remove hooks, without decoding entries.
+    """
+
+    def __init__(self, tracker: RevisionTracker, ttl: Optional[float] = 900.0, max_entries: int = 50000,
+                 max_bytes: Optional[int] = None, compressor: Optional[Compressor] = None):
+        self.tracker = tracker
+        self.store = LRUCache(
+            "device", max_entries=max_entries, ttl=ttl, max_bytes=max_bytes,
+            codec=model_codec(TufinDevice), compressor=compressor,
+        )
+        self._stored_revisions: Dict[str, Optional[str]] = {}
+        self.store.on_store = self._on_store
+        self.store.on_remove = self._on_remove
+        tracker.subscribe(self._on_revision_change)
+
+    def _on_store(self, key: str, device: TufinDevice) -> None:
+        self._stored_revisions[key] = device.latest_revision
+
+    def _on_remove(self, key: str) -> None:
+        self._stored_revisions.pop(key, None)
+
+    def get(self, device_id: str) -> Optional[TufinDevice]:
+        device = self.store.get(str(device_id))
+        if device is None:
+            self.store.record("miss")
+            return None
+        if device.latest_revision != self.tracker.current(device_id):
+            self.store.delete(str(device_id))
+            self.store.record("miss")
+            return None
+        self.store.record("hit")
+        return device
+
+    def put(self, device: TufinDevice) -> None:
+        # Observe first: a changed revision drops the old entry before the new one is stored
+        self.tracker.observe(device.id, device.latest_revision)
+        self.store.set(str(device.id), device)
+
+    def put_many(self, devices: Iterable[TufinDevice]) -> None:
+        """Stores listed devices, skipping those already cached with the same revision."""
+        for device in devices:
+            key = str(device.id)
+            if key in self._stored_revisions and self._stored_revisions[key] == device.latest_revision and key in self.store:
+                self.tracker.observe(device.id, device.latest_revision)
+                continue
+            self.put(device)
+
+    def _on_revision_change(self, device_id: str, old: Optional[str], new: Optional[str]) -> None:
+        self.store.delete(device_id)
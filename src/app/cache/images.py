@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from ..core.metrics import metrics
+from .base import CACHE_EVICTIONS, CACHE_REGISTRY, CACHE_REQUESTS, CACHE_RESIDENT_BYTES
+from .revisions import RevisionTracker
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_BYTES = metrics.gauge("tufin_image_cache_bytes", "Bytes of topology path images stored on disk.")
+
+NAMESPACE = "topology_image"
+
+Revisions = Dict[str, Optional[str]] # device_id -> revision when the image was stored (None if unknown)
+
+def image_cache_key(query_key: str) -> str:
+    """File name of a path image: a hash of the normalized topology query."""
+    return hashlib.sha256(query_key.encode("utf-8")).hexdigest()
+
+class ImageEntry(NamedTuple):
+    """Age information of one cached image, for cache statistics."""
+    age: float
+    expired: bool
+
+class PathImageCache:
+    """
+    Disk-backed cache of topology path images.
+
+    Files are named by image_cache_key() of the normalized query. Next to each image a small JSON
+    file records the devices on the path and their revisions at the time; on read they are checked
+    against the RevisionTracker, and an image through a device with a newer revision is dropped.
+    Revisions that were unknown when the image was stored, and changes the revisions cannot capture
+    (e.g. topology updates), are bounded by `ttl`: a file's mtime is its creation time and older
+    files are dropped on access. Both files survive restarts. Total size is bounded by `max_bytes`,
+    evicting the least recently used files (by atime) first. Hits are served straight from disk.
+    """
+
+    SUFFIX = ".png"
+    namespace = NAMESPACE
+    max_entries = None # Bounded by bytes only
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = 3600.0,
+                 tracker: Optional[RevisionTracker] = None):
+        self.directory = Path(directory or os.path.join(tempfile.gettempdir(), "tufin-mcp-path-images"))
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.tracker = tracker
+        # digest -> (size, stored_at wall-clock time, revisions), least recently used first
+        self._files: "OrderedDict[str, Tuple[int, float, Revisions]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = asyncio.Lock()
+        self._load_index()
+        CACHE_REGISTRY[NAMESPACE] = self
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def entries(self) -> Iterator[ImageEntry]:
+        """Age of every cached image (for statistics), least recently used first."""
+        now = time.time()
+        for _, stored_at, _ in list(self._files.values()):
+            age = max(0.0, now - stored_at)
+            yield ImageEntry(age, self.ttl is not None and age >= self.ttl)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}{self.SUFFIX}"
+
+    def _meta_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def _read_revisions(self, digest: str) -> Revisions:
+        try:
+            return {str(k): v for k, v in json.loads(self._meta_path(digest).read_text("utf-8")).items()}
+        except (OSError, ValueError, AttributeError):
+            return {} # Missing or unreadable: only the TTL applies
+
+    def _is_current(self, revisions: Revisions) -> bool:
+        """False if a device on the path has a different revision now than when the image was stored."""
+        if self.tracker is None:
+            return True
+        for device_id, stored in revisions.items():
+            current = self.tracker.current(device_id)
+            if stored is not None and current is not None and current != stored:
+                return False
+        return True
+
+    def _load_index(self) -> None:
+        """Picks up files left by a previous run, oldest access first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found = []
+        for path in self.directory.glob(f"*/*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_atime, path.stem, stat.st_size, stat.st_mtime))
+        for _, digest, size, stored_at in sorted(found):
+            self._files[digest] = (size, stored_at, self._read_revisions(digest))
+            self._bytes += size
+        IMAGE_CACHE_BYTES.set(self._bytes)
+        CACHE_RESIDENT_BYTES.set(self._bytes, namespace=NAMESPACE)
+        if found:
+            logger.info(f"Path image cache: found {len(found)} file(s), {self._bytes} bytes in {self.directory}")
+
+    async def get(self, digest: str) -> Optional[Path]:
+        """Returns the cached file for the key, or None."""
+        path = self._path(digest)
+        if digest not in self._files:
+            CACHE_REQUESTS.inc(namespace=NAMESPACE, result="miss")
+            return None
+        _, stored_at, revisions = self._files[digest]
+        if (self.ttl is not None and time.time() - stored_at >= self.ttl) or not self._is_current(revisions):
+            await self.discard(digest)
+            CACHE_REQUESTS.inc(namespace=NAMESPACE, result="miss")
+            return None
+        try:
+            # Record the access on disk as well (atime; mtime keeps the creation time), so LRU order survives a restart
+            await asyncio.to_thread(os.utime, path, (time.time(), stored_at))
+        except FileNotFoundError:
+            self._forget(digest) # Removed behind our back
+            CACHE_REQUESTS.inc(namespace=NAMESPACE, result="miss")
+            return None
+        self._files.move_to_end(digest)
+        CACHE_REQUESTS.inc(namespace=NAMESPACE, result="hit")
+        return path
+
+    async def put(self, digest: str, data: bytes, revisions: Optional[Revisions] = None) -> Path:
+        """
+        Stores the image atomically, with the revisions of the devices on its path, and evicts old files
+        beyond the size bound.
+        """
+        path = self._path(digest)
+        revisions = dict(revisions or {})
+        await asyncio.to_thread(self._write, self._meta_path(digest), json.dumps(revisions).encode("utf-8"))
+        await asyncio.to_thread(self._write, path, data)
+        async with self._lock:
+            self._forget(digest)
+            self._files[digest] = (len(data), time.time(), revisions)
+            self._bytes += len(data)
+            await self._evict()
+        return path
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path) # Readers never see a partially written file
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _unlink(self, digest: str) -> None:
+        for path in (self._path(digest), self._meta_path(digest)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, digest: str) -> None:
+        item = self._files.pop(digest, None)
+        if item is not None:
+            self._bytes -= item[0]
+        IMAGE_CACHE_BYTES.set(self._bytes)
+        CACHE_RESIDENT_BYTES.set(self._bytes, namespace=NAMESPACE)
+
+    async def _evict(self) -> None:
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            digest, _ = next(iter(self._files.items()))
+            self._forget(digest)
+            CACHE_EVICTIONS.inc(namespace=NAMESPACE)
+            await asyncio.to_thread(self._unlink, digest)
+
+    async def discard(self, digest: str) -> bool:
+        """Removes one image; returns whether it was cached."""
+        async with self._lock:
+            if digest not in self._files:
+                return False
+            self._forget(digest)
+            await asyncio.to_thread(self._unlink, digest)
+            return True
+
+    async def purge(self, prefix: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Removes the image with digest `key`, or those whose digest starts with `prefix`, or all images."""
+        if key is not None:
+            return int(await self.discard(key))
+        digests = [digest for digest in self._files if prefix is None or digest.startswith(prefix)]
+        return sum([await self.discard(digest) for digest in digests])
+
+    async def clear(self) -> None:
+        async with self._lock:
+            for digest in list(self._files):
+                self._forget(digest)
+                await asyncio.to_thread(self._unlink, digest)
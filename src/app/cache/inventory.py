@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..models.securetrack import TufinDevice
+
+logger = logging.getLogger(__name__)
+
+# Device fields with an exact-match (case-insensitive) index
+INDEXED_FIELDS = ("vendor", "model", "status", "domain_id", "virtual_type", "parent_id")
+
+class InvalidCursorError(ValueError):
+    pass
+
+def _id_key(device_id: str) -> Tuple[int, int, str]:
+    """Sort key for device IDs: numeric IDs in numeric order, then any others as strings."""
+    return (0, int(device_id), "") if device_id.isdigit() else (1, 0, device_id)
+
+def _normalize(value: Any) -> str:
+    return str(value).strip().lower()
+
+def encode_cursor(device_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": device_id}).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return str(json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"])
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise InvalidCursorError("Invalid or corrupted cursor")
+
+class DevicePage:
+    def __init__(self, devices: List[TufinDevice], total: int, next_cursor: Optional[str]):
+        self.devices = devices
+        self.total = total
+        self.next_cursor = next_cursor
+
+class DeviceIndex:
+    """
+    Read-only, indexed copy of the full device inventory for paging and filtering.
+
+    Devices are kept sorted by ID and every INDEXED_FIELDS value maps to the sorted positions of
+    the matching devices, so a page is found by a binary search for the cursor and a walk over the
+    shortest matching position list: the cost depends on the page size and filter selectivity,
+    not on the size of the inventory. Cursors are keyset cursors (the last device ID returned),
+    so pages stay stable when the inventory is refreshed between requests.
+    """
+
+    MAX_MEMOIZED_TOTALS = 1024
+
+    def __init__(self, devices: List[TufinDevice]):
+        self.devices = sorted(devices, key=lambda device: _id_key(str(device.id)))
+        self._keys = [_id_key(str(device.id)) for device in self.devices]
+        self._positions: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for position, device in enumerate(self.devices):
+            for field in INDEXED_FIELDS:
+                value = getattr(device, field)
+                if value is not None:
+                    self._positions[field].setdefault(_normalize(value), []).append(position)
+        self._position_sets: Dict[Tuple[str, str], Set[int]] = {}
+        self._totals: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def _position_set(self, field: str, value: str) -> Set[int]:
+        if value not in self._positions[field]:
+            return set()
+        key = (field, value)
+        if key not in self._position_sets:
+            self._position_sets[key] = set(self._positions[field].get(value, ()))
+        return self._position_sets[key]
+
+    def page(self, filters: Optional[Dict[str, Any]] = None, limit: int = 100, cursor: Optional[str] = None,
+             name_contains: Optional[str] = None) -> DevicePage:
+        """
+        Returns up to `limit` devices after `cursor` matching all `filters` (exact, case-insensitive,
+        on INDEXED_FIELDS) and, if given, whose name contains `name_contains`.
+        Raises InvalidCursorError for a cursor that was not produced by this API.
+        """
+        criteria = sorted((field, _normalize(value)) for field, value in (filters or {}).items() if value is not None)
+        unknown = [field for field, _ in criteria if field not in self._positions]
+        if unknown:
+            raise ValueError(f"Unsupported device filter(s): {unknown}")
+        needle = name_contains.lower() if name_contains else None
+
+        start = bisect_right(self._keys, _id_key(decode_cursor(cursor))) if cursor else 0
+        if criteria:
+            # Walk the shortest position list and check the other criteria by set membership
+            lists = sorted(
+                ((self._positions[field].get(value, []), field, value) for field, value in criteria),
+                key=lambda item: len(item[0]),
+            )
+            base = lists[0][0]
+            others = [self._position_set(field, value) for _, field, value in lists[1:]]
+            candidates = (base[i] for i in range(bisect_left(base, start), len(base)))
+        else:
+            base, others = None, []
+            candidates = iter(range(start, len(self.devices)))
+
+        matches: List[TufinDevice] = []
+        for position in candidates:
+            if any(position not in other for other in others):
+                continue
+            device = self.devices[position]
+            if needle is not None and needle not in (device.name or "").lower():
+                continue
+            matches.append(device)
+            if len(matches) > limit:
+                break
+
+        has_more = len(matches) > limit
+        matches = matches[:limit]
+        next_cursor = encode_cursor(str(matches[-1].id)) if has_more and matches else None
+        return DevicePage(matches, self._total(criteria, needle, base, others), next_cursor)
+
+    def _total(self, criteria: List[Tuple[str, str]], needle: Optional[str], base: Optional[List[int]],
+               others: List[Set[int]]) -> int:
+        """Number of devices matching the criteria (memoized; O(1) without a name filter and with at most one criterion)."""
+        key = (tuple(criteria), needle)
+        if key in self._totals:
+            return self._totals[key]
+        if needle is None and not others:
+            total = len(base) if base is not None else len(self.devices)
+        else:
+            positions = base if base is not None else range(len(self.devices))
+            total = sum(
+                1 for position in positions
+                if all(position in other for other in others)
+                and (needle is None or needle in (self.devices[position].name or "").lower())
+            )
+        if len(self._totals) >= self.MAX_MEMOIZED_TOTALS:
+            self._totals.clear()
+        self._totals[key] = total
+        return total
@@ -0,0 +1,65 @@
+import logging
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from fastapi import HTTPException
+
+from ..core.metrics import metrics
+from .base import LRUCache
+
+logger = logging.getLogger(__name__)
+
+NEGATIVE_HITS = metrics.counter(
+    "tufin_cache_negative_hits_total", "Requests answered from the negative cache, by namespace and cached status."
+)
+
+class NegativeCache:
+    """
+    Short-TTL cache of deterministic upstream errors (404 for unknown IDs, 400 for invalid queries).
+
+    Keys are (namespace, key) with the same key the positive cache of that namespace uses, so a
+    device ID or canonical TQL maps to either a cached result or a cached error. Negative hits are
+    counted in their own metric to make misbehaving callers visible.
+    """
+
+    def __init__(self, statuses: Iterable[int] = (400, 404), ttl: float = 30.0, max_entries: int = 4096,
+                 max_bytes: Optional[int] = 4 * 1024 * 1024):
+        self.statuses = set(statuses)
+        self.store = LRUCache("negative", max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[HTTPException]:
+        cached = self.store.get(self._key(namespace, key))
+        if cached is None:
+            return None
+        status_code, detail = cached
+        NEGATIVE_HITS.inc(namespace=namespace, status=str(status_code))
+        logger.debug(f"Negative cache hit for {namespace} '{key}' ({status_code})")
+        return HTTPException(status_code=status_code, detail=detail)
+
+    def put(self, namespace: str, key: str, error: HTTPException) -> None:
+        if error.status_code in self.statuses:
+            self.store.set(self._key(namespace, key), (error.status_code, error.detail))
+
+    def discard(self, namespace: str, key: str) -> None:
+        self.store.delete(self._key(namespace, key))
+
+    @contextmanager
+    def scope(self, namespace: str, key: str, bypass: bool = False) -> Iterator[None]:
+        """
+        Wraps an upstream call: raises a cached error instead of running it, remembers a cacheable
+        HTTPException raised by it, and forgets the error once the call succeeds.
+        """
+        if not bypass:
+            cached = self.get(namespace, key)
+            if cached is not None:
+                raise cached
+        try:
+            yield
+        except HTTPException as e:
+            self.put(namespace, key, e)
+            raise
+        self.discard(namespace, key)
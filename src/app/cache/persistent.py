@@ -0,0 +1,384 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from ..core import json_codec
+from ..core.metrics import metrics
+from .base import CacheEntry, LRUCache
+from .compression import COMPRESSION_ZLIB, COMPRESSION_ZSTD, zstandard
+
+logger = logging.getLogger(__name__)
+
+L2_WRITES = metrics.counter("tufin_l2_cache_writes_total", "Cache writes/deletes flushed to the on-disk tier, by namespace.")
+L2_LOADED = metrics.counter("tufin_l2_cache_loaded_total", "Entries loaded from the on-disk tier at startup, by namespace.")
+L2_COMPACTED = metrics.counter("tufin_l2_cache_compacted_total", "Rows removed by compaction (expired or beyond the bound).")
+L2_MERGED = metrics.counter(
+    "tufin_l2_cache_merged_total", "Queued writes merged away or collapsed into a namespace clear because the queue was full."
+)
+
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+# Tags of the in-memory compressors whose output can be stored as is
+_COMPRESSOR_TAGS = {COMPRESSION_ZLIB: _ZLIB, COMPRESSION_ZSTD: _ZSTD}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+# (op, namespace, key, blob, stored_at, expires_at); op is "set", "delete" or "clear". The blob of a
+# "set" is either ready bytes or a function serializing the value, called by the background writer.
+_PendingOp = Tuple[str, str, Optional[str], Union[None, bytes, Callable[[], bytes]], Optional[float], Optional[float]]
+
+class SqliteCacheTier:
+    """
+    Optional on-disk second tier behind the in-memory LRU caches (SQLite in WAL mode).
+
+    Bound caches report set/delete/clear here; the operations are queued and written behind in
+    batches by a background task, so the event loop never waits on disk. Serialization happens in
+    that task's worker thread as well, and values the in-memory cache already holds compressed are
+    stored with those bytes as is. Values are stored as compact JSON (via each cache's Codec),
+    zlib-compressed above `compress_min_bytes` (or as compressed by the in-memory cache), with
+    wall-clock expiry so TTLs carry across restarts. At startup load() refills the in-memory caches,
+    newest entries first, so a restarted server comes up warm. A periodic compaction drops expired
+    rows, trims each namespace to its cache's size bound and truncates the WAL.
+
+    A failed batch is requeued ahead of newer operations, so deletes and clears (revision
+    invalidation, admin purges) are never lost while the process runs. The queue is bounded by
+    `max_pending`: beyond it, operations on the same key are merged and then whole namespaces are
+    collapsed into a single clear, which can lose warm entries but never leaves an outdated row.
+    If operations are still pending at shutdown, their namespaces are recorded in a `.dirty` file
+    next to the database and load() skips (and clears) them at the next start.
+
+    All sqlite3 calls run in a worker thread (asyncio.to_thread) on a single connection.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 1.0,
+        compact_interval: float = 600.0,
+        compress_min_bytes: int = 1024,
+        max_pending: int = 10000,
+    ):
+        self.path = path or os.path.join(tempfile.gettempdir(), "tufin-mcp-cache.sqlite3")
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.compress_min_bytes = compress_min_bytes
+        self.max_pending = max(1, max_pending)
+        self._caches: Dict[str, LRUCache] = {}
+        self._pending: List[_PendingOp] = []
+        self._dirty_path = self.path + ".dirty"
+        self._dirty: Set[str] = set() # Namespaces whose rows may be outdated (read by open())
+        self._flush_lock = asyncio.Lock()
+        self._db_lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._loading = False
+        self._conn: Optional[sqlite3.Connection] = None # Opened by open(), off the event loop
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL") # Only effective for a new database file
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL") # A crash may lose the last batch, never corrupts the file
+        conn.execute(_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (expires_at)")
+        return conn
+
+    async def open(self) -> None:
+        if self._conn is None:
+            self._conn = await asyncio.to_thread(self._connect)
+            self._dirty = await asyncio.to_thread(self._read_dirty)
+            logger.info(f"L2 cache: using {self.path}")
+
+    def _read_dirty(self) -> Set[str]:
+        try:
+            with open(self._dirty_path, "rb") as f:
+                return set(json_codec.loads(f.read()))
+        except FileNotFoundError:
+            return set()
+        except Exception as e:
+            # Unreadable marker: treat every bound namespace as outdated
+            logger.warning(f"L2 cache: unreadable {self._dirty_path} ({e}); not loading any namespace")
+            return set(self._caches)
+
+    def _write_dirty(self, namespaces: Set[str]) -> None:
+        if namespaces:
+            with open(self._dirty_path, "wb") as f:
+                f.write(json_codec.dumps(sorted(namespaces)))
+        else:
+            try:
+                os.unlink(self._dirty_path)
+            except FileNotFoundError:
+                pass
+
+    # --- Binding ---
+
+    def bind(self, cache: LRUCache) -> None:
+        """Mirrors the cache's writes to disk from now on, serialized with the cache's codec."""
+        self._caches[cache.namespace] = cache
+        cache.backend = self
+
+    # --- Called synchronously by LRUCache ---
+
+    def write(self, namespace: str, key: str, entry: CacheEntry, ttl: Optional[float]) -> None:
+        """Queues the entry; only reuses or defers its serialization, so this is cheap on the event loop."""
+        if self._loading or namespace not in self._caches:
+            return
+        cache = self._caches[namespace]
+        tag = _COMPRESSOR_TAGS.get(cache.compressor.name) if cache.compressor is not None else None
+        if entry.compressed and tag is not None:
+            blob: Union[bytes, Callable[[], bytes]] = tag + entry.compressed_data
+        else:
+            codec, value = cache.codec, entry.value
+            blob = lambda: self._encode(codec.encode(value))
+        now = time.time()
+        self._enqueue(("set", namespace, key, blob, now, now + ttl if ttl is not None else None))
+
+    def remove(self, namespace: str, key: str) -> None:
+        if not self._loading and namespace in self._caches:
+            self._enqueue(("delete", namespace, key, None, None, None))
+
+    def clear(self, namespace: str) -> None:
+        if not self._loading and namespace in self._caches:
+            self._enqueue(("clear", namespace, None, None, None, None))
+
+    # --- Write queue ---
+
+    def _enqueue(self, op: _PendingOp) -> None:
+        self._pending.append(op)
+        if len(self._pending) > self.max_pending:
+            self._shrink()
+
+    def _shrink(self) -> None:
+        """
+        Brings the queue back under max_pending. First only the last operation per key is kept (a clear
+        supersedes everything queued before it in its namespace); if that is not enough, the namespaces
+        with the most queued operations are collapsed into a single clear. A set is never just dropped,
+        since that could leave an outdated row on disk.
+        """
+        before = len(self._pending)
+        kept: List[_PendingOp] = []
+        seen: Set[Tuple[str, Optional[str]]] = set()
+        cleared: Set[str] = set()
+        for op in reversed(self._pending):
+            namespace, key = op[1], op[2]
+            if namespace in cleared or (namespace, key) in seen:
+                continue
+            if op[0] == "clear":
+                cleared.add(namespace)
+            else:
+                seen.add((namespace, key))
+            kept.append(op)
+        kept.reverse()
+        while len(kept) > self.max_pending:
+            namespace, queued = Counter(op[1] for op in kept).most_common(1)[0]
+            if queued <= 1:
+                break
+            logger.warning(f"L2 cache: write queue full; replacing {queued} queued {namespace} operations with a clear")
+            kept = [op for op in kept if op[1] != namespace] + [("clear", namespace, None, None, None, None)]
+        self._pending = kept
+        L2_MERGED.inc(before - len(kept))
+
+    # --- Serialization ---
+
+    def _encode(self, data: Any) -> bytes:
+        raw = json_codec.dumps(data)
+        if len(raw) >= self.compress_min_bytes:
+            return _ZLIB + zlib.compress(raw, 6)
+        return _RAW + raw
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        blob = bytes(blob)
+        tag, payload = blob[:1], blob[1:]
+        if tag == _ZLIB:
+            payload = zlib.decompress(payload)
+        elif tag == _ZSTD:
+            if zstandard is None:
+                raise ValueError("entry is zstd-compressed but zstandard is not installed")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        return json_codec.loads(payload)
+
+    # --- Disk operations (worker thread) ---
+
+    @staticmethod
+    def _serialize(ops: List[_PendingOp]) -> List[_PendingOp]:
+        """Runs the deferred serializations; drops values that cannot be serialized."""
+        ready = []
+        for op, namespace, key, blob, stored_at, expires_at in ops:
+            if callable(blob):
+                try:
+                    blob = blob()
+                except Exception as e:
+                    logger.warning(f"L2 cache: cannot serialize {namespace} entry '{key}': {e}")
+                    continue
+            ready.append((op, namespace, key, blob, stored_at, expires_at))
+        return ready
+
+    def _apply(self, ops: List[_PendingOp]) -> None:
+        ops = self._serialize(ops)
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                for op, namespace, key, blob, stored_at, expires_at in ops:
+                    if op == "set":
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                            (namespace, key, blob, stored_at, expires_at),
+                        )
+                    elif op == "delete":
+                        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                    else:
+                        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _select(self, namespace: str, limit: int) -> List[Tuple[str, bytes, Optional[float]]]:
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT key, value, expires_at FROM cache_entries"
+                " WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)"
+                " ORDER BY stored_at DESC LIMIT ?",
+                (namespace, time.time(), limit),
+            ).fetchall()
+
+    def _compact(self, bounds: Dict[str, int]) -> int:
+        with self._db_lock:
+            removed = self._conn.execute(
+                "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            for namespace, bound in bounds.items():
+                removed += self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key NOT IN"
+                    " (SELECT key FROM cache_entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT ?)",
+                    (namespace, namespace, bound),
+                ).rowcount
+            self._conn.execute("PRAGMA incremental_vacuum").fetchall() # Runs one page per step
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return removed
+
+    # --- Async API ---
+
+    async def load(self, namespace: str, on_entry: Optional[Callable[[str, Any], None]] = None) -> int:
+        """
+        Refills the bound cache of `namespace` from disk (up to its max_entries, newest first) with the
+        remaining TTL of each entry. `on_entry(key, value)` runs before each value is stored.
+        A namespace marked dirty by the previous run is not loaded but cleared.
+        """
+        await self.open()
+        if namespace in self._dirty:
+            logger.warning(f"L2 cache: {namespace} entries may be outdated (writes were lost at the last shutdown); not loading them")
+            self._enqueue(("clear", namespace, None, None, None, None))
+            return 0
+        cache = self._caches[namespace]
+        rows = await asyncio.to_thread(self._select, namespace, cache.max_entries)
+        loaded = 0
+        now = time.time()
+        self._loading = True
+        try:
+            for key, blob, expires_at in reversed(rows): # Oldest first, so the newest end up most recently used
+                try:
+                    value = cache.codec.decode(self._decode(blob))
+                except Exception as e:
+                    logger.warning(f"L2 cache: dropping unreadable {namespace} entry '{key}': {e}")
+                    self.remove(namespace, key)
+                    continue
+                if on_entry is not None:
+                    on_entry(key, value)
+                cache.set(key, value, ttl=max(expires_at - now, 0.001) if expires_at is not None else None)
+                loaded += 1
+        finally:
+            self._loading = False
+        L2_LOADED.inc(loaded, namespace=namespace)
+        if loaded:
+            logger.info(f"L2 cache: loaded {loaded} {namespace} entries from {self.path}")
+        return loaded
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            await self.open()
+            ops, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._apply, ops)
+            except Exception as e:
+                # Requeued ahead of newer operations: a lost delete or clear would resurrect outdated rows
+                logger.error(f"L2 cache: failed to write {len(ops)} operations, retrying with the next batch: {e}")
+                self._pending = ops + self._pending
+                if len(self._pending) > self.max_pending:
+                    self._shrink()
+                return
+            for op in ops:
+                L2_WRITES.inc(namespace=op[1])
+            cleared = self._dirty & {op[1] for op in ops if op[0] == "clear"}
+            if cleared:
+                self._dirty -= cleared
+                await asyncio.to_thread(self._write_dirty, self._dirty)
+
+    async def compact(self) -> int:
+        await self.open()
+        await self.flush()
+        bounds = {namespace: cache.max_entries for namespace, cache in self._caches.items()}
+        removed = await asyncio.to_thread(self._compact, bounds)
+        L2_COMPACTED.inc(removed)
+        if removed:
+            logger.info(f"L2 cache: compaction removed {removed} rows")
+        return removed
+
+    def start(self) -> None:
+        """Starts the write-behind and compaction tasks (requires a running event loop)."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run_every(self.flush_interval, self.flush)),
+                asyncio.create_task(self._run_every(self.compact_interval, self.compact)),
+            ]
+
+    @staticmethod
+    async def _run_every(interval: float, job: Callable[[], Any]) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"L2 cache background job failed: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        """Stops the background tasks, writes pending operations and closes the database."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+        if self._pending:
+            # Could not be written: make the next start skip these namespaces instead of loading outdated rows
+            dirty = self._dirty | {op[1] for op in self._pending}
+            try:
+                await asyncio.to_thread(self._write_dirty, dirty)
+                logger.error(f"L2 cache: {len(self._pending)} operations not written; marked {sorted(dirty)} as outdated")
+            except OSError as e:
+                logger.error(f"L2 cache: {len(self._pending)} operations not written and {self._dirty_path} not writable: {e}")
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await asyncio.to_thread(conn.close)
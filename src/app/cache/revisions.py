@@ -0,0 +1,55 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REVISION_CHANGES = metrics.counter(
+    "tufin_device_revision_changes_total", "New device revisions observed (each one invalidates dependent cache entries)."
+)
+
+RevisionListener = Callable[[str, Optional[str], Optional[str]], None] # (device_id, old, new)
+
+class RevisionTracker:
+    """
+    Last known `latest_revision` per SecureTrack device.
+
+    Every device payload the client sees (listings, detail calls) is reported via observe().
+    When a device's revision differs from the one known before, subscribed caches are notified
+    so they can drop entries derived from the old policy.
+    """
+
+    def __init__(self):
+        self._revisions: Dict[str, Optional[str]] = {}
+        self._listeners: List[RevisionListener] = []
+
+    def __len__(self) -> int:
+        return len(self._revisions)
+
+    def subscribe(self, listener: RevisionListener) -> None:
+        self._listeners.append(listener)
+
+    def current(self, device_id: str) -> Optional[str]:
+        return self._revisions.get(str(device_id))
+
+    def knows(self, device_id: str) -> bool:
+        return str(device_id) in self._revisions
+
+    def observe(self, device_id: str, revision: Optional[str]) -> bool:
+        """Records a device's revision; returns True (and notifies listeners) if it changed."""
+        device_id = str(device_id)
+        revision = str(revision) if revision is not None else None
+        known = device_id in self._revisions
+        old = self._revisions.get(device_id)
+        self._revisions[device_id] = revision
+        if not known or old == revision:
+            return False
+        REVISION_CHANGES.inc()
+        logger.info(f"Device {device_id} revision changed {old} -> {revision}; invalidating dependent caches")
+        for listener in self._listeners:
+            try:
+                listener(device_id, old, revision)
+            except Exception as e:
+                logger.error(f"Revision listener failed for device {device_id}: {e}", exc_info=True)
+        return True
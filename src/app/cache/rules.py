@@ -0,0 +1,116 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from .base import LRUCache
+from .compression import Compressor
+from .revisions import RevisionTracker
+
+logger = logging.getLogger(__name__)
+
+# Quoted strings (kept verbatim), parentheses, comparison operators/commas, and bare words
+_TOKEN = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[()]|!=|>=|<=|[=<>,]|[^\s()'"=<>!,]+|!""")
+_KEYWORDS = {"and", "or", "not", "in", "contains", "exists", "between", "like", "is", "null"}
+_BOOLEAN_OPERATORS = {"AND", "OR"}
+
+def _tokenize(tql: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(tql):
+        if token.lower() in _KEYWORDS:
+            token = token.upper()
+        tokens.append(token)
+    return tokens
+
+def _is_wrapped(tokens: List[str]) -> bool:
+    """True if the whole token list is one parenthesized group, e.g. ( a OR b )."""
+    if len(tokens) < 2 or tokens[0] != "(" or tokens[-1] != ")":
+        return False
+    depth = 0
+    for index, token in enumerate(tokens):
+        depth += token == "("
+        depth -= token == ")"
+        if depth == 0 and index < len(tokens) - 1:
+            return False
+    return depth == 0
+
+def _split_top_level(tokens: List[str]):
+    """
+    Splits tokens into top-level clauses joined by AND/OR; returns (clauses, operators, balanced).
+    The AND of `x BETWEEN a AND b` belongs to its clause and does not join two conditions.
+    """
+    clauses: List[List[str]] = [[]]
+    operators = set()
+    depth = 0
+    in_between = False
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and token == "BETWEEN":
+            in_between = True
+        if depth == 0 and token in _BOOLEAN_OPERATORS and not (in_between and token == "AND"):
+            operators.add(token)
+            clauses.append([])
+        else:
+            if depth == 0 and token == "AND":
+                in_between = False
+            clauses[-1].append(token)
+    return clauses, operators, depth == 0
+
+def _canonical(tokens: List[str]) -> str:
+    while _is_wrapped(tokens):
+        tokens = tokens[1:-1]
+
+    clauses, operators, balanced = _split_top_level(tokens)
+    if not balanced or len(operators) != 1 or any(not clause for clause in clauses):
+        # Single clause, mixed AND/OR precedence or unbalanced input: keep the order as written
+        return " ".join(tokens)
+    # A pure conjunction or disjunction is commutative, so its clauses can be sorted
+    operator = operators.pop()
+    parts = []
+    for clause in clauses:
+        inner = _canonical(clause)
+        parts.append(f"( {inner} )" if _has_top_level_operator(inner) else inner)
+    return f" {operator} ".join(sorted(parts))
+
+def _has_top_level_operator(text: str) -> bool:
+    return bool(_split_top_level(_tokenize(text))[1])
+
+def canonicalize_tql(tql: Optional[str]) -> str:
+    """
+    Canonical form of a TQL filter for cache keys.
+
+    Whitespace is collapsed, keywords (AND, OR, NOT, IN, CONTAINS, ...) are upper-cased, redundant
+    outer parentheses are dropped, and the clauses of a pure AND (or pure OR) group are sorted.
+    Quoted values and field names are kept as written; groups mixing AND and OR keep their order.
+    """
+    if not tql or not tql.strip():
+        return ""
+    return _canonical(_tokenize(tql))
+
+class RuleQueryCache:
+    """
+    TTL + LRU cache of GraphQL rule query results keyed on the canonical TQL filter.
+    Any device revision change may alter rule results, so it clears the whole cache.
+    Results vary from a few KB to tens of MB, so `max_bytes` is the bound that matters here.
+    """
+
+    def __init__(self, tracker: RevisionTracker, ttl: Optional[float] = 300.0, max_entries: int = 256,
+                 max_bytes: Optional[int] = None, compressor: Optional[Compressor] = None):
+        self.store = LRUCache("rules", max_entries=max_entries, ttl=ttl, max_bytes=max_bytes, compressor=compressor)
+        tracker.subscribe(self._on_revision_change)
+
+    def get(self, tql_filter: Optional[str]) -> Optional[Dict[str, Any]]:
+        result = self.store.get(canonicalize_tql(tql_filter))
+        self.store.record("hit" if result is not None else "miss")
+        return result
+
+    async def put(self, tql_filter: Optional[str], result: Dict[str, Any]) -> None:
+        # Results can be tens of MB: serialized (and compressed) off the event loop
+        await self.store.set_async(canonicalize_tql(tql_filter), result)
+
+    def _on_revision_change(self, device_id: str, old: Optional[str], new: Optional[str]) -> None:
+        if len(self.store):
+            logger.info(f"Clearing {len(self.store)} cached rule queries after a revision change on device {device_id}")
+            self.store.clear()
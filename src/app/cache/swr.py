@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .base import IDENTITY_CODEC, CacheEntry, Codec, LRUCache
+from .compression import Compressor
+
+logger = logging.getLogger(__name__)
+
+class StaleWhileRevalidateCache:
+    """
+    TTL cache that keeps serving an expired value while one background task refreshes it.
+
+    - age < ttl: fresh hit.
+    - ttl <= age < max_stale: the stale value is returned immediately and a single background
+      refresh per key is started (failures keep the stale value and are only logged).
+    - age >= max_stale, missing, or bypass: the caller waits for a fetch. Concurrent waiters for
+      the same key share that fetch.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_stale: float, max_entries: int = 64,
+                 max_bytes: Optional[int] = None, codec: Codec = IDENTITY_CODEC, compressor: Optional[Compressor] = None,
+                 digest: bool = False):
+        self.ttl = ttl
+        self.max_stale = max(ttl, max_stale)
+        # Entries past the hard staleness bound are dropped by the underlying store
+        self.store = LRUCache(
+            namespace, max_entries=max_entries, ttl=self.max_stale, max_bytes=max_bytes, codec=codec, compressor=compressor,
+            digest=digest,
+        )
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]], bypass: bool = False) -> Any:
+        if bypass:
+            self.store.record("bypass")
+            return await self._load(key, loader)
+
+        entry = self.store.get_entry(key)
+        if entry is None:
+            self.store.record("miss")
+            return await self._load(key, loader)
+        if entry.age < self.ttl:
+            self.store.record("hit")
+        else:
+            self.store.record("stale")
+            self._schedule_refresh(key, loader)
+        return entry.value
+
+    async def get_entry(self, key: str, loader: Callable[[], Awaitable[Any]], bypass: bool = False) -> CacheEntry:
+        """
+        Same lookup as get(), but returns the cache entry without decoding its value, so callers can
+        check its `digest` (with `digest=True`) first. A freshly loaded value that could not be cached (too large) is
+        returned in a detached entry without a digest.
+        """
+        if bypass:
+            self.store.record("bypass")
+            value = await self._load(key, loader)
+            return self.store.get_entry(key) or CacheEntry(value, None)
+
+        entry = self.store.get_entry(key)
+        if entry is None:
+            self.store.record("miss")
+            value = await self._load(key, loader)
+            return self.store.get_entry(key) or CacheEntry(value, None)
+        if entry.age < self.ttl:
+            self.store.record("hit")
+        else:
+            self.store.record("stale")
+            self._schedule_refresh(key, loader)
+        return entry
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Returns the cached value (fresh or stale) without counting a lookup or refreshing."""
+        return self.store.get(key)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self.store.clear()
+        else:
+            self.store.delete(key)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_store(key, loader))
+            self._loading[key] = task
+            task.add_done_callback(lambda t: self._on_load_done(key, t))
+        # Shielded so one cancelled caller does not abort the fetch for the others
+        return await asyncio.shield(task)
+
+    def _on_load_done(self, key: str, task: asyncio.Task) -> None:
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _load_and_store(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        # Loaded values are typically large (whole listings): serialized off the event loop
+        await self.store.set_async(key, value)
+        return value
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing or key in self._loading:
+            return
+        task = asyncio.ensure_future(self._refresh(key, loader))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._load(key, loader)
+            logger.debug(f"Refreshed stale cache entry '{self.store.namespace}:{key}'")
+        except Exception as e:
+            logger.warning(f"Background refresh of '{self.store.namespace}:{key}' failed; serving stale data: {e}")
+
+    async def close(self) -> None:
+        """Cancels in-flight background refreshes (on shutdown)."""
+        tasks = list(self._refreshing.values()) + list(self._loading.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
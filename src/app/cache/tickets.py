@@ -0,0 +1,73 @@
+import logging
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel
+
+from ..models.securechange import DateDetails, TufinTicket
+from .base import LRUCache, model_codec
+from .compression import Compressor
+
+logger = logging.getLogger(__name__)
+
+class TicketStamp(BaseModel):
+    """The few ticket fields needed to decide whether a cached TufinTicket is still current."""
+    id: Optional[int] = None
+    status: Optional[str] = None
+    update_date: Optional[DateDetails] = None
+
+def _update_value(ticket: Any) -> Optional[str]:
+    return ticket.update_date.value if ticket.update_date is not None else None
+
+class TicketCache:
+    """
+    Write-through cache of SecureChange tickets.
+
+    Tickets in a final status (closed, resolved, ...) never change again and are served without
+    an upstream call. Open tickets are revalidated: the fresh payload is checked against the cached
+    update_date using the small TicketStamp model, and the full TufinTicket is only parsed when the
+    ticket actually changed. Entries have no TTL; the entry and byte bounds keep memory in check.
+    """
+
+    def __init__(self, final_statuses: Iterable[str], max_entries: int = 10000,
+                 max_bytes: Optional[int] = None, compressor: Optional[Compressor] = None):
+        self.final_statuses = {s.strip().lower() for s in final_statuses}
+        self.store = LRUCache(
+            "ticket", max_entries=max_entries, ttl=None, max_bytes=max_bytes,
+            codec=model_codec(TufinTicket), compressor=compressor,
+        )
+
+    def is_final(self, ticket: TufinTicket) -> bool:
+        return (ticket.status or "").strip().lower() in self.final_statuses
+
+    def get_final(self, ticket_id: int) -> Optional[TufinTicket]:
+        """Returns the cached ticket if it is in a final status (a hit), otherwise None without recording."""
+        ticket: Optional[TufinTicket] = self.store.get(str(ticket_id))
+        if ticket is not None and self.is_final(ticket):
+            self.store.record("hit")
+            return ticket
+        return None
+
+    def revalidate(self, ticket_id: int, payload: Any) -> Optional[TufinTicket]:
+        """Returns the cached ticket if the fresh payload has the same update_date and status, else None."""
+        cached: Optional[TufinTicket] = self.store.get(str(ticket_id))
+        if cached is None or _update_value(cached) is None:
+            self.store.record("miss")
+            return None
+        try:
+            stamp = TicketStamp.model_validate(payload)
+        except Exception:
+            self.store.record("miss")
+            return None
+        if _update_value(stamp) == _update_value(cached) and stamp.status == cached.status:
+            self.store.record("revalidated")
+            return cached
+        self.store.record("miss")
+        return None
+
+    def put(self, ticket: TufinTicket, ticket_id: Optional[int] = None) -> None:
+        key = ticket.id if ticket.id is not None else ticket_id
+        if key is not None:
+            self.store.set(str(key), ticket)
+
+    def invalidate(self, ticket_id: int) -> None:
+        self.store.delete(str(ticket_id))
@@ -0,0 +1,155 @@
+import ipaddress
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.securetrack import TufinTopologyPathResponse
+from .base import Codec, LRUCache
+from .compression import Compressor
+from .revisions import RevisionTracker
+
+logger = logging.getLogger(__name__)
+
+_HOST_PORT = re.compile(r"^\[?(?P<host>[^\[\]]+?)\]?:(?P<port>\d{1,5})$")
+_SERVICE = re.compile(r"^(?P<proto>[a-z][a-z0-9-]*)\s*[:/ ]\s*(?P<ports>\d{1,5}(?:\s*-\s*\d{1,5})?)$")
+_SERVICE_PORT_FIRST = re.compile(r"^(?P<ports>\d{1,5}(?:\s*-\s*\d{1,5})?)\s*/\s*(?P<proto>[a-z][a-z0-9-]*)$")
+
+def _split(value: str) -> List[str]:
+    return [token.strip() for token in str(value).split(",") if token.strip()]
+
+def _normalize_ip(token: str) -> Optional[str]:
+    """Canonical text for an IP, CIDR (host routes collapse to the IP) or IP range; None for other tokens."""
+    if "-" in token:
+        first, _, last = token.partition("-")
+        first_ip, last_ip = _normalize_ip(first.strip()), _normalize_ip(last.strip())
+        if first_ip and last_ip and "/" not in first_ip + last_ip:
+            return f"{first_ip}-{last_ip}"
+        return None
+    candidate = token
+    if re.fullmatch(r"[\d.]+(/\d+)?", token):
+        # Drop leading zeros in IPv4 octets ("010.001.000.001"), which ipaddress rejects
+        address, _, prefix = token.partition("/")
+        candidate = ".".join(str(int(octet)) if octet.isdigit() else octet for octet in address.split("."))
+        candidate += f"/{prefix}" if prefix else ""
+    try:
+        network = ipaddress.ip_network(candidate, strict=False)
+    except ValueError:
+        return None
+    if network.num_addresses == 1:
+        return str(network.network_address)
+    return str(network)
+
+def normalize_address(value: str) -> str:
+    """
+    Normalizes a topology src/dst: IP formatting, CIDR, ranges, host:port and object-name case.
+    Multiple comma-separated elements are de-duplicated and sorted (their order does not matter).
+    """
+    normalized: Set[str] = set()
+    for token in _split(value):
+        port = None
+        match = _HOST_PORT.match(token)
+        if match and (token.startswith("[") or token.count(":") == 1):
+            token, port = match.group("host"), int(match.group("port"))
+        address = _normalize_ip(token) or token.lower()
+        if port is not None:
+            address = f"[{address}]:{port}" if ":" in address else f"{address}:{port}"
+        normalized.add(address)
+    return ",".join(sorted(normalized))
+
+def normalize_service(value: str) -> str:
+    """Normalizes services so that 'tcp:80', 'TCP/80', 'tcp 80' and '80/tcp' share one key."""
+    normalized: Set[str] = set()
+    for token in _split(value):
+        token = token.lower()
+        match = _SERVICE.match(token) or _SERVICE_PORT_FIRST.match(token)
+        if match:
+            ports = "-".join(str(int(p)) for p in re.split(r"\s*-\s*", match.group("ports")))
+            low, _, high = ports.partition("-")
+            if high == low:
+                ports = low
+            token = f"{match.group('proto')}/{ports}"
+        normalized.add(token)
+    return ",".join(sorted(normalized))
+
+def topology_key(src: str, dst: str, service: str) -> str:
+    return f"src={normalize_address(src)}|dst={normalize_address(dst)}|svc={normalize_service(service)}"
+
+def path_device_ids(result: TufinTopologyPathResponse) -> List[str]:
+    return [str(device.id) for device in result.device_info or [] if device.id is not None]
+
+# Entries are (result, {device_id: revision}) pairs
+TOPOLOGY_ENTRY_CODEC = Codec(
+    lambda entry: {"result": entry[0].model_dump(mode="json", exclude_none=True), "revisions": entry[1]},
+    lambda data: (TufinTopologyPathResponse.model_validate(data["result"]), data["revisions"]),
+)
+
+class TopologyPathCache:
+    """
+    LRU + TTL cache of topology path results, keyed on the normalized (src, dst, service).
+
+    Each entry remembers the revisions of the devices on its path. A new revision of any of
+    those devices drops the entry immediately (via the RevisionTracker subscription), and the
+    revisions are re-checked on every hit in case a change was recorded in between. A reverse
+    index from device ID to cache keys, kept in step with the store through its on_store/on_remove
+    hooks, finds those entries without decoding any cached result.
+    """
+
+    def __init__(self, tracker: RevisionTracker, ttl: Optional[float] = 600.0, max_entries: int = 2048,
+                 max_bytes: Optional[int] = None, compressor: Optional[Compressor] = None):
+        self.tracker = tracker
+        self.store = LRUCache(
+            "topology_path", max_entries=max_entries, ttl=ttl, max_bytes=max_bytes,
+            codec=TOPOLOGY_ENTRY_CODEC, compressor=compressor,
+        )
+        self._keys_by_device: Dict[str, Set[str]] = {}
+        self._devices_by_key: Dict[str, List[str]] = {}
+        self.store.on_store = self._index
+        self.store.on_remove = self._unindex
+        tracker.subscribe(self._on_revision_change)
+
+    def _index(self, key: str, entry: Tuple[TufinTopologyPathResponse, Dict[str, Optional[str]]]) -> None:
+        self._unindex(key)
+        device_ids = list(entry[1])
+        self._devices_by_key[key] = device_ids
+        for device_id in device_ids:
+            self._keys_by_device.setdefault(device_id, set()).add(key)
+
+    def _unindex(self, key: str) -> None:
+        for device_id in self._devices_by_key.pop(key, ()):
+            keys = self._keys_by_device.get(device_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_device[device_id]
+
+    def get(self, src: str, dst: str, service: str) -> Optional[TufinTopologyPathResponse]:
+        key = topology_key(src, dst, service)
+        cached: Optional[Tuple[TufinTopologyPathResponse, Dict[str, Optional[str]]]] = self.store.get(key)
+        if cached is None:
+            self.store.record("miss")
+            return None
+        result, revisions = cached
+        if any(self.tracker.current(device_id) != revision for device_id, revision in revisions.items()):
+            self.store.delete(key)
+            self.store.record("miss")
+            return None
+        self.store.record("hit")
+        return result
+
+    def put(self, src: str, dst: str, service: str, result: TufinTopologyPathResponse) -> None:
+        key = topology_key(src, dst, service)
+        device_ids = path_device_ids(result)
+        revisions = {device_id: self.tracker.current(device_id) for device_id in device_ids}
+        self.store.set(key, (result, revisions))
+
+    def invalidate_devices(self, device_ids: Iterable[str]) -> int:
+        """Drops every cached path through any of the devices (via the reverse index, nothing is decoded)."""
+        keys: Set[str] = set()
+        for device_id in device_ids:
+            keys |= self._keys_by_device.get(str(device_id), set())
+        return sum(self.store.delete(key) for key in keys)
+
+    def _on_revision_change(self, device_id: str, old: Optional[str], new: Optional[str]) -> None:
+        dropped = self.invalidate_devices([device_id])
+        if dropped:
+            logger.info(f"Dropped {dropped} cached topology path(s) through device {device_id}")
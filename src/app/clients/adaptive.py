@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+from .errors import UpstreamRejectedError
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_LIMIT = metrics.gauge("tufin_adaptive_concurrency_limit", "Current adaptive in-flight limit per upstream.")
+ADAPTIVE_IN_FLIGHT = metrics.gauge("tufin_adaptive_in_flight", "Requests currently in flight per upstream.")
+ADAPTIVE_BASELINE = metrics.gauge(
+    "tufin_adaptive_baseline_latency_seconds", "Long-term latency baseline the limiter compares against."
+)
+ADAPTIVE_DECREASES = metrics.counter("tufin_adaptive_limit_decreases_total", "Multiplicative limit cuts, by reason.")
+ADAPTIVE_REJECTED = metrics.counter(
+    "tufin_adaptive_rejected_total", "Calls rejected after waiting too long under the adaptive limit."
+)
+
+class ConcurrencyLimitExceeded(UpstreamRejectedError):
+    def __init__(self, upstream: str):
+        super().__init__(f"Tufin upstream '{upstream}' is at its adaptive concurrency limit; try again shortly")
+        self.upstream = upstream
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD in-flight limit for one upstream, driven by observed latency and errors.
+
+    Each completed call updates a short-term latency EWMA and a slow-moving baseline EWMA.
+    - Additive increase: while calls succeed and short-term latency stays within
+      `latency_tolerance` x baseline, the limit grows by 1/limit per call (about +1 per round of calls),
+      but only when the current limit is actually being used.
+    - Multiplicative decrease: on an error or when latency exceeds the tolerance, the limit is
+      multiplied by `backoff_ratio`, at most once per cool-down (one short-term latency).
+    """
+
+    SHORT_ALPHA = 0.2
+    BASELINE_ALPHA = 0.01
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 100,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.75,
+        max_wait: Optional[float] = 10.0,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.max_wait = max_wait
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._short: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        self._publish()
+
+    @classmethod
+    def from_settings(cls, settings: Settings, name: str) -> "AdaptiveConcurrencyLimiter":
+        return cls(
+            name,
+            initial_limit=settings.TUFIN_ADAPTIVE_INITIAL_LIMIT,
+            min_limit=settings.TUFIN_ADAPTIVE_MIN_LIMIT,
+            max_limit=settings.TUFIN_ADAPTIVE_MAX_LIMIT,
+            latency_tolerance=settings.TUFIN_ADAPTIVE_LATENCY_TOLERANCE,
+            backoff_ratio=settings.TUFIN_ADAPTIVE_BACKOFF_RATIO,
+            max_wait=settings.TUFIN_ADAPTIVE_MAX_WAIT,
+        )
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _publish(self) -> None:
+        ADAPTIVE_LIMIT.set(self.limit, upstream=self.name)
+        ADAPTIVE_IN_FLIGHT.set(self._in_flight, upstream=self.name)
+        if self._baseline is not None:
+            ADAPTIVE_BASELINE.set(round(self._baseline, 6), upstream=self.name)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator["_Outcome"]:
+        """Waits for capacity under the current limit; the caller reports the outcome via the yielded object."""
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._in_flight < self.limit), timeout=self.max_wait
+                )
+            except asyncio.TimeoutError:
+                ADAPTIVE_REJECTED.inc(upstream=self.name)
+                raise ConcurrencyLimitExceeded(self.name)
+            self._in_flight += 1
+        self._publish()
+
+        outcome = _Outcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            if outcome.failed is not None:
+                self._on_sample(time.monotonic() - started, outcome.failed)
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+            self._publish()
+
+    def _on_sample(self, latency: float, failed: bool) -> None:
+        self._short = latency if self._short is None else self._short + self.SHORT_ALPHA * (latency - self._short)
+        if not failed:
+            self._baseline = latency if self._baseline is None else self._baseline + self.BASELINE_ALPHA * (latency - self._baseline)
+
+        congested = failed or (self._baseline is not None and self._short > self._baseline * self.latency_tolerance)
+        if congested:
+            now = time.monotonic()
+            if now - self._last_decrease >= (self._short or 0):
+                old = self.limit
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self._last_decrease = now
+                ADAPTIVE_DECREASES.inc(upstream=self.name, reason="error" if failed else "latency")
+                if self.limit != old:
+                    logger.warning(
+                        f"Adaptive limit for '{self.name}' cut {old} -> {self.limit} "
+                        f"({'error' if failed else f'latency {self._short:.3f}s vs baseline {self._baseline:.3f}s'})"
+                    )
+        elif self._in_flight >= self._limit / 2:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+class _Outcome:
+    """Set `failed` to report a completed call; leaving it None (e.g. on cancellation) records no sample."""
+
+    def __init__(self):
+        self.failed: Optional[bool] = None
+
+def build_limiters(settings: Settings, upstreams) -> Dict[str, AdaptiveConcurrencyLimiter]:
+    if not settings.TUFIN_ADAPTIVE_CONCURRENCY_ENABLED:
+        return {}
+    return {upstream: AdaptiveConcurrencyLimiter.from_settings(settings, upstream) for upstream in upstreams}
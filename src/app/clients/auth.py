@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SESSION_LOGINS = metrics.counter("tufin_session_logins_total", "Basic-auth logins performed to obtain a session.")
+SESSION_REFRESHES = metrics.counter("tufin_session_refreshes_total", "Sessions re-established after a 401.")
+
+AUTH_MODE_BASIC = "basic"
+AUTH_MODE_SESSION = "session"
+
+class _NodeSession:
+    """Session state for one node (origin) of an upstream."""
+    __slots__ = ("cookie", "supported", "lock")
+
+    def __init__(self):
+        self.cookie: Optional[Tuple[str, str]] = None # (cookie name, value)
+        self.supported = True
+        self.lock = asyncio.Lock()
+
+class TufinSessionAuth(httpx.Auth):
+    """
+    Session-based auth for one Tufin upstream.
+
+    The first request logs in with Basic auth and captures the session cookie Tufin sets
+    (JSESSIONID by default). Later requests send only the cookie, so Tufin does not re-authenticate
+    the user (often an LDAP round trip) on every call. A 401 drops the session and transparently
+    repeats the request with Basic auth, capturing the new cookie.
+
+    Sessions are kept per node (request origin): with several nodes behind one upstream
+    (TUFIN_*_URLS) requests are spread across them, and a session of one node is not valid on another.
+    If a node's login response carries no session cookie, that node does not support sessions and
+    gets plain Basic auth for all requests.
+    Only the async flow is supported (TufinApiClient uses httpx.AsyncClient).
+    """
+
+    requires_request_body = True # Needed to resend the request after a 401
+
+    def __init__(self, username: str, password: str, upstream: str, cookie_names: Iterable[str] = ("JSESSIONID",)):
+        self._basic_header = httpx.BasicAuth(username, password)._auth_header
+        self.upstream = upstream
+        self._cookie_names = {name.lower() for name in cookie_names}
+        self._nodes: Dict[str, _NodeSession] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings, upstream: str) -> "TufinSessionAuth":
+        return cls(settings.TUFIN_USERNAME, settings.TUFIN_PASSWORD, upstream, settings.TUFIN_SESSION_COOKIE_NAMES)
+
+    def has_session(self, base_url: str) -> bool:
+        """Whether a session is held for the node at `base_url`."""
+        node = self._nodes.get(self._origin(httpx.URL(base_url)))
+        return node is not None and node.cookie is not None
+
+    @staticmethod
+    def _origin(url: httpx.URL) -> str:
+        return f"{url.scheme}://{url.netloc.decode('ascii')}"
+
+    def _node(self, request: httpx.Request) -> _NodeSession:
+        origin = self._origin(request.url)
+        node = self._nodes.get(origin)
+        if node is None:
+            node = self._nodes[origin] = _NodeSession()
+        return node
+
+    def _apply_session(self, request: httpx.Request, session: Optional[Tuple[str, str]]) -> None:
+        """Replaces any session cookie on the request (e.g. a stale one from the client jar) with ours."""
+        request.headers.pop("Authorization", None)
+        pairs = [
+            pair.strip() for pair in request.headers.get("Cookie", "").split(";")
+            if pair.strip() and pair.split("=", 1)[0].strip().lower() not in self._cookie_names
+        ]
+        if session:
+            pairs.append(f"{session[0]}={session[1]}")
+        if pairs:
+            request.headers["Cookie"] = "; ".join(pairs)
+        else:
+            request.headers.pop("Cookie", None)
+
+    def _capture_session(self, node: _NodeSession, response: httpx.Response) -> bool:
+        for name, value in response.cookies.items():
+            if name.lower() in self._cookie_names:
+                node.cookie = (name, value)
+                return True
+        return False
+
+    def _prepare_login(self, request: httpx.Request) -> None:
+        """Turns the request into a login: Basic auth and no (stale) session cookie."""
+        self._apply_session(request, None)
+        request.headers["Authorization"] = self._basic_header
+
+    def _finish_login(self, node: _NodeSession, request: httpx.Request, response: httpx.Response) -> None:
+        """Captures the session cookie from a login response."""
+        SESSION_LOGINS.inc(upstream=self.upstream)
+        if response.status_code < 400 and not self._capture_session(node, response):
+            logger.warning(
+                f"Tufin upstream '{self.upstream}' node {self._origin(request.url)} did not return a session cookie; "
+                f"falling back to Basic auth."
+            )
+            node.supported = False
+
+    async def async_auth_flow(self, request: httpx.Request) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        node = self._node(request)
+        if not node.supported:
+            request.headers["Authorization"] = self._basic_header
+            yield request
+            return
+
+        session = node.cookie
+        if session is None:
+            # Serialize logins so a burst of first requests creates one session per node, not many
+            async with node.lock:
+                session = node.cookie
+                if session is None:
+                    self._prepare_login(request)
+                    response = yield request
+                    self._finish_login(node, request, response)
+                    return
+
+        self._apply_session(request, session)
+        response = yield request
+        if response.status_code != 401:
+            return
+
+        # Session expired or was invalidated upstream: log in again and repeat the request once
+        logger.info(f"Tufin session for upstream '{self.upstream}' node {self._origin(request.url)} rejected (401); re-authenticating.")
+        SESSION_REFRESHES.inc(upstream=self.upstream)
+        async with node.lock:
+            if node.cookie is not None and node.cookie != session:
+                # Another request already re-authenticated while we waited; reuse its session
+                self._apply_session(request, node.cookie)
+                yield request
+                return
+            node.cookie = None
+            self._prepare_login(request)
+            response = yield request
+            self._finish_login(node, request, response)
+
+def build_auth(settings: Settings, upstream: str) -> httpx.Auth:
+    """Returns the httpx auth handler for an upstream according to TUFIN_AUTH_MODE."""
+    mode = settings.TUFIN_AUTH_MODE.lower()
+    if mode == AUTH_MODE_SESSION:
+        return TufinSessionAuth.from_settings(settings, upstream)
+    if mode != AUTH_MODE_BASIC:
+        logger.warning(f"Unknown TUFIN_AUTH_MODE '{settings.TUFIN_AUTH_MODE}', using basic auth.")
+    return httpx.BasicAuth(settings.TUFIN_USERNAME, settings.TUFIN_PASSWORD)
@@ -0,0 +1,121 @@
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+NODE_REQUESTS = metrics.counter("tufin_node_requests_total", "Requests sent to each upstream node.")
+NODE_FAILURES = metrics.counter("tufin_node_failures_total", "Failed requests (5xx/transport) per upstream node.")
+
+class Node:
+    """One front-end node of an upstream, with EWMA latency and error-rate health tracking."""
+
+    ALPHA = 0.2
+    DOWN_AFTER_FAILURES = 3 # Consecutive failures before the node is treated as down
+    DOWN_SECONDS = 10.0 # How long a down node only receives occasional probe traffic
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    @property
+    def is_down(self) -> bool:
+        return time.monotonic() < self.down_until
+
+    def weight(self) -> float:
+        """Higher is healthier: fast, error-free and lightly loaded nodes get more traffic."""
+        if self.is_down:
+            return 0.01 # Keep a trickle of probe traffic so a recovered node is noticed
+        latency = self.latency if self.latency is not None else 0.05 # Optimistic until measured
+        health = max(0.01, (1.0 - self.error_rate) ** 2)
+        return health / (max(latency, 0.001) * (1 + self.in_flight))
+
+    def record(self, latency: float, failed: bool) -> None:
+        self.error_rate += self.ALPHA * ((1.0 if failed else 0.0) - self.error_rate)
+        if failed:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.DOWN_AFTER_FAILURES:
+                if not self.is_down:
+                    logger.warning(f"Marking Tufin node {self.base_url} down after {self.consecutive_failures} failures")
+                self.down_until = time.monotonic() + self.DOWN_SECONDS
+        else:
+            self.consecutive_failures = 0
+            self.down_until = 0.0
+            self.latency = latency if self.latency is None else self.latency + self.ALPHA * (latency - self.latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.base_url,
+            "down": self.is_down,
+            "latency_ewma": round(self.latency, 4) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "in_flight": self.in_flight,
+        }
+
+class NodeBalancer:
+    """
+    Health-weighted random load balancing across the nodes of one upstream.
+
+    Client methods build URLs against the primary (first) node; rewrite() swaps that base for the
+    chosen node, so callers do not need to know how many nodes exist.
+    """
+
+    def __init__(self, upstream: str, base_urls: Iterable[str]):
+        self.upstream = upstream
+        self.nodes: List[Node] = [Node(url) for url in base_urls]
+        if not self.nodes:
+            raise ValueError(f"No base URLs configured for upstream '{upstream}'")
+        self.primary = self.nodes[0]
+
+    @property
+    def is_multi_node(self) -> bool:
+        return len(self.nodes) > 1
+
+    def choose(self, exclude: Iterable[Node] = ()) -> Node:
+        if not self.is_multi_node:
+            return self.primary
+        excluded = set(id(n) for n in exclude)
+        candidates = [n for n in self.nodes if id(n) not in excluded] or self.nodes
+        weights = [n.weight() for n in candidates]
+        return random.choices(candidates, weights=weights, k=1)[0]
+
+    def rewrite(self, url: str, node: Node) -> str:
+        if node is self.primary or not url.startswith(self.primary.base_url):
+            return url
+        return node.base_url + url[len(self.primary.base_url):]
+
+    def record(self, node: Node, latency: float, failed: bool) -> None:
+        node.record(latency, failed)
+        NODE_REQUESTS.inc(upstream=self.upstream, node=node.base_url)
+        if failed:
+            NODE_FAILURES.inc(upstream=self.upstream, node=node.base_url)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [n.snapshot() for n in self.nodes]
+
+class LatencyTracker:
+    """Keeps the most recent latencies of an endpoint to derive hedging delays from a percentile."""
+
+    def __init__(self, size: int = 256):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p * (len(ordered) - 1)))))
+        return ordered[index]
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+from .errors import UpstreamRejectedError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BULKHEAD = "default"
+
+BULKHEAD_QUEUE_WAIT = metrics.histogram(
+    "tufin_bulkhead_queue_wait_seconds",
+    "Time calls waited for a bulkhead slot, by endpoint class.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+BULKHEAD_REJECTED = metrics.counter(
+    "tufin_bulkhead_rejected_total", "Calls rejected because the bulkhead queue was full or the wait timed out."
+)
+BULKHEAD_IN_FLIGHT = metrics.gauge("tufin_bulkhead_in_flight", "Calls currently holding a bulkhead slot.")
+BULKHEAD_QUEUED = metrics.gauge("tufin_bulkhead_queued", "Calls currently waiting for a bulkhead slot.")
+
+class BulkheadFullError(UpstreamRejectedError):
+    """Raised when a call cannot get a slot in its endpoint class's bulkhead."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"Too many concurrent '{name}' requests to Tufin ({reason}); try again shortly")
+        self.name = name
+
+class Bulkhead:
+    """
+    Concurrency limit for one endpoint class with a bounded wait queue.
+
+    At most `max_concurrent` calls run at once; up to `max_queue` more wait (for at most `max_wait`
+    seconds). Anything beyond that is rejected immediately, so slow endpoint classes cannot take
+    every connection away from cheap ones.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int = 0, max_wait: Optional[float] = None):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._in_flight = 0
+        self._queued = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _update_gauges(self) -> None:
+        BULKHEAD_IN_FLIGHT.set(self._in_flight, bulkhead=self.name)
+        BULKHEAD_QUEUED.set(self._queued, bulkhead=self.name)
+
+    def _reject(self, reason: str) -> BulkheadFullError:
+        BULKHEAD_REJECTED.inc(bulkhead=self.name, reason=reason)
+        logger.warning(f"Bulkhead '{self.name}' rejected a call: {reason} "
+                       f"(in_flight={self._in_flight}, queued={self._queued})")
+        return BulkheadFullError(self.name, reason)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds a slot for the duration of the block, waiting in the queue if needed."""
+        started = time.perf_counter()
+        if self._semaphore.locked():
+            if self._queued >= self.max_queue:
+                raise self._reject("queue_full")
+            self._queued += 1
+            self._update_gauges()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                raise self._reject("wait_timeout")
+            finally:
+                self._queued -= 1
+        else:
+            await self._semaphore.acquire()
+        BULKHEAD_QUEUE_WAIT.observe(time.perf_counter() - started, bulkhead=self.name)
+
+        self._in_flight += 1
+        self._update_gauges()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            self._update_gauges()
+
+def build_bulkheads(settings: Settings) -> Dict[str, Bulkhead]:
+    """Creates one bulkhead per configured endpoint class (always including 'default')."""
+    configs = dict(settings.TUFIN_BULKHEADS)
+    configs.setdefault(DEFAULT_BULKHEAD, {"max_concurrent": settings.TUFIN_POOL_MAX_CONNECTIONS})
+    return {
+        name: Bulkhead(
+            name,
+            max_concurrent=config.get("max_concurrent", settings.TUFIN_POOL_MAX_CONNECTIONS),
+            max_queue=config.get("max_queue", 0),
+            max_wait=config.get("max_wait"),
+        )
+        for name, config in configs.items()
+    }
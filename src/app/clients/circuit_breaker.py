@@ -0,0 +1,160 @@
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+from .errors import UpstreamRejectedError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = metrics.gauge("tufin_circuit_state", "Breaker state per upstream: 0=closed, 1=half_open, 2=open.")
+CIRCUIT_REJECTED = metrics.counter("tufin_circuit_rejected_total", "Calls failed fast because the breaker was open.")
+CIRCUIT_TRANSITIONS = metrics.counter("tufin_circuit_transitions_total", "Breaker state changes, by target state.")
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+_STATE_GAUGE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+class CircuitOpenError(UpstreamRejectedError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Tufin upstream '{upstream}' is temporarily unavailable (circuit open)", retry_after)
+        self.upstream = upstream
+
+class CircuitBreaker:
+    """
+    Count-based sliding-window circuit breaker for one upstream.
+
+    CLOSED: calls pass; once the window holds `minimum_calls` outcomes, the breaker opens if the failure
+    rate or slow-call rate reaches its threshold.
+    OPEN: calls fail fast with CircuitOpenError until `open_seconds` have passed.
+    HALF_OPEN: up to `half_open_calls` trial calls pass; any failure re-opens, all succeeding closes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.8,
+        slow_call_seconds: float = 10.0,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 3,
+    ):
+        self.name = name
+        self.minimum_calls = max(1, minimum_calls)
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=max(window_size, self.minimum_calls)) # (failed, slow)
+        self._state = CircuitState.CLOSED
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        CIRCUIT_STATE.set(0, upstream=name)
+
+    @classmethod
+    def from_settings(cls, settings: Settings, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window_size=settings.TUFIN_BREAKER_WINDOW_SIZE,
+            minimum_calls=settings.TUFIN_BREAKER_MINIMUM_CALLS,
+            failure_rate_threshold=settings.TUFIN_BREAKER_FAILURE_RATE,
+            slow_call_rate_threshold=settings.TUFIN_BREAKER_SLOW_CALL_RATE,
+            slow_call_seconds=settings.TUFIN_BREAKER_SLOW_CALL_SECONDS,
+            open_seconds=settings.TUFIN_BREAKER_OPEN_SECONDS,
+            half_open_calls=settings.TUFIN_BREAKER_HALF_OPEN_CALLS,
+        )
+
+    @property
+    def state(self) -> CircuitState:
+        # An open breaker becomes half-open lazily once its cool-down has elapsed
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, new_state: CircuitState) -> None:
+        if new_state == self._state:
+            return
+        logger.warning(f"Circuit breaker '{self.name}': {self._state.value} -> {new_state.value}")
+        self._state = new_state
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        elif new_state == CircuitState.CLOSED:
+            self._window.clear()
+            self._opened_at = None
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        CIRCUIT_STATE.set(_STATE_GAUGE_VALUES[new_state], upstream=self.name)
+        CIRCUIT_TRANSITIONS.inc(upstream=self.name, to=new_state.value)
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not be sent. Every permitted call must be followed by record()."""
+        state = self.state
+        if state == CircuitState.OPEN:
+            CIRCUIT_REJECTED.inc(upstream=self.name)
+            retry_after = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(self.name, retry_after)
+        if state == CircuitState.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_calls:
+                CIRCUIT_REJECTED.inc(upstream=self.name)
+                raise CircuitOpenError(self.name, 1.0)
+            self._half_open_in_flight += 1
+
+    def abandon(self) -> None:
+        """Releases a permitted call that ended without an outcome (e.g. the caller was cancelled)."""
+        if self._state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def record(self, failed: bool, duration: float) -> None:
+        """Records the outcome of a permitted call."""
+        slow = duration >= self.slow_call_seconds
+        if self._state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if failed or slow:
+                self._transition(CircuitState.OPEN)
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.half_open_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+        if self._state == CircuitState.OPEN:
+            return # Late result from a call started before the breaker opened
+
+        self._window.append((failed, slow))
+        if len(self._window) < self.minimum_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            logger.error(
+                f"Opening circuit breaker '{self.name}': failure_rate={failure_rate:.2f}, slow_call_rate={slow_rate:.2f}"
+            )
+            self._transition(CircuitState.OPEN)
+
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self._window)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failures / total, slow / total
+
+    def snapshot(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        return {
+            "state": self.state.value,
+            "calls_in_window": len(self._window),
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+        }
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+COALESCED_REQUESTS = metrics.counter(
+    "tufin_coalesced_requests_total", "Upstream calls avoided by joining an identical in-flight request."
+)
+COALESCE_LEADERS = metrics.counter(
+    "tufin_coalesce_leader_requests_total", "Coalescable upstream calls that were actually sent."
+)
+
+def coalesce_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """Builds a stable key from method, URL and params (order-insensitive, values stringified)."""
+    normalized = ""
+    if params:
+        items = []
+        for k, v in params.items():
+            if v is None:
+                continue
+            values = v if isinstance(v, (list, tuple)) else [v]
+            items.extend((str(k), str(item)) for item in values)
+        normalized = "&".join(f"{k}={v}" for k, v in sorted(items))
+    return f"{method.upper()} {url}?{normalized}"
+
+class RequestCoalescer:
+    """
+    Single-flight helper: concurrent callers with the same key share one upstream call.
+
+    The shared call runs in its own task, so a caller that is cancelled (e.g. the agent disconnects)
+    does not cancel the request for everyone else. Results and exceptions are delivered to all callers.
+    All Tufin calls use the same service account, so sharing responses between callers is safe.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]], endpoint: Optional[str] = None) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc(endpoint=endpoint or "unknown")
+            logger.debug(f"Joining in-flight upstream request: {key}")
+            return await asyncio.shield(task)
+
+        COALESCE_LEADERS.inc(endpoint=endpoint or "unknown")
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
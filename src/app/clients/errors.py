@@ -0,0 +1,9 @@
+# Exceptions raised by the client's protective layers (breakers, bulkheads, ...) instead of calling Tufin.
+# TufinApiClient maps them to 503 responses with a Retry-After hint.
+
+class UpstreamRejectedError(Exception):
+    """Base class: the call was rejected locally and never reached Tufin."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,98 @@
+import httpx
+import logging
+import time
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Upstream Identifiers ---
+# Each upstream gets its own connection pool (and, later, its own breaker/limits).
+UPSTREAM_SECURETRACK = "securetrack"
+UPSTREAM_SECURECHANGE = "securechange"
+UPSTREAM_GRAPHQL = "graphql"
+UPSTREAMS = (UPSTREAM_SECURETRACK, UPSTREAM_SECURECHANGE, UPSTREAM_GRAPHQL)
+
+# --- Pool Metrics ---
+POOL_WAIT_SECONDS = metrics.histogram(
+    "tufin_pool_wait_seconds",
+    "Time from dispatch until a pooled connection was available (or a new one started connecting).",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+POOL_CONNECTIONS_OPENED = metrics.counter(
+    "tufin_pool_connections_opened_total", "Requests that had to open a new TCP connection."
+)
+POOL_CONNECTIONS_REUSED = metrics.counter(
+    "tufin_pool_connections_reused_total", "Requests served over an existing keep-alive connection."
+)
+
+def http2_available() -> bool:
+    """Returns True if the optional 'h2' package (httpx[http2]) is installed."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _pool_setting(settings: Settings, upstream: str, key: str, default: Any) -> Any:
+    """Looks up a per-upstream override from TUFIN_POOL_OVERRIDES, falling back to the global value."""
+    overrides = settings.TUFIN_POOL_OVERRIDES.get(upstream, {})
+    return overrides.get(key, default)
+
+def build_upstream_client(settings: Settings, upstream: str, auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+    """Creates the httpx client (and therefore the connection pool) for a single upstream."""
+    limits = httpx.Limits(
+        max_connections=int(_pool_setting(settings, upstream, "max_connections", settings.TUFIN_POOL_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(_pool_setting(
+            settings, upstream, "max_keepalive_connections", settings.TUFIN_POOL_MAX_KEEPALIVE_CONNECTIONS
+        )),
+        keepalive_expiry=float(_pool_setting(settings, upstream, "keepalive_expiry", settings.TUFIN_POOL_KEEPALIVE_EXPIRY)),
+    )
+    # Pool timeout bounds how long a request may wait for a free connection
+    pool_timeout = _pool_setting(settings, upstream, "pool_timeout", settings.TUFIN_POOL_TIMEOUT)
+    timeout = httpx.Timeout(settings.TUFIN_API_TIMEOUT, pool=pool_timeout if pool_timeout is not None else settings.TUFIN_API_TIMEOUT)
+
+    use_http2 = bool(_pool_setting(settings, upstream, "http2", settings.TUFIN_HTTP2_ENABLED))
+    if use_http2 and not http2_available():
+        logger.warning(
+            f"HTTP/2 requested for upstream '{upstream}' but the 'h2' package is not installed "
+            "(pip install 'httpx[http2]'). Falling back to HTTP/1.1."
+        )
+        use_http2 = False
+
+    logger.info(
+        f"Creating connection pool for upstream '{upstream}': max_connections={limits.max_connections}, "
+        f"max_keepalive={limits.max_keepalive_connections}, keepalive_expiry={limits.keepalive_expiry}s, http2={use_http2}"
+    )
+    return httpx.AsyncClient(
+        auth=auth,
+        verify=settings.TUFIN_SSL_VERIFY,
+        timeout=timeout,
+        limits=limits,
+        http2=use_http2,
+    )
+
+def make_pool_trace(upstream: str) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+    """
+    Builds an httpcore trace callback that records pool wait time and connection reuse.
+    httpcore does not emit a pool-acquire event, so the wait is measured from dispatch until the
+    first connection-level event: either a new TCP connect or sending headers on a reused connection.
+    """
+    started = time.perf_counter()
+    state = {"recorded": False}
+
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        if state["recorded"]:
+            return
+        if event_name == "connection.connect_tcp.started":
+            POOL_CONNECTIONS_OPENED.inc(upstream=upstream)
+        elif event_name.endswith(".send_request_headers.started"):
+            POOL_CONNECTIONS_REUSED.inc(upstream=upstream)
+        else:
+            return
+        state["recorded"] = True
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, upstream=upstream)
+
+    return trace
@@ -0,0 +1,144 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+import httpx
+
+from ..core.config import Settings
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to repeat per RFC 9110. Other methods only retry if the
+# endpoint's policy marks it idempotent (e.g. read-only GraphQL queries sent via POST).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+RETRIES = metrics.counter("tufin_retries_total", "Upstream attempts that were retried, by endpoint and reason.")
+RETRIES_EXHAUSTED = metrics.counter(
+    "tufin_retries_exhausted_total", "Calls that still failed after using their retry attempts or deadline."
+)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter, bounded by attempts and a total deadline."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        deadline: Optional[float] = None,
+        retry_statuses: Sequence[int] = (429, 502, 503, 504),
+        idempotent: Optional[bool] = None,
+        respect_retry_after: bool = True,
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent = idempotent # None = decide from the HTTP method
+        self.respect_retry_after = respect_retry_after
+
+    @classmethod
+    def from_settings(cls, settings: Settings, endpoint: Optional[str] = None) -> "RetryPolicy":
+        """Builds the policy for an endpoint: global TUFIN_RETRY_* values plus TUFIN_RETRY_POLICIES overrides."""
+        overrides: Dict[str, Any] = settings.TUFIN_RETRY_POLICIES.get(endpoint or "", {})
+        return cls(
+            max_attempts=overrides.get("max_attempts", settings.TUFIN_RETRY_MAX_ATTEMPTS if settings.TUFIN_RETRY_ENABLED else 1),
+            base_delay=overrides.get("base_delay", settings.TUFIN_RETRY_BASE_DELAY),
+            max_delay=overrides.get("max_delay", settings.TUFIN_RETRY_MAX_DELAY),
+            deadline=overrides.get("deadline", settings.TUFIN_RETRY_DEADLINE),
+            retry_statuses=overrides.get("retry_statuses", settings.TUFIN_RETRY_STATUS_CODES),
+            idempotent=overrides.get("idempotent"),
+            respect_retry_after=overrides.get("respect_retry_after", True),
+        )
+
+    def allows_method(self, method: str) -> bool:
+        if self.idempotent is not None:
+            return self.idempotent
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def retry_reason(self, exc: Exception) -> Optional[str]:
+        """Returns a short reason label if the exception is retryable, else None."""
+        if isinstance(exc, httpx.HTTPStatusError):
+            code = exc.response.status_code
+            return f"status_{code}" if code in self.retry_statuses else None
+        if isinstance(exc, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(exc, httpx.TransportError):
+            return "transport"
+        return None
+
+async def call_with_retry(
+    policy: RetryPolicy,
+    attempt_fn: Callable[[Optional[float]], Awaitable[httpx.Response]],
+    method: str,
+    endpoint: Optional[str] = None,
+) -> httpx.Response:
+    """
+    Runs attempt_fn until it succeeds, a non-retryable error occurs, or attempts/deadline run out.
+    attempt_fn receives the remaining deadline budget in seconds (or None) so it can cap its timeout.
+    """
+    label = endpoint or "unknown"
+    max_attempts = policy.max_attempts if policy.allows_method(method) else 1
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        remaining = None if policy.deadline is None else policy.deadline - (time.monotonic() - started)
+        try:
+            return await attempt_fn(remaining)
+        except Exception as e:
+            reason = policy.retry_reason(e)
+            if reason is None or max_attempts == 1:
+                raise
+            if attempt >= max_attempts:
+                RETRIES_EXHAUSTED.inc(endpoint=label)
+                raise
+
+            delay = policy.backoff(attempt)
+            if policy.respect_retry_after and isinstance(e, httpx.HTTPStatusError):
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+
+            if policy.deadline is not None:
+                remaining = policy.deadline - (time.monotonic() - started)
+                if delay >= remaining:
+                    logger.warning(
+                        f"Not retrying {method} for '{label}' ({reason}): next delay {delay:.2f}s exceeds "
+                        f"remaining deadline budget {max(remaining, 0):.2f}s"
+                    )
+                    RETRIES_EXHAUSTED.inc(endpoint=label)
+                    raise
+
+            RETRIES.inc(endpoint=label, reason=reason)
+            logger.warning(
+                f"Retrying {method} for '{label}' after {reason} (attempt {attempt + 1}/{max_attempts}) in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
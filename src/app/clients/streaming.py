@@ -0,0 +1,224 @@
+import asyncio
+import codecs
+import json
+import logging
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Type, TypeVar
+
+import httpx
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+T = TypeVar("T")
+
+_WHITESPACE = " \t\r\n"
+
+class _NeedMoreData(Exception):
+    """Internal signal: the buffer ends in the middle of a token."""
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a top-level JSON object whose `array_key` member is a (large) array.
+
+    Text is fed chunk by chunk; each complete element of the array is returned as soon as it has
+    been received, and the buffer is trimmed behind it, so memory is bounded by the chunk size plus
+    one element. The other top-level members (count, total, next, ...) are collected in `fields`.
+    Values are decoded with the C-accelerated json.JSONDecoder.raw_decode, not character by character.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.fields: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start" # start -> object -> (array) -> object -> done
+        self._eof = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Adds text and returns the array elements that became complete."""
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return self._drain()
+
+    def close(self) -> List[Any]:
+        """Signals end of input; raises ValueError if the document is incomplete."""
+        self._eof = True
+        items = self._drain()
+        if self._state != "done":
+            raise ValueError(f"Truncated JSON document (expected more data while parsing '{self.array_key}')")
+        return items
+
+    def _skip_whitespace(self) -> str:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        if self._pos >= len(self._buffer):
+            raise _NeedMoreData()
+        return self._buffer[self._pos]
+
+    def _decode_value(self) -> Any:
+        self._skip_whitespace() # raw_decode does not skip leading whitespace
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _NeedMoreData()
+        # A number at the very end of the buffer may continue in the next chunk
+        if end >= len(self._buffer) and not self._eof:
+            raise _NeedMoreData()
+        self._pos = end
+        return value
+
+    def _expect(self, char: str) -> None:
+        if self._skip_whitespace() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}, got '{self._buffer[self._pos]}'")
+        self._pos += 1
+
+    def _drain(self) -> List[Any]:
+        items: List[Any] = []
+        while self._state != "done":
+            checkpoint = self._pos
+            try:
+                self._step(items)
+            except _NeedMoreData:
+                self._pos = checkpoint # Resume from the start of the unfinished token
+                break
+        return items
+
+    def _step(self, items: List[Any]) -> None:
+        if self._state == "start":
+            self._expect("{")
+            self._state = "object"
+        elif self._state == "object":
+            char = self._skip_whitespace()
+            if char == "}":
+                self._pos += 1
+                self._state = "done"
+                return
+            if char == ",":
+                self._pos += 1
+                return
+            key = self._decode_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key at offset {self._pos}")
+            self._expect(":")
+            if key == self.array_key and self._skip_whitespace() == "[":
+                self._pos += 1
+                self._state = "array"
+                return
+            self.fields[key] = self._decode_value()
+        elif self._state == "array":
+            char = self._skip_whitespace()
+            if char == "]":
+                self._pos += 1
+                self._state = "object"
+                return
+            if char == ",":
+                self._pos += 1
+                return
+            items.append(self._decode_value())
+
+class GuardedByteStream(httpx.AsyncByteStream):
+    """
+    Body of a streamed upstream response that keeps the request's guards (bulkhead and adaptive
+    slots, breaker and node timing) until the body has been fully read or closed.
+
+    Release callbacks run once, in registration order (innermost layer first), with the body's
+    outcome: False when it was read to the end, True when a transport error ended it, and None
+    when it was closed early (neither a success nor a failure signal).
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self._stream = stream
+        self._callbacks: List[Callable[[Optional[bool]], Awaitable[None]]] = []
+        self._failed: Optional[bool] = None
+        self._closed = False
+
+    def on_close(self, callback: Callable[[Optional[bool]], Awaitable[None]]) -> None:
+        self._callbacks.append(callback)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TransportError:
+            self._failed = True
+            raise
+        self._failed = False
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._stream.aclose()
+        finally:
+            for callback in self._callbacks:
+                try:
+                    await callback(self._failed)
+                except Exception as e:
+                    logger.error(f"Releasing a streamed response failed: {e}", exc_info=True)
+
+def guarded_body(response: httpx.Response) -> Optional[GuardedByteStream]:
+    """Returns the response's guarded body if its release is still pending, else None."""
+    stream = response.stream
+    if isinstance(stream, GuardedByteStream) and not stream._closed:
+        return stream
+    return None
+
+async def parse_streamed_list(
+    chunks: AsyncIterable[bytes],
+    model: Type[ModelT],
+    array_key: str,
+    item_model: Type[BaseModel],
+) -> ModelT:
+    """
+    Builds `model` from a streamed JSON body, validating the `array_key` elements one at a time
+    into `item_model` as they arrive instead of materializing the whole dict tree first.
+    """
+    parser = JsonArrayStreamParser(array_key)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    items: List[BaseModel] = []
+    async for chunk in chunks:
+        for element in parser.feed(decoder.decode(chunk)):
+            items.append(item_model.model_validate(element))
+    for element in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+        items.append(item_model.model_validate(element))
+
+    fields = dict(parser.fields)
+    if array_key in fields:
+        # The member was not an array (e.g. a single object); let the model validate it as-is
+        return model.model_validate(fields)
+    fields[array_key] = items
+    return model.model_validate(fields)
+
+async def prefetch_ordered(calls: Iterable[Callable[[], Awaitable[T]]], window: int) -> AsyncIterator[T]:
+    """
+    Runs `calls` with up to `window` of them in flight and yields their results in order.
+    At most `window` results are held at a time. Pending calls are cancelled when one fails
+    or the consumer stops iterating.
+    """
+    calls = iter(calls)
+    pending: Deque[asyncio.Future] = deque()
+
+    def schedule() -> None:
+        while len(pending) < max(1, window):
+            call = next(calls, None)
+            if call is None:
+                return
+            pending.append(asyncio.ensure_future(call()))
+
+    try:
+        schedule()
+        while pending:
+            result = await pending.popleft()
+            schedule()
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
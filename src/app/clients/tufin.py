@@ -1,10 +1,42 @@
+import asyncio
 import httpx
 import logging
 import json
+import time
+from contextlib import AsyncExitStack, aclosing, nullcontext
+from pathlib import Path
 from fastapi import HTTPException, status
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Type, AsyncIterator, Tuple
+from pydantic import BaseModel
 
 from ..core.config import Settings, settings
+from ..core.metrics import metrics
+from ..core import json_codec
+from .pool import (
+    UPSTREAM_SECURETRACK, UPSTREAM_SECURECHANGE, UPSTREAM_GRAPHQL, UPSTREAMS,
+    build_upstream_client, make_pool_trace
+)
+from .coalescing import RequestCoalescer, coalesce_key
+from .retry import IDEMPOTENT_METHODS, RetryPolicy, call_with_retry
+from .circuit_breaker import CircuitBreaker
+from .errors import UpstreamRejectedError
+from .bulkhead import Bulkhead, DEFAULT_BULKHEAD, build_bulkheads
+from .adaptive import AdaptiveConcurrencyLimiter, build_limiters
+from .balancer import LatencyTracker, Node, NodeBalancer
+from .streaming import GuardedByteStream, guarded_body, prefetch_ordered, ModelT, parse_streamed_list
+from .auth import build_auth
+from ..cache.base import make_key, model_codec
+from ..cache.swr import StaleWhileRevalidateCache
+from ..cache.revisions import RevisionTracker
+from ..cache.devices import DeviceCache
+from ..cache.topology import TopologyPathCache, path_device_ids, topology_key
+from ..cache.images import PathImageCache, image_cache_key
+from ..cache.rules import RuleQueryCache, canonicalize_tql
+from ..cache.inventory import DeviceIndex, DevicePage
+from ..cache.tickets import TicketCache
+from ..cache.negative import NegativeCache
+from ..cache.persistent import SqliteCacheTier
+from ..cache.compression import get_compressor
 from ..models.securetrack import (
     TufinDeviceListResponse, TufinDevice, 
     TufinTopologyPathResponse,
@@ -19,6 +51,56 @@ from ..models.securechange import (
 
 logger = logging.getLogger(__name__)
 
+HEDGED_REQUESTS = metrics.counter("tufin_hedged_requests_total", "Reads re-sent to a second node after the hedging delay.")
+HEDGE_WINS = metrics.counter("tufin_hedge_wins_total", "Hedged reads where the second node answered first.")
+
+# Standard set of rule fields retrieved by query_rules_graphql
+# Expand this based on common needs
+RULE_FIELDS = """
+    id
+    name
+    action
+    comment
+    disabled
+    implicit
+    metadata { certificationStatus technicalOwner applicationOwner ruleDescription businessOwner } 
+    source { text zones { text } }
+    destination { text zones { text } }
+    service { text }
+    application { text }
+    user { text }
+    installOn { text }
+    vpn { text }
+    # Add more fields as needed, e.g., loggingDetails { text }, schedule { text }
+"""
+
+# Built once at import; only the TQL filter (a GraphQL variable) changes between calls
+RULES_QUERY = f"""
+    query($tqlFilter: String) {{
+        rules(filter: $tqlFilter) {{
+            count
+            values {{
+                {RULE_FIELDS}
+            }}
+        }}
+    }}
+"""
+
+# Same fields, one page at a time (used by iter_rules_graphql)
+RULES_PAGE_QUERY = f"""
+    query($tqlFilter: String, $first: Int, $offset: Int) {{
+        rules(filter: $tqlFilter, first: $first, offset: $offset) {{
+            count
+            values {{
+                {RULE_FIELDS}
+            }}
+        }}
+    }}
+"""
+
+# Device list filters SecureTrack applies itself; forwarded when no inventory snapshot can be held
+UPSTREAM_DEVICE_FILTERS = ("status", "vendor")
+
 # Global variable to hold the singleton client instance
 # Note: This is simple; more robust solutions exist for managing state.
 _tufin_client_instance: Optional["TufinApiClient"] = None
@@ -28,31 +110,482 @@ class TufinApiClient:
 
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.securetrack_base_url = settings.TUFIN_SECURETRACK_URL.rstrip('/')
-        self.securechange_base_url = settings.TUFIN_SECURECHANGE_URL.rstrip('/')
-        # Determine GraphQL URL (use ST base if not explicitly set, appending common path)
-        self.graphql_url = (settings.TUFIN_GRAPHQL_URL or f"{self.securetrack_base_url}/sg/api/v1/graphql").rstrip('/')
+        securetrack_nodes = [u.rstrip('/') for u in settings.TUFIN_SECURETRACK_URLS] or [settings.TUFIN_SECURETRACK_URL.rstrip('/')]
+        securechange_nodes = [u.rstrip('/') for u in settings.TUFIN_SECURECHANGE_URLS] or [settings.TUFIN_SECURECHANGE_URL.rstrip('/')]
+        # Determine GraphQL URL(s) (use ST nodes if not explicitly set, appending common path)
+        if settings.TUFIN_GRAPHQL_URLS:
+            graphql_nodes = [u.rstrip('/') for u in settings.TUFIN_GRAPHQL_URLS]
+        elif settings.TUFIN_GRAPHQL_URL:
+            graphql_nodes = [settings.TUFIN_GRAPHQL_URL.rstrip('/')]
+        else:
+            graphql_nodes = [f"{node}/sg/api/v1/graphql" for node in securetrack_nodes]
+        # URLs are always built against the primary node; the balancer rewrites them per request
+        self.securetrack_base_url = securetrack_nodes[0]
+        self.securechange_base_url = securechange_nodes[0]
+        self.graphql_url = graphql_nodes[0]
+        self._balancers: Dict[str, NodeBalancer] = {
+            UPSTREAM_SECURETRACK: NodeBalancer(UPSTREAM_SECURETRACK, securetrack_nodes),
+            UPSTREAM_SECURECHANGE: NodeBalancer(UPSTREAM_SECURECHANGE, securechange_nodes),
+            UPSTREAM_GRAPHQL: NodeBalancer(UPSTREAM_GRAPHQL, graphql_nodes),
+        }
+        # Recent latencies per hedged endpoint, used to pick the hedging delay
+        self._hedge_endpoints = set(settings.TUFIN_HEDGE_ENDPOINTS)
+        self._latencies: Dict[str, LatencyTracker] = {}
         
-        auth = httpx.BasicAuth(settings.TUFIN_USERNAME, settings.TUFIN_PASSWORD)
-        # Use TUFIN_SSL_VERIFY setting from config
-        self._client = httpx.AsyncClient(
-            auth=auth, 
-            verify=settings.TUFIN_SSL_VERIFY, 
-            timeout=settings.TUFIN_API_TIMEOUT 
+        # One client (and connection pool) per upstream so a slow GraphQL backlog cannot
+        # exhaust the connections used for SecureTrack REST or SecureChange calls.
+        # Pool sizing, keep-alive and HTTP/2 come from the TUFIN_POOL_* settings.
+        # Auth is per upstream too, so each keeps its own session when TUFIN_AUTH_MODE="session".
+        self._clients: Dict[str, httpx.AsyncClient] = {
+            upstream: build_upstream_client(settings, upstream, auth=build_auth(settings, upstream))
+            for upstream in UPSTREAMS
+        }
+        # Single-flight layer shared by all upstreams (keys include the full URL)
+        self._coalescer = RequestCoalescer()
+        self._coalesce_endpoints = set(settings.TUFIN_COALESCE_ENDPOINTS)
+        # One circuit breaker per upstream (empty when disabled)
+        self._breakers: Dict[str, CircuitBreaker] = (
+            {upstream: CircuitBreaker.from_settings(settings, upstream) for upstream in UPSTREAMS}
+            if settings.TUFIN_BREAKER_ENABLED else {}
+        )
+        # Bulkheads per endpoint class (empty when disabled)
+        self._bulkheads: Dict[str, Bulkhead] = build_bulkheads(settings) if settings.TUFIN_BULKHEADS_ENABLED else {}
+        # AIMD in-flight limits per upstream (empty unless TUFIN_ADAPTIVE_CONCURRENCY_ENABLED)
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = build_limiters(settings, UPSTREAMS)
+        # List endpoints whose bodies are parsed incrementally instead of via response.json()
+        self._stream_endpoints = set(settings.TUFIN_STREAM_PARSE_ENDPOINTS)
+        # Last known revision per device; revision-scoped caches subscribe to its changes
+        self._revisions = RevisionTracker()
+        # In-memory caches are bounded by serialized bytes; large values are optionally held compressed
+        compressor = get_compressor(settings.TUFIN_CACHE_COMPRESSION, settings.TUFIN_CACHE_COMPRESS_MIN_BYTES)
+        # Per-device cache, valid while the device's latest_revision is unchanged (None when disabled)
+        self._device_cache: Optional[DeviceCache] = (
+            DeviceCache(
+                self._revisions, ttl=settings.TUFIN_DEVICE_CACHE_TTL, max_entries=settings.TUFIN_DEVICE_CACHE_MAX_ENTRIES,
+                max_bytes=settings.TUFIN_DEVICE_CACHE_MAX_BYTES, compressor=compressor,
+            )
+            if settings.TUFIN_DEVICE_CACHE_ENABLED else None
+        )
+        # Topology path results keyed on the normalized query (None when disabled)
+        self._topology_cache: Optional[TopologyPathCache] = (
+            TopologyPathCache(
+                self._revisions, ttl=settings.TUFIN_TOPOLOGY_CACHE_TTL, max_entries=settings.TUFIN_TOPOLOGY_CACHE_MAX_ENTRIES,
+                max_bytes=settings.TUFIN_TOPOLOGY_CACHE_MAX_BYTES, compressor=compressor,
+            )
+            if settings.TUFIN_TOPOLOGY_CACHE_ENABLED else None
+        )
+        # Disk cache of topology path images (None when disabled)
+        self._image_cache: Optional[PathImageCache] = (
+            PathImageCache(settings.TUFIN_IMAGE_CACHE_DIR, max_bytes=settings.TUFIN_IMAGE_CACHE_MAX_BYTES,
+                           ttl=settings.TUFIN_IMAGE_CACHE_TTL, tracker=self._revisions)
+            if settings.TUFIN_IMAGE_CACHE_ENABLED else None
+        )
+        # GraphQL rule query results keyed on the canonical TQL (None when disabled)
+        self._rules_cache: Optional[RuleQueryCache] = (
+            RuleQueryCache(
+                self._revisions, ttl=settings.TUFIN_RULES_CACHE_TTL, max_entries=settings.TUFIN_RULES_CACHE_MAX_ENTRIES,
+                max_bytes=settings.TUFIN_RULES_CACHE_MAX_BYTES, compressor=compressor,
+            )
+            if settings.TUFIN_RULES_CACHE_ENABLED else None
+        )
+        # SecureChange tickets, written through on create/update (None when disabled)
+        self._ticket_cache: Optional[TicketCache] = (
+            TicketCache(
+                settings.TUFIN_TICKET_FINAL_STATUSES, max_entries=settings.TUFIN_TICKET_CACHE_MAX_ENTRIES,
+                max_bytes=settings.TUFIN_TICKET_CACHE_MAX_BYTES, compressor=compressor,
+            )
+            if settings.TUFIN_TICKET_CACHE_ENABLED else None
+        )
+        # Short-lived cache of deterministic upstream errors (404/400) per lookup key (None when disabled)
+        self._negative_cache: Optional[NegativeCache] = (
+            NegativeCache(settings.TUFIN_NEGATIVE_CACHE_STATUSES, ttl=settings.TUFIN_NEGATIVE_CACHE_TTL, max_entries=settings.TUFIN_NEGATIVE_CACHE_MAX_ENTRIES)
+            if settings.TUFIN_NEGATIVE_CACHE_ENABLED else None
+        )
+        self._inventory_codec = model_codec(TufinDeviceListResponse)
+        # Stale-while-revalidate cache for device listings (None when disabled)
+        self._inventory_cache: Optional[StaleWhileRevalidateCache] = (
+            StaleWhileRevalidateCache(
+                "devices",
+                ttl=settings.TUFIN_INVENTORY_CACHE_TTL,
+                max_stale=settings.TUFIN_INVENTORY_CACHE_MAX_STALE,
+                max_entries=settings.TUFIN_INVENTORY_CACHE_MAX_ENTRIES,
+                max_bytes=settings.TUFIN_INVENTORY_CACHE_MAX_BYTES,
+                codec=self._inventory_codec,
+                compressor=compressor,
+                digest=True, # The device index is rebuilt only when the listing's digest changes
+            )
+            if settings.TUFIN_INVENTORY_CACHE_ENABLED else None
         )
-        # Note: We use the same client for REST and GraphQL assuming same base auth and SSL settings.
-        # If GraphQL needs different base URL/auth/headers, create a separate httpx client.
+        # Optional on-disk second tier behind the device, topology, rules and ticket caches
+        self._l2_tier: Optional[SqliteCacheTier] = self._build_l2_tier(settings) if settings.TUFIN_L2_CACHE_ENABLED else None
+        # Indexed copy of the inventory snapshot currently held, for paged/filtered device listings
+        self._device_index: Optional[DeviceIndex] = None
+        self._device_index_digest: Optional[str] = None # Content digest of the cached listing it was built from
+        # Set while the index itself holds a listing too large for the inventory cache (monotonic deadline)
+        self._device_index_held_until: Optional[float] = None
+        # Background cache warm-up triggered through the admin API
+        self._warm_up_task: Optional[asyncio.Task] = None
+        # Retry policies are built lazily per endpoint from TUFIN_RETRY_* settings
+        self._retry_policies: Dict[Optional[str], RetryPolicy] = {}
+
+    def _build_l2_tier(self, settings: Settings) -> SqliteCacheTier:
+        tier = SqliteCacheTier(
+            settings.TUFIN_L2_CACHE_PATH,
+            flush_interval=settings.TUFIN_L2_CACHE_FLUSH_INTERVAL,
+            compact_interval=settings.TUFIN_L2_CACHE_COMPACT_INTERVAL,
+            compress_min_bytes=settings.TUFIN_L2_CACHE_COMPRESS_MIN_BYTES,
+            max_pending=settings.TUFIN_L2_CACHE_MAX_PENDING,
+        )
+        for cache in (self._device_cache, self._topology_cache, self._rules_cache, self._ticket_cache):
+            if cache is not None:
+                tier.bind(cache.store)
+        return tier
+
+    async def start(self):
+        """Warms the in-memory caches from the on-disk tier (if enabled) and starts its background tasks."""
+        if self._l2_tier is None:
+            return
+        try:
+            if self._device_cache is not None:
+                # Devices first: restoring their revisions lets topology entries validate against them
+                await self._l2_tier.load(
+                    self._device_cache.store.namespace,
+                    lambda _, device: self._revisions.observe(device.id, device.latest_revision),
+                )
+            for cache in (self._topology_cache, self._rules_cache, self._ticket_cache):
+                if cache is not None:
+                    await self._l2_tier.load(cache.store.namespace)
+        except Exception as e:
+            logger.error(f"Failed to warm caches from {self._l2_tier.path}, starting cold: {e}", exc_info=True)
+        self._l2_tier.start()
+
+    def start_cache_warm_up(self) -> bool:
+        """Starts warm_caches() in the background; returns False if a warm-up is already running."""
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            return False
+        self._warm_up_task = asyncio.create_task(self._run_warm_up())
+        return True
+
+    async def _run_warm_up(self) -> None:
+        try:
+            await self.warm_caches()
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {e}", exc_info=True)
+
+    async def warm_caches(self) -> None:
+        """Reloads the unfiltered device inventory from Tufin, which also refreshes every per-device entry."""
+        started = time.monotonic()
+        devices = await self.list_securetrack_devices(bypass_cache=True)
+        logger.info(f"Cache warm-up loaded {len(devices.device)} devices in {time.monotonic() - started:.2f}s")
 
     async def close(self):
-        """Closes the underlying httpx client."""
-        await self._client.aclose()
+        """Stops background cache refreshes and closes the underlying httpx clients."""
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            await asyncio.gather(self._warm_up_task, return_exceptions=True)
+        if self._inventory_cache is not None:
+            await self._inventory_cache.close()
+        if self._l2_tier is not None:
+            await self._l2_tier.close()
+        for client in self._clients.values():
+            await client.aclose()
 
-    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
-        """Internal helper method to make requests and handle common errors."""
+    async def _raw_request(self, method: str, url: str, upstream: str = UPSTREAM_SECURETRACK,
+                           endpoint: Optional[str] = None, node: Optional[Node] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a single request: endpoint-class bulkhead -> upstream circuit breaker -> adaptive limit -> upstream pool.
+        The target node is chosen by the upstream's balancer unless given.
+        Records pool wait/reuse metrics. Does not check the status.
+        Streamed responses hold every guard until their body is read or closed.
+        """
+        balancer = self._balancers[upstream]
+        node = node or balancer.choose()
+        url = balancer.rewrite(url, node)
+        bulkhead = self._bulkhead_for(endpoint)
+        if bulkhead is None:
+            return await self._guarded_request(method, url, upstream, node, **kwargs)
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(bulkhead.slot()) # Raises BulkheadFullError when the class is saturated
+            response = await self._guarded_request(method, url, upstream, node, **kwargs)
+            body = guarded_body(response)
+            if body is not None:
+                release = stack.pop_all()
+                body.on_close(lambda failed: release.aclose())
+            return response
+
+    async def _guarded_request(self, method: str, url: str, upstream: str, node: Node, **kwargs) -> httpx.Response:
+        """Sends one request through the upstream's circuit breaker and adaptive concurrency limit."""
+        breaker = self._breakers.get(upstream)
+        if breaker is not None:
+            breaker.before_call() # Raises CircuitOpenError while the upstream is considered down
+        started = time.monotonic()
         try:
-            response = await self._client.request(method, url, **kwargs)
+            response = await self._limited_request(method, url, upstream, node, **kwargs)
+        except httpx.TransportError:
+            if breaker is not None:
+                breaker.record(failed=True, duration=time.monotonic() - started)
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.abandon()
+            raise
+        if breaker is None:
+            return response
+        failed = response.status_code >= 500
+        body = guarded_body(response)
+        if body is None:
+            breaker.record(failed=failed, duration=time.monotonic() - started)
+            return response
+
+        async def record(body_failed: Optional[bool]) -> None:
+            if body_failed is None:
+                breaker.abandon()
+            else:
+                breaker.record(failed=failed or body_failed, duration=time.monotonic() - started)
+
+        body.on_close(record)
+        return response
+
+    async def _limited_request(self, method: str, url: str, upstream: str, node: Node, **kwargs) -> httpx.Response:
+        """Sends one request on the upstream's pool, under its adaptive limit when enabled."""
+        limiter = self._limiters.get(upstream)
+        if limiter is None:
+            return await self._node_request(method, url, upstream, node, **kwargs)
+
+        async with AsyncExitStack() as stack:
+            outcome = await stack.enter_async_context(limiter.slot())
+            try:
+                response = await self._node_request(method, url, upstream, node, **kwargs)
+            except httpx.TransportError:
+                outcome.failed = True
+                raise
+            # Overload signals from Tufin count as congestion; other 4xx are the caller's problem
+            outcome.failed = response.status_code >= 500 or response.status_code == 429
+            body = guarded_body(response)
+            if body is not None:
+                release = stack.pop_all()
+
+                async def record(body_failed: Optional[bool]) -> None:
+                    if body_failed is None:
+                        outcome.failed = None # An unread body says nothing about the upstream's latency
+                    elif body_failed:
+                        outcome.failed = True
+                    await release.aclose()
+
+                body.on_close(record)
+            return response
+
+    async def _node_request(self, method: str, url: str, upstream: str, node: Node, **kwargs) -> httpx.Response:
+        """Performs the HTTP call and feeds the outcome into the node's health score."""
+        extensions = kwargs.pop("extensions", None) or {}
+        extensions.setdefault("trace", make_pool_trace(upstream))
+        stream = kwargs.pop("stream", False)
+        balancer = self._balancers[upstream]
+        node.in_flight += 1
+        started = time.monotonic()
+        failed = True
+        deferred = False
+        try:
+            client = self._clients[upstream]
+            if stream:
+                # Headers only; the caller reads (and must close) the body, which releases the node
+                request = client.build_request(method, url, extensions=extensions, **kwargs)
+                response = await client.send(request, stream=True)
+                response.stream = GuardedByteStream(response.stream)
+                deferred = True
+                status_failed = response.status_code >= 500
+
+                async def record(body_failed: Optional[bool]) -> None:
+                    node.in_flight -= 1
+                    if body_failed is not None:
+                        balancer.record(node, time.monotonic() - started, status_failed or body_failed)
+
+                response.stream.on_close(record)
+            else:
+                response = await client.request(method, url, extensions=extensions, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        except asyncio.CancelledError:
+            failed = None # Hedge loser or cancelled caller: not a signal about the node
+            raise
+        finally:
+            if not deferred:
+                node.in_flight -= 1
+                if failed is not None:
+                    balancer.record(node, time.monotonic() - started, failed)
+
+    def _should_hedge(self, method: str, upstream: str, endpoint: Optional[str], kwargs: Dict[str, Any]) -> bool:
+        return (
+            endpoint in self._hedge_endpoints
+            and self._balancers[upstream].is_multi_node
+            and method.upper() in IDEMPOTENT_METHODS
+            and not any(k in kwargs for k in ("json", "content", "data", "stream"))
+        )
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        tracker = self._latencies.get(endpoint)
+        if tracker is None or len(tracker) < self.settings.TUFIN_HEDGE_MIN_SAMPLES:
+            return self.settings.TUFIN_HEDGE_DEFAULT_DELAY
+        return max(self.settings.TUFIN_HEDGE_MIN_DELAY, tracker.percentile(self.settings.TUFIN_HEDGE_PERCENTILE))
+
+    async def _hedged_request(self, method: str, url: str, upstream: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Sends the read to one node and, if it has not answered within the hedging delay, to a second node.
+        The first non-5xx answer wins and the other request is cancelled.
+        """
+        balancer = self._balancers[upstream]
+        primary = balancer.choose()
+        tasks = [asyncio.ensure_future(
+            self._raw_request(method, url, upstream=upstream, endpoint=endpoint, node=primary, **kwargs)
+        )]
+        started = time.monotonic()
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(endpoint))
+            if not done:
+                secondary = balancer.choose(exclude=[primary])
+                HEDGED_REQUESTS.inc(endpoint=endpoint)
+                logger.info(f"Hedging '{endpoint}' to {secondary.base_url} (primary {primary.base_url} is slow)")
+                tasks.append(asyncio.ensure_future(
+                    self._raw_request(method, url, upstream=upstream, endpoint=endpoint, node=secondary, **kwargs)
+                ))
+
+            first_finished = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is not tasks[0]:
+                            HEDGE_WINS.inc(endpoint=endpoint)
+                        self._latencies.setdefault(endpoint, LatencyTracker()).add(time.monotonic() - started)
+                        return task.result()
+                    first_finished = first_finished or task
+            # Every attempt failed: surface the first failure (exception or 5xx response)
+            if first_finished.exception() is not None:
+                raise first_finished.exception()
+            return first_finished.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def upstream_states(self) -> Dict[str, Dict[str, Any]]:
+        """Returns breaker state per upstream ('disabled' without a breaker), plus node health for multi-node upstreams."""
+        states = self.breaker_states()
+        for upstream, balancer in self._balancers.items():
+            if balancer.is_multi_node:
+                states.setdefault(upstream, {"state": "disabled"})["nodes"] = balancer.snapshot()
+        return states
+
+    def _bulkhead_for(self, endpoint: Optional[str]) -> Optional[Bulkhead]:
+        if not self._bulkheads:
+            return None
+        endpoint_class = self.settings.TUFIN_ENDPOINT_CLASSES.get(endpoint or "", DEFAULT_BULKHEAD)
+        return self._bulkheads.get(endpoint_class) or self._bulkheads[DEFAULT_BULKHEAD]
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the circuit breaker snapshot for each upstream."""
+        return {upstream: breaker.snapshot() for upstream, breaker in self._breakers.items()}
+
+    @staticmethod
+    def _rejected_error(e: UpstreamRejectedError) -> HTTPException:
+        """Maps a locally rejected call (open breaker, full bulkhead) to a 503 with a Retry-After hint."""
+        logger.warning(f"Failing fast: {e}")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))},
+        )
+
+    def _should_coalesce(self, method: str, endpoint: Optional[str], kwargs: Dict[str, Any]) -> bool:
+        """Only body-less GETs from opted-in endpoints are coalesced."""
+        return (
+            self.settings.TUFIN_COALESCING_ENABLED
+            and method.upper() == "GET"
+            and endpoint in self._coalesce_endpoints
+            and not any(k in kwargs for k in ("json", "content", "data", "stream"))
+        )
+
+    async def _send(self, method: str, url: str, upstream: str = UPSTREAM_SECURETRACK,
+                    endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Sends a request and raises httpx.HTTPStatusError for 4xx/5xx responses.
+
+        `endpoint` names the calling client method and selects per-endpoint behaviour (e.g. coalescing).
+        """
+        if self._should_coalesce(method, endpoint, kwargs):
+            key = coalesce_key(method, url, kwargs.get("params"))
+            return await self._coalescer.run(
+                key, lambda: self._dispatch(method, url, upstream, endpoint, **kwargs), endpoint=endpoint
+            )
+        return await self._dispatch(method, url, upstream, endpoint, **kwargs)
+
+    def _retry_policy(self, endpoint: Optional[str]) -> RetryPolicy:
+        policy = self._retry_policies.get(endpoint)
+        if policy is None:
+            policy = RetryPolicy.from_settings(self.settings, endpoint)
+            self._retry_policies[endpoint] = policy
+        return policy
+
+    async def _dispatch(self, method: str, url: str, upstream: str, endpoint: Optional[str], **kwargs) -> httpx.Response:
+        """Performs the actual upstream call for _send, retrying transient failures per the endpoint's policy."""
+
+        async def attempt(remaining: Optional[float]) -> httpx.Response:
+            attempt_kwargs = kwargs
+            # Never let a single attempt outlive the call's remaining deadline budget
+            if remaining is not None and remaining < self.settings.TUFIN_API_TIMEOUT and "timeout" not in kwargs:
+                attempt_kwargs = {**kwargs, "timeout": max(remaining, 0.001)}
+            if self._should_hedge(method, upstream, endpoint, attempt_kwargs):
+                response = await self._hedged_request(method, url, upstream, endpoint, **attempt_kwargs)
+            else:
+                response = await self._raw_request(method, url, upstream=upstream, endpoint=endpoint, **attempt_kwargs)
+            if response.is_error and kwargs.get("stream"):
+                try:
+                    await response.aread() # Error bodies are small; read them so the error detail and retries work
+                finally:
+                    await response.aclose() # Releases the request's slots even if reading failed
             response.raise_for_status() # Raises HTTPStatusError for 4xx/5xx responses
             return response
+
+        return await call_with_retry(self._retry_policy(endpoint), attempt, method, endpoint)
+
+    async def _request_list_streamed(self, url: str, upstream: str, endpoint: str, model: Type[ModelT],
+                                     array_key: str, item_model: Type[BaseModel], label: str,
+                                     params: Optional[Dict[str, Any]] = None) -> ModelT:
+        """
+        GETs a list endpoint and parses the body incrementally, validating one element at a time.
+        Identical concurrent calls share the parsed result when the endpoint is coalesced.
+        """
+        async def fetch() -> ModelT:
+            response = await self._request("GET", url, upstream=upstream, endpoint=endpoint, params=params, stream=True)
+            try:
+                return await parse_streamed_list(response.aiter_bytes(), model, array_key, item_model)
+            except httpx.TimeoutException as e:
+                logger.error(f"Tufin API response body timed out: {e}")
+                raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Tufin API request timed out")
+            except httpx.RequestError as e:
+                logger.error(f"Error reading Tufin API response: {e}")
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Could not connect to Tufin API: {e.request.url}")
+            except Exception as e:
+                logger.error(f"Failed to parse Tufin {label.lower()} response: {e}", exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Failed to parse response from Tufin API ({label})"
+                )
+            finally:
+                await response.aclose()
+
+        if self._should_coalesce("GET", endpoint, {}):
+            key = "parsed " + coalesce_key("GET", url, params)
+            return await self._coalescer.run(key, fetch, endpoint=endpoint)
+        return await fetch()
+
+    async def _request(self, method: str, url: str, upstream: str = UPSTREAM_SECURETRACK,
+                       endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Internal helper method to make requests and handle common errors."""
+        try:
+            return await self._send(method, url, upstream=upstream, endpoint=endpoint, **kwargs)
+        except UpstreamRejectedError as e:
+            raise self._rejected_error(e)
         except httpx.TimeoutException as e:
             logger.error(f"Tufin API request timed out: {e}")
             raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Tufin API request timed out")
@@ -82,19 +615,20 @@ class TufinApiClient:
         
         logger.debug(f"GraphQL request body: {request_body}")
         
-        # Use the core client, assuming GraphQL endpoint is reachable with same auth/settings
+        # GraphQL has its own connection pool but shares auth/SSL settings with REST
         # Need error handling specific to GraphQL responses (e.g., {"errors": [...]})
         try:
             # Use POST for GraphQL
-            response = await self._client.request(
+            response = await self._send(
                 "POST", 
                 self.graphql_url, 
+                upstream=UPSTREAM_GRAPHQL,
+                endpoint="execute_graphql_query",
                 json=request_body,
                 headers={"Content-Type": "application/json"} # Ensure header is set
             )
-            response.raise_for_status() # Check for HTTP errors
             
-            json_response = response.json()
+            json_response = json_codec.loads(response.content)
             
             # Check for GraphQL-level errors
             if "errors" in json_response and json_response["errors"]:
@@ -115,6 +649,8 @@ class TufinApiClient:
                  
             return json_response["data"] # Return only the data part
 
+        except UpstreamRejectedError as e:
+            raise self._rejected_error(e)
         except httpx.HTTPStatusError as e: # Handle HTTP errors from _client.request
             logger.error(f"HTTP error executing GraphQL query {e.response.status_code}: {e.response.text}")
             detail = f"Tufin API error: {e.response.status_code} - {e.response.text[:100]}..."
@@ -122,6 +658,8 @@ class TufinApiClient:
         except httpx.RequestError as e: 
              logger.error(f"Connection error executing GraphQL query: {e}")
              raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Could not connect to Tufin GraphQL API: {e.url}")
+        except HTTPException:
+            raise # GraphQL errors and missing data mapped above
         except Exception as e:
             logger.error(f"Unexpected error executing GraphQL query: {e}", exc_info=True)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal error during GraphQL query.")
@@ -132,50 +670,206 @@ class TufinApiClient:
         """Gets the list of SecureTrack domains."""
         url = f"{self.securetrack_base_url}/securetrack/api/domains"
         logger.info(f"Requesting SecureTrack domains from {url}")
-        response = await self._request("GET", url)
-        return response.json()
+        response = await self._request("GET", url, endpoint="get_securetrack_domains")
+        return json_codec.loads(response.content)
         
-    async def list_securetrack_devices(self, filters: Optional[Dict[str, Any]] = None) -> TufinDeviceListResponse:
-        """Lists devices managed by SecureTrack using filter parameters."""
-        url = f"{self.securetrack_base_url}/securetrack/api/devices"
-        params = {}
+    async def list_securetrack_devices(self, filters: Optional[Dict[str, Any]] = None,
+                                       bypass_cache: bool = False) -> TufinDeviceListResponse:
+        """
+        Lists devices managed by SecureTrack using filter parameters.
+        Served from the inventory cache when enabled; `bypass_cache` forces a fresh fetch.
+        """
+        if self._inventory_cache is None:
+            return await self._fetch_securetrack_devices(filters)
+        key = make_key("devices", filters)
+        return await self._inventory_cache.get(
+            key, lambda: self._fetch_securetrack_devices(filters), bypass=bypass_cache
+        )
+
+    async def list_securetrack_devices_page(self, filters: Optional[Dict[str, Any]] = None, limit: int = 100,
+                                            cursor: Optional[str] = None, name_contains: Optional[str] = None,
+                                            bypass_cache: bool = False) -> DevicePage:
+        """
+        Returns one page of devices, filtered and paged locally from an indexed copy of the full inventory.
+        The index is tied to the inventory snapshot currently held and rebuilt only when that snapshot
+        is refreshed with different content (same freshness rules as list_securetrack_devices()); pages
+        never fetch the inventory themselves. A listing too large for the inventory cache is held by
+        the index itself for TUFIN_INVENTORY_CACHE_TTL. With the inventory cache disabled nothing is
+        held: status, vendor and name are forwarded to SecureTrack and the result is paged locally.
+        Raises ValueError (InvalidCursorError) for a bad cursor or an unsupported filter.
+        """
+        if self._inventory_cache is None:
+            return await self._list_devices_page_upstream(filters, limit, cursor, name_contains)
+        held_until = self._device_index_held_until
+        if held_until is None or time.monotonic() >= held_until or bypass_cache:
+            entry = await self._inventory_cache.get_entry(
+                make_key("devices", None), lambda: self._fetch_securetrack_devices(None), bypass=bypass_cache
+            )
+            if entry.digest is None:
+                # Not cacheable (too large): the index holds this snapshot until it is due for a refresh
+                self._build_device_index(entry.value, None)
+                self._device_index_held_until = time.monotonic() + self.settings.TUFIN_INVENTORY_CACHE_TTL
+            elif self._device_index is None or self._device_index_digest != entry.digest:
+                self._build_device_index(entry.value, entry.digest)
+            else:
+                self._device_index_held_until = None
+        return self._device_index.page(filters, limit=limit, cursor=cursor, name_contains=name_contains)
+
+    def _build_device_index(self, inventory: TufinDeviceListResponse, digest: Optional[str]) -> None:
+        """Rebuilds the index (O(n log n)), only when the held snapshot changed."""
+        started = time.monotonic()
+        self._device_index = DeviceIndex(inventory.device)
+        self._device_index_digest = digest
+        self._device_index_held_until = None
+        logger.info(f"Indexed {len(self._device_index)} devices in {time.monotonic() - started:.3f}s")
+
+    async def _list_devices_page_upstream(self, filters: Optional[Dict[str, Any]], limit: int, cursor: Optional[str],
+                                          name_contains: Optional[str]) -> DevicePage:
+        """Pages a listing filtered by SecureTrack (inventory cache disabled); other filters apply locally."""
+        filters = filters or {}
+        upstream = {key: value for key, value in filters.items() if key in UPSTREAM_DEVICE_FILTERS}
+        if name_contains:
+            upstream["name"] = name_contains
+        inventory = await self._fetch_securetrack_devices(upstream or None)
+        return DeviceIndex(inventory.device).page(filters, limit=limit, cursor=cursor, name_contains=name_contains)
+
+    async def _fetch_securetrack_devices(self, filters: Optional[Dict[str, Any]] = None) -> TufinDeviceListResponse:
+        """
+        Fetches the device list from SecureTrack (uncached).
+        With TUFIN_DEVICE_PAGE_SIZE set, the pages from _iter_device_pages are merged in order.
+        """
+        params = dict(filters) if filters else {}
         if filters:
-            # Construct filter query parameters based on Tufin's expected format
             # Assuming simple key=value for now, like ?status=started&vendor=Cisco
             # VERIFY THIS against Tufin REST API docs!
-            # Tufin might expect a single `filter` param with specific syntax.
-            params.update(filters) 
             logger.info(f"Applying device filters (needs verification): {filters}")
-            
+
+        if self.settings.TUFIN_DEVICE_PAGE_SIZE <= 0:
+            parsed_response = await self._fetch_device_list(f"{self.securetrack_base_url}/securetrack/api/devices", params)
+            self._observe_devices(parsed_response.device)
+            return parsed_response
+
+        started = time.monotonic()
+        devices: List[TufinDevice] = []
+        total = pages = 0
+        async for page in self._iter_device_pages(params):
+            total = total if pages else page.total
+            pages += 1
+            devices.extend(page.device)
+        if len(devices) != total:
+            logger.warning(f"Paged device listing returned {len(devices)} devices, expected {total} (inventory changed while paging)")
+        logger.info(f"Fetched {len(devices)} devices in {pages} page(s) in {time.monotonic() - started:.3f}s")
+        return TufinDeviceListResponse(device=devices, count=len(devices), total=total)
+
+    async def _iter_device_pages(self, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[TufinDeviceListResponse]:
+        """
+        Yields the SecureTrack device list page by page, in order, using start/count paging.
+        The first page reveals `total`; after that up to TUFIN_DEVICE_PAGE_CONCURRENCY pages are in
+        flight at once, so at most that many pages are held in memory. Devices that shift across a
+        page boundary while paging are yielded only once. Pending page requests are cancelled when
+        a page fails or the consumer stops iterating.
+        """
+        url = f"{self.securetrack_base_url}/securetrack/api/devices"
+        params = params or {}
+        first = await self._fetch_device_list(url, {**params, "start": 0, "count": self.settings.TUFIN_DEVICE_PAGE_SIZE})
+        # Step by the page size SecureTrack actually honoured, in case it caps `count`
+        step = len(first.device)
+        calls = (
+            (lambda start=start: self._fetch_device_list(url, {**params, "start": start, "count": step}))
+            for start in (range(step, first.total, step) if step else ())
+        )
+        seen = set()
+
+        def unseen(page: TufinDeviceListResponse) -> TufinDeviceListResponse:
+            devices = [device for device in page.device if device.id not in seen]
+            seen.update(device.id for device in devices)
+            self._observe_devices(devices)
+            return TufinDeviceListResponse(device=devices, count=len(devices), total=first.total)
+
+        async with aclosing(prefetch_ordered(calls, self.settings.TUFIN_DEVICE_PAGE_CONCURRENCY)) as pages:
+            yield unseen(first)
+            async for page in pages:
+                yield unseen(page)
+
+    async def iter_securetrack_devices(self, bypass_cache: bool = False) -> AsyncIterator[List[TufinDevice]]:
+        """
+        Yields the full device inventory in chunks, for exports that should not build the whole list.
+        Served from the cached inventory listing when there is one (fresh or stale, as for
+        list_securetrack_devices), otherwise streamed from upstream pages without caching the result.
+        """
+        cached = None
+        if self._inventory_cache is not None and not bypass_cache:
+            cached = self._inventory_cache.peek(make_key("devices", None))
+        if cached is not None:
+            chunk_size = max(1, self.settings.TUFIN_DEVICE_PAGE_SIZE or 1000)
+            for start in range(0, len(cached.device), chunk_size):
+                yield cached.device[start:start + chunk_size]
+            return
+        if self.settings.TUFIN_DEVICE_PAGE_SIZE <= 0:
+            yield (await self._fetch_securetrack_devices()).device
+            return
+        async for page in self._iter_device_pages():
+            yield page.device
+
+    async def _fetch_device_list(self, url: str, params: Dict[str, Any]) -> TufinDeviceListResponse:
+        """One GET of the SecureTrack device list (a single page when `params` has start/count)."""
         logger.info(f"Requesting SecureTrack devices from {url} with params: {params}")
+        if "list_securetrack_devices" in self._stream_endpoints:
+            # Response structure is {"device": [...], "count": N, "total": M}; devices are validated as they arrive
+            return await self._request_list_streamed(
+                url, UPSTREAM_SECURETRACK, "list_securetrack_devices", TufinDeviceListResponse,
+                "device", TufinDevice, "Device List", params=params if params else None,
+            )
         # Use GET params, not request body for filters usually
-        response = await self._request("GET", url, params=params if params else None)
+        response = await self._request("GET", url, endpoint="list_securetrack_devices", params=params if params else None)
         
         # Parse the response using the Tufin-specific Pydantic model
         try:
             # Response structure is now {"device": [...], "count": N, "total": M}
-            parsed_response = TufinDeviceListResponse.model_validate(response.json())
-            return parsed_response
+            return TufinDeviceListResponse.model_validate(json_codec.loads(response.content))
         except Exception as e:
             logger.error(f"Failed to parse Tufin device list response: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Failed to parse response from Tufin API (Device List)"
             )
+
+    def _negative_scope(self, namespace: str, key: str, bypass_cache: bool = False):
+        """Negative-cache scope for one upstream lookup (a no-op when the negative cache is disabled)."""
+        if self._negative_cache is None:
+            return nullcontext()
+        return self._negative_cache.scope(namespace, key, bypass=bypass_cache)
+
+    def _observe_devices(self, devices: List[TufinDevice]) -> None:
+        """Feeds device payloads into the revision tracker (and the per-device cache when enabled)."""
+        if self._device_cache is not None:
+            self._device_cache.put_many(devices)
+        else:
+            for device in devices:
+                self._revisions.observe(device.id, device.latest_revision)
             
-    async def get_securetrack_device(self, device_id: str) -> TufinDevice: # Changed device_id to str
-        """Gets details for a specific device from SecureTrack."""
+    async def get_securetrack_device(self, device_id: str, bypass_cache: bool = False) -> TufinDevice: # Changed device_id to str
+        """
+        Gets details for a specific device from SecureTrack.
+        Cached per device while its latest_revision is unchanged; `bypass_cache` forces a fresh fetch.
+        """
+        if self._device_cache is not None and not bypass_cache:
+            cached = self._device_cache.get(device_id)
+            if cached is not None:
+                return cached
         # Assuming the endpoint path is /securetrack/api/devices/{device_id}
         # Verify this against Tufin documentation!
         url = f"{self.securetrack_base_url}/securetrack/api/devices/{device_id}"
         logger.info(f"Requesting SecureTrack device details from {url}")
-        response = await self._request("GET", url)
+        with self._negative_scope("device", str(device_id), bypass_cache):
+            response = await self._request("GET", url, endpoint="get_securetrack_device")
         
         # Parse the response using the Pydantic model
         try:
             # Assuming the response body directly contains the device object
             # Adjust parsing if it's nested (e.g., response.json()['device'])
-            parsed_response = TufinDevice.model_validate(response.json())
+            parsed_response = TufinDevice.model_validate(json_codec.loads(response.content))
+            self._observe_devices([parsed_response])
             return parsed_response
         except Exception as e:
             logger.error(f"Failed to parse Tufin device details response: {e}", exc_info=True)
@@ -184,26 +878,66 @@ class TufinApiClient:
                 detail="Failed to parse response from Tufin API (Device Details)"
             )
             
-    async def get_topology_path(self, src: str, dst: str, service: str) -> TufinTopologyPathResponse:
-        """Runs a topology path query in SecureTrack using GET /topology/path."""
+    async def get_topology_path(self, src: str, dst: str, service: str, bypass_cache: bool = False) -> TufinTopologyPathResponse:
+        """
+        Runs a topology path query in SecureTrack using GET /topology/path.
+        Results are cached on the normalized query until a device on the path gets a new revision.
+        """
+        if self._topology_cache is not None and not bypass_cache:
+            cached = self._topology_cache.get(src, dst, service)
+            if cached is not None:
+                return cached
         # Endpoint verified from user input
         url = f"{self.securetrack_base_url}/securetrack/api/topology/path"
         params = {"src": src, "dst": dst, "service": service}
         logger.info(f"Running SecureTrack topology path query via {url} with params {params}")
         
         # Make GET request with query parameters
-        response = await self._request("GET", url, params=params)
+        response = await self._request("GET", url, endpoint="get_topology_path", params=params)
         
         # Parse the response
         try:
-            parsed_response = TufinTopologyPathResponse.model_validate(response.json())
-            return parsed_response
+            parsed_response = TufinTopologyPathResponse.model_validate(json_codec.loads(response.content))
         except Exception as e:
             logger.error(f"Failed to parse Tufin topology path response: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Failed to parse response from Tufin API (Topology Path)"
             )
+        if self._topology_cache is not None:
+            self._topology_cache.put(src, dst, service, parsed_response)
+        return parsed_response
+
+    async def get_topology_path_image_file(self, src: str, dst: str, service: str,
+                                           bypass_cache: bool = False) -> Optional[Path]:
+        """
+        Returns the path image as a file from the disk cache, fetching and storing it on a miss.
+        Images are keyed on the normalized query; a hit costs no upstream call. The revisions of the
+        devices on the path are stored with the image and checked on read, so a policy change drops
+        it; images also expire after TUFIN_IMAGE_CACHE_TTL. On a miss the path query (usually served
+        by the topology cache) runs concurrently with the image download to learn those devices.
+        Returns None when the image cache is disabled; callers then fall back to get_topology_path_image.
+        """
+        if self._image_cache is None:
+            return None
+        digest = image_cache_key(topology_key(src, dst, service))
+        if not bypass_cache:
+            cached = await self._image_cache.get(digest)
+            if cached is not None:
+                return cached
+        image_bytes, revisions = await asyncio.gather(
+            self.get_topology_path_image(src, dst, service), self._path_revisions(src, dst, service)
+        )
+        return await self._image_cache.put(digest, image_bytes, revisions)
+
+    async def _path_revisions(self, src: str, dst: str, service: str) -> Dict[str, Optional[str]]:
+        """Revisions of the devices on a path (None where unknown); {} if the path cannot be resolved."""
+        try:
+            path_result = await self.get_topology_path(src, dst, service)
+        except HTTPException as e:
+            logger.info(f"Caching topology image without its devices: path query failed ({e.status_code})")
+            return {}
+        return {device_id: self._revisions.current(device_id) for device_id in path_device_ids(path_result)}
 
     async def get_topology_path_image(self, src: str, dst: str, service: str) -> bytes:
         """Gets the topology path image from SecureTrack."""
@@ -215,10 +949,11 @@ class TufinApiClient:
         # Make GET request, expect binary response
         # Use the base _request method but handle potential non-JSON response outside
         try:
-            response = await self._client.request("GET", url, params=params)
-            response.raise_for_status()
+            response = await self._send("GET", url, endpoint="get_topology_path_image", params=params)
             # Return raw image bytes
             return response.content
+        except UpstreamRejectedError as e:
+            raise self._rejected_error(e)
         except httpx.TimeoutException as e:
             logger.error(f"Tufin API request timed out: {e}")
             raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Tufin API request timed out")
@@ -244,7 +979,7 @@ class TufinApiClient:
         
         # Use _request but expect 202, not necessarily JSON response
         try:
-            response = await self._client.request("POST", url, json=request_body)
+            response = await self._raw_request("POST", url, endpoint="add_securetrack_devices", json=request_body)
             # Check for 202 Accepted specifically
             if response.status_code != status.HTTP_202_ACCEPTED:
                 # Raise exception if not 202, trying to parse potential error detail
@@ -254,6 +989,8 @@ class TufinApiClient:
             logger.info(f"Device add request accepted by Tufin (Status {response.status_code}). Processing is asynchronous.")
             return None # Indicate acceptance, no specific data returned
 
+        except UpstreamRejectedError as e:
+            raise self._rejected_error(e)
         except httpx.HTTPStatusError as e:
             # Handle 4xx/5xx errors specifically if needed, reusing existing logic
             logger.error(f"Tufin API returned error {e.response.status_code} adding devices: {e.response.text}")
@@ -311,12 +1048,14 @@ class TufinApiClient:
         
         # Use _request but expect 202
         try:
-            response = await self._client.request("POST", url, json=request_body)
+            response = await self._raw_request("POST", url, endpoint="import_securetrack_managed_devices", json=request_body)
             if response.status_code != status.HTTP_202_ACCEPTED:
                 response.raise_for_status()
             
             logger.info(f"Managed device import request accepted by Tufin (Status {response.status_code}).")
             return None
+        except UpstreamRejectedError as e:
+            raise self._rejected_error(e)
         except httpx.HTTPStatusError as e:
             logger.error(f"Tufin API returned error {e.response.status_code} importing devices: {e.response.text}")
             detail = f"Tufin API error: {e.response.status_code} - {e.response.text[:100]}..."
@@ -331,44 +1070,23 @@ class TufinApiClient:
             logger.error(f"Unexpected error during import devices: {e}", exc_info=True)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal error during device import request.")
 
-    async def query_rules_graphql(self, tql_filter: Optional[str] = None) -> Dict[str, Any]:
-        """Queries SecureTrack rules using GraphQL and TQL filter."""
-        # Define a standard set of fields to retrieve
-        # Expand this based on common needs
-        rule_fields = """
-            id
-            name
-            action
-            comment
-            disabled
-            implicit
-            metadata { certificationStatus technicalOwner applicationOwner ruleDescription businessOwner } 
-            source { text zones { text } }
-            destination { text zones { text } }
-            service { text }
-            application { text }
-            user { text }
-            installOn { text }
-            vpn { text }
-            # Add more fields as needed, e.g., loggingDetails { text }, schedule { text }
+    async def query_rules_graphql(self, tql_filter: Optional[str] = None, bypass_cache: bool = False) -> Dict[str, Any]:
         """
-        
-        query = f"""
-            query($tqlFilter: String) {{
-                rules(filter: $tqlFilter) {{
-                    count
-                    values {{
-                        {rule_fields}
-                    }}
-                }}
-            }}
+        Queries SecureTrack rules using GraphQL and TQL filter.
+        Results are cached on the canonical TQL until a device revision changes.
         """
-        
+        if self._rules_cache is not None and not bypass_cache:
+            cached = self._rules_cache.get(tql_filter)
+            if cached is not None:
+                return cached
+
+        query = RULES_QUERY
         variables = {"tqlFilter": tql_filter or ""}
-        
         # Execute the query
         # Returns the content of the "data" field from the GraphQL response
-        graphql_data = await self.execute_graphql_query(query=query, variables=variables)
+        # Invalid TQL is rejected with a 400 every time, so that error is negative-cached
+        with self._negative_scope("rules", canonicalize_tql(tql_filter), bypass_cache):
+            graphql_data = await self.execute_graphql_query(query=query, variables=variables)
         
         # Expecting {"rules": {"count": N, "values": [...]}} inside the data
         if "rules" not in graphql_data or not isinstance(graphql_data["rules"], dict):
@@ -378,8 +1096,70 @@ class TufinApiClient:
                  detail="Invalid GraphQL response structure from Tufin (missing rules data)"
              )
              
+        if self._rules_cache is not None:
+            await self._rules_cache.put(tql_filter, graphql_data)
         return graphql_data # Return the full data dict containing {"rules": ...}
 
+    async def _query_rules_page(self, tql_filter: Optional[str], offset: int, first: int) -> Dict[str, Any]:
+        """Fetches one page of a rule query; returns the {"count": N, "values": [...]} object."""
+        variables = {"tqlFilter": tql_filter or "", "first": first, "offset": offset}
+        graphql_data = await self.execute_graphql_query(query=RULES_PAGE_QUERY, variables=variables)
+        rules = graphql_data.get("rules")
+        if not isinstance(rules, dict) or not isinstance(rules.get("values", []), list):
+            logger.error(f"GraphQL rules page response missing 'rules' field or wrong type: {graphql_data}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Invalid GraphQL response structure from Tufin (missing rules data)"
+            )
+        return rules
+
+    async def iter_rules_graphql(self, tql_filter: Optional[str] = None,
+                                 bypass_cache: bool = False) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yields (count, rules) chunks of a rule query without materializing the whole result.
+        A cached result (see query_rules_graphql) is replayed in chunks. Otherwise the query is paged
+        with GraphQL first/offset: the first page reveals `count`, then up to TUFIN_RULES_PAGE_CONCURRENCY
+        pages of TUFIN_RULES_PAGE_SIZE rules are in flight while earlier chunks are consumed.
+        Streamed results are not cached, since they can be far larger than any cache entry.
+        """
+        page_size = max(1, self.settings.TUFIN_RULES_PAGE_SIZE)
+        if self._rules_cache is not None and not bypass_cache:
+            cached = self._rules_cache.get(tql_filter)
+            if cached is not None:
+                values = cached["rules"].get("values") or []
+                count = cached["rules"].get("count", len(values))
+                for start in range(0, max(len(values), 1), page_size):
+                    yield count, values[start:start + page_size]
+                return
+
+        # Invalid TQL is rejected on the first page already, so that error is negative-cached
+        with self._negative_scope("rules", canonicalize_tql(tql_filter), bypass_cache):
+            first = await self._query_rules_page(tql_filter, 0, page_size)
+        count = int(first.get("count") or 0)
+        calls = (
+            (lambda offset=offset: self._query_rules_page(tql_filter, offset, page_size))
+            for offset in range(page_size, count, page_size)
+        )
+        # Rules that move across a page boundary between requests are emitted only once; rules without
+        # an id cannot be matched up and are always emitted
+        seen = set()
+
+        def unseen(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+            values = []
+            for rule in page.get("values") or []:
+                rule_id = rule.get("id")
+                if rule_id is not None:
+                    if rule_id in seen:
+                        continue
+                    seen.add(rule_id)
+                values.append(rule)
+            return values
+
+        async with aclosing(prefetch_ordered(calls, self.settings.TUFIN_RULES_PAGE_CONCURRENCY)) as pages:
+            yield count, unseen(first)
+            async for page in pages:
+                yield count, unseen(page)
+
     # --- SecureChange Methods --- 
     
     async def create_securechange_ticket(self, workflow_name: str, ticket_details: Dict[str, Any]) -> TufinTicket:
@@ -402,12 +1182,16 @@ class TufinApiClient:
         }
         
         logger.debug(f"Tufin create ticket request body: {request_body}") # Be careful logging potentially sensitive details
-        response = await self._request("POST", url, json=request_body)
+        response = await self._request("POST", url, upstream=UPSTREAM_SECURECHANGE, endpoint="create_securechange_ticket", json=request_body)
         
         # Parse the response using the detailed TufinTicket model
         try:
-            created_ticket = TufinTicket.model_validate(response.json())
+            created_ticket = TufinTicket.model_validate(json_codec.loads(response.content))
             logger.info(f"Successfully created SecureChange ticket ID: {created_ticket.id}")
+            if self._ticket_cache is not None:
+                self._ticket_cache.put(created_ticket)
+            if self._negative_cache is not None and created_ticket.id is not None:
+                self._negative_cache.discard("ticket", str(created_ticket.id))
             return created_ticket
         except Exception as e:
             logger.error(f"Failed to parse Tufin create ticket response: {e}", exc_info=True)
@@ -416,8 +1200,12 @@ class TufinApiClient:
                 detail="Failed to parse response from Tufin API (Create Ticket)"
             )
 
-    async def list_securechange_tickets(self, filters: Optional[Dict[str, Any]] = None) -> TufinTicketListResponse:
-        """Lists tickets from SecureChange. Returns the parsed Tufin response structure."""
+    async def list_securechange_tickets(self, filters: Optional[Dict[str, Any]] = None, all_pages: bool = False,
+                                        max_items: Optional[int] = None) -> TufinTicketListResponse:
+        """
+        Lists tickets from SecureChange. Returns the parsed Tufin response structure.
+        With `all_pages` or `max_items`, follows the `next` links server-side (see _collect_ticket_pages).
+        """
         # Endpoint verified from user input
         url = f"{self.securechange_base_url}/securechangeworkflow/api/securechange/tickets"
         params = {}
@@ -429,13 +1217,33 @@ class TufinApiClient:
             params.update(filters) # Simple add for now, likely needs adjustment
             
         logger.info(f"Requesting SecureChange tickets from {url} with params: {params}")
-        response = await self._request("GET", url, params=params if params else None)
-        
+        if all_pages or max_items is not None:
+            return await self._collect_ticket_pages(url, params, max_items)
+        if "list_securechange_tickets" in self._stream_endpoints:
+            return await self._request_list_streamed(
+                url, UPSTREAM_SECURECHANGE, "list_securechange_tickets", TufinTicketListResponse,
+                "ticket", TufinTicket, "Ticket List", params=params if params else None,
+            )
+        return self._parse_ticket_list(await self._get_ticket_page(url, params))
+
+    async def _get_ticket_page(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GETs one page of the SecureChange ticket list and decodes it (without validating the tickets)."""
+        response = await self._request("GET", url, upstream=UPSTREAM_SECURECHANGE, endpoint="list_securechange_tickets", params=params if params else None)
+        try:
+            return json_codec.loads(response.content)
+        except Exception as e:
+            logger.error(f"Failed to decode Tufin ticket list response: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Failed to parse response from Tufin API (Ticket List)"
+            )
+
+    @staticmethod
+    def _parse_ticket_list(data: Dict[str, Any]) -> TufinTicketListResponse:
         # Parse the response using the detailed Tufin-specific Pydantic model
         try:
             # This model now includes the 'ticket' list and next/previous links
-            parsed_response = TufinTicketListResponse.model_validate(response.json())
-            return parsed_response
+            return TufinTicketListResponse.model_validate(data)
         except Exception as e:
             logger.error(f"Failed to parse Tufin ticket list response: {e}", exc_info=True)
             raise HTTPException(
@@ -443,16 +1251,82 @@ class TufinApiClient:
                 detail="Failed to parse response from Tufin API (Ticket List)"
             )
 
-    async def get_securechange_ticket(self, ticket_id: int) -> TufinTicket:
-        """Gets details for a specific ticket from SecureChange. Returns the parsed Tufin structure."""
+    def _ticket_page_url(self, href: str) -> str:
+        """
+        Resolves a `next` link's path and query against the configured SecureChange URL (urljoin, so a
+        base path is not added twice); the host is always the configured one, as Tufin may report an internal name.
+        """
+        base = httpx.URL(self.securechange_base_url + "/")
+        return str(base.join(httpx.URL(href).raw_path.decode("ascii")))
+
+    async def _collect_ticket_pages(self, url: str, params: Dict[str, Any], max_items: Optional[int]) -> TufinTicketListResponse:
+        """
+        Follows `next` links and merges the pages into one response.
+        The next page is requested as soon as the current one is decoded, so it downloads while the
+        current page's tickets are validated. Stops when there is no `next` link, after
+        TUFIN_TICKET_MAX_PAGES pages, or once at least `max_items` tickets were collected; pages are
+        kept whole, so the returned `next` link is always a valid continuation.
+        `total` is Tufin's total when reported, else the number of tickets collected once the last page was reached.
+        """
+        max_pages = self.settings.TUFIN_TICKET_MAX_PAGES
+        tickets: List[TufinTicket] = []
+        visited = set()
+        pages = 0
+        pending = asyncio.ensure_future(self._get_ticket_page(url, params))
+        try:
+            while pending is not None:
+                data = await pending
+                pending = None
+                pages += 1
+                raw = data.get("ticket") if isinstance(data, dict) else None
+                received = len(tickets) + (len(raw) if isinstance(raw, list) else int(bool(raw)))
+                href = ((data.get("next") or {}).get("@href") if isinstance(data, dict) else None)
+                if (href and href not in visited and pages < max_pages
+                        and (max_items is None or received < max_items)):
+                    visited.add(href)
+                    pending = asyncio.ensure_future(self._get_ticket_page(self._ticket_page_url(href)))
+                page = self._parse_ticket_list(data) # Validated while the next page is in flight
+                tickets.extend(page.ticket)
+        except BaseException:
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+            raise
+
+        if page.next is not None and pages >= max_pages and (max_items is None or len(tickets) < max_items):
+            logger.warning(f"Stopped following SecureChange ticket pages after {pages} pages (TUFIN_TICKET_MAX_PAGES)")
+        total = page.total if page.total is not None else (len(tickets) if page.next is None else None)
+        logger.info(f"Collected {len(tickets)} tickets from {pages} page(s)")
+        return TufinTicketListResponse(ticket=tickets, total=total, next=page.next, previous=None)
+
+    async def get_securechange_ticket(self, ticket_id: int, bypass_cache: bool = False) -> TufinTicket:
+        """
+        Gets details for a specific ticket from SecureChange. Returns the parsed Tufin structure.
+        Closed tickets are served from the ticket cache; open ones are revalidated on update_date.
+        """
+        use_cache = self._ticket_cache is not None and not bypass_cache
+        if use_cache:
+            cached = self._ticket_cache.get_final(ticket_id)
+            if cached is not None:
+                return cached
+
         # Endpoint verified from user input
         url = f"{self.securechange_base_url}/securechangeworkflow/api/securechange/tickets/{ticket_id}"
         logger.info(f"Requesting SecureChange ticket details from {url}")
-        response = await self._request("GET", url)
+        with self._negative_scope("ticket", str(ticket_id), bypass_cache):
+            response = await self._request("GET", url, upstream=UPSTREAM_SECURECHANGE, endpoint="get_securechange_ticket")
         
         # Parse the response using the detailed TufinTicket model
         try:
-            parsed_response = TufinTicket.model_validate(response.json())
+            payload = json_codec.loads(response.content)
+            if use_cache:
+                # Unchanged since it was cached: skip validating the full model
+                cached = self._ticket_cache.revalidate(ticket_id, payload)
+                if cached is not None:
+                    return cached
+            parsed_response = TufinTicket.model_validate(payload)
+            if self._ticket_cache is not None:
+                self._ticket_cache.put(parsed_response, ticket_id)
             return parsed_response
         except Exception as e:
             logger.error(f"Failed to parse Tufin ticket details response: {e}", exc_info=True)
@@ -471,15 +1345,19 @@ class TufinApiClient:
         # Prepare request body
         request_body = ticket_data.model_dump(exclude_unset=True)
         
-        response = await self._request("PUT", url, json=request_body)
+        response = await self._request("PUT", url, upstream=UPSTREAM_SECURECHANGE, endpoint="update_securechange_ticket", json=request_body)
         
         # Parse the response
         try:
-            updated_ticket = TufinTicket.model_validate(response.json())
+            updated_ticket = TufinTicket.model_validate(json_codec.loads(response.content))
             logger.info(f"Successfully updated SecureChange ticket ID: {updated_ticket.id}")
+            if self._ticket_cache is not None:
+                self._ticket_cache.put(updated_ticket, ticket_id)
             return updated_ticket
         except Exception as e:
             logger.error(f"Failed to parse Tufin update ticket response: {e}", exc_info=True)
+            if self._ticket_cache is not None:
+                self._ticket_cache.invalidate(ticket_id) # The update went through; the cached copy is outdated
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Failed to parse response from Tufin API (Update Ticket)"
@@ -493,6 +1371,7 @@ async def create_tufin_client() -> TufinApiClient:
     if _tufin_client_instance is None:
         logger.info("Creating singleton TufinApiClient instance.")
         _tufin_client_instance = TufinApiClient(settings)
+        await _tufin_client_instance.start()
     return _tufin_client_instance
 
 async def close_tufin_client():
@@ -503,6 +1382,12 @@ async def close_tufin_client():
         await _tufin_client_instance.close()
         _tufin_client_instance = None
 
+def get_upstream_health() -> Dict[str, Dict[str, Any]]:
+    """Returns circuit breaker (and node) states of the singleton client, or {} if it is not running."""
+    if _tufin_client_instance is None:
+        return {}
+    return _tufin_client_instance.upstream_states()
+
 # --- Dependency Function (Updated) --- 
 
 async def get_tufin_client() -> TufinApiClient:
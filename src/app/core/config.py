@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from enum import Enum # Import Enum
-from typing import Dict, Optional, List # Import Dict for typing, Optional for optional type, and List for lists
+from typing import Dict, Optional, List, Any # Import Dict for typing, Optional for optional type, List for lists, Any for free-form values
 
 # Define Roles using Enum
 class UserRole(str, Enum):
@@ -13,6 +13,8 @@ class Settings(BaseSettings):
     # MCP Server Settings
     MCP_PORT: int = 8000
     LOG_LEVEL: str = "INFO"
+    # JSON codec for upstream payloads and API responses: "auto" (orjson if installed), "orjson" or "stdlib"
+    JSON_CODEC: str = "auto"
     # Define other server settings like environment (dev, prod) if needed
 
     # Tufin Connection Settings (Placeholders - Add actual URLs)
@@ -24,6 +26,190 @@ class Settings(BaseSettings):
     TUFIN_API_TIMEOUT: float = 30.0 # Default timeout in seconds
     TUFIN_GRAPHQL_URL: Optional[str] = None # e.g., https://your-securetrack/sg/api/v1/graphql
     # Optionally add TUFIN_SSL_CERT_PATH: Optional[str] = None if using custom CA bundles
+    # Multi-node deployments: list every front-end node, e.g. '["https://st1", "https://st2"]'.
+    # When set, these replace the single URL above (the first entry is the primary node).
+    # Requests are spread across nodes weighted by observed latency and error rate.
+    TUFIN_SECURETRACK_URLS: List[str] = []
+    TUFIN_SECURECHANGE_URLS: List[str] = []
+    TUFIN_GRAPHQL_URLS: List[str] = [] # Defaults to each SecureTrack node's /sg/api/v1/graphql
+    # "basic": send Basic auth on every request. "session": log in once per upstream with Basic auth,
+    # then reuse the session cookie (re-login transparently on 401).
+    TUFIN_AUTH_MODE: str = "basic"
+    TUFIN_SESSION_COOKIE_NAMES: List[str] = ["JSESSIONID"] # Cookies treated as the Tufin session
+
+    # --- Tufin Connection Pool Settings ---
+    # Each upstream (securetrack, securechange, graphql) gets its own pool built from these values.
+    TUFIN_POOL_MAX_CONNECTIONS: int = 100 # Max concurrent connections per upstream
+    TUFIN_POOL_MAX_KEEPALIVE_CONNECTIONS: int = 20 # Idle connections kept open for reuse
+    TUFIN_POOL_KEEPALIVE_EXPIRY: float = 30.0 # Seconds an idle connection is kept before closing
+    TUFIN_POOL_TIMEOUT: Optional[float] = None # Max seconds to wait for a free connection (defaults to TUFIN_API_TIMEOUT)
+    TUFIN_HTTP2_ENABLED: bool = False # Opt-in HTTP/2 multiplexing (requires: pip install 'httpx[http2]')
+    # Per-upstream overrides of the values above, e.g. '{"graphql": {"max_connections": 10, "http2": true}}'
+    # Supported keys: max_connections, max_keepalive_connections, keepalive_expiry, pool_timeout, http2
+    TUFIN_POOL_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+
+    # --- Request Coalescing (single-flight) ---
+    # Concurrent identical GETs (same URL and params) share one upstream call.
+    # Only client methods listed here opt in; names match TufinApiClient method names.
+    TUFIN_COALESCING_ENABLED: bool = True
+    TUFIN_COALESCE_ENDPOINTS: List[str] = [
+        "get_securetrack_domains",
+        "list_securetrack_devices",
+        "get_securetrack_device",
+        "get_topology_path",
+        "get_topology_path_image",
+        "list_securechange_tickets",
+        "get_securechange_ticket",
+    ]
+
+    # --- Retry Policy (idempotent calls only) ---
+    # Capped exponential backoff with full jitter; upstream Retry-After is honoured.
+    TUFIN_RETRY_ENABLED: bool = True
+    TUFIN_RETRY_MAX_ATTEMPTS: int = 3 # Total attempts including the first one
+    TUFIN_RETRY_BASE_DELAY: float = 0.2 # Seconds; backoff cap doubles per attempt
+    TUFIN_RETRY_MAX_DELAY: float = 5.0 # Upper bound for a single backoff delay
+    TUFIN_RETRY_DEADLINE: Optional[float] = 45.0 # Total time budget per call across all attempts
+    TUFIN_RETRY_STATUS_CODES: List[int] = [429, 502, 503, 504]
+    # Per client method overrides. Keys: max_attempts, base_delay, max_delay, deadline,
+    # retry_statuses, idempotent (force on/off regardless of HTTP method), respect_retry_after
+    TUFIN_RETRY_POLICIES: Dict[str, Dict[str, Any]] = {
+        "execute_graphql_query": {"idempotent": True}, # Read-only queries sent via POST
+        "get_topology_path_image": {"max_attempts": 2}, # Expensive to render, retry once
+    }
+
+    # --- Circuit Breaker (one per upstream: securetrack, securechange, graphql) ---
+    # While open, calls fail fast with 503 instead of waiting out TUFIN_API_TIMEOUT.
+    TUFIN_BREAKER_ENABLED: bool = True
+    TUFIN_BREAKER_WINDOW_SIZE: int = 20 # Number of recent calls evaluated
+    TUFIN_BREAKER_MINIMUM_CALLS: int = 10 # Calls needed in the window before the breaker can open
+    TUFIN_BREAKER_FAILURE_RATE: float = 0.5 # Open when this fraction of calls failed (5xx/timeout/connection error)
+    TUFIN_BREAKER_SLOW_CALL_RATE: float = 0.8 # ...or when this fraction of calls was slow
+    TUFIN_BREAKER_SLOW_CALL_SECONDS: float = 10.0 # A call taking at least this long counts as slow
+    TUFIN_BREAKER_OPEN_SECONDS: float = 30.0 # Time spent open before allowing half-open trial calls
+    TUFIN_BREAKER_HALF_OPEN_CALLS: int = 3 # Trial calls allowed (and required to succeed) while half-open
+
+    # --- Bulkheads (concurrency limits per endpoint class) ---
+    # Expensive calls get their own small pools of slots so they cannot starve cheap lookups.
+    # Per class: max_concurrent slots, max_queue waiting calls, max_wait seconds before rejecting (503).
+    TUFIN_BULKHEADS_ENABLED: bool = True
+    TUFIN_BULKHEADS: Dict[str, Dict[str, float]] = {
+        "topology": {"max_concurrent": 8, "max_queue": 32, "max_wait": 10.0},
+        "graphql": {"max_concurrent": 8, "max_queue": 32, "max_wait": 10.0},
+        "default": {"max_concurrent": 64, "max_queue": 256, "max_wait": 10.0},
+    }
+    # Maps client method names to bulkhead classes; unlisted methods use "default"
+    TUFIN_ENDPOINT_CLASSES: Dict[str, str] = {
+        "get_topology_path": "topology",
+        "get_topology_path_image": "topology",
+        "execute_graphql_query": "graphql", # Used by query_rules_graphql
+    }
+
+    # --- Streaming Parsing ---
+    # List endpoints whose (potentially huge) bodies are parsed incrementally: elements are
+    # validated one at a time as they arrive instead of via response.json() + model_validate.
+    TUFIN_STREAM_PARSE_ENDPOINTS: List[str] = ["list_securetrack_devices", "list_securechange_tickets"]
+
+    # --- Paged Device Listing ---
+    # The full device list is fetched with start/count pages: the first page reveals `total`,
+    # the rest are requested concurrently and merged in order. 0 fetches everything in one GET.
+    TUFIN_DEVICE_PAGE_SIZE: int = 1000
+    TUFIN_DEVICE_PAGE_CONCURRENCY: int = 4 # Device pages in flight at once
+    # GET /api/v1/tickets?all_pages=true (or max_items=N) follows SecureChange `next` links server-side
+    TUFIN_TICKET_MAX_PAGES: int = 100 # Upper bound on pages followed per listing
+
+    # --- Hedged Reads (multi-node upstreams only) ---
+    # If the first node has not answered within the endpoint's recent latency percentile,
+    # the same idempotent read is sent to a second node and the first good answer wins.
+    TUFIN_HEDGE_ENDPOINTS: List[str] = ["get_securetrack_device", "get_topology_path"]
+    TUFIN_HEDGE_PERCENTILE: float = 0.95 # Hedge after this percentile of recent latencies
+    TUFIN_HEDGE_MIN_DELAY: float = 0.05 # Never hedge sooner than this (seconds)
+    TUFIN_HEDGE_DEFAULT_DELAY: float = 1.0 # Delay used until enough samples are collected
+    TUFIN_HEDGE_MIN_SAMPLES: int = 20
+
+    # --- In-Memory Cache Sizing ---
+    # Every cache is bounded by entry count and by the serialized size of its values (*_CACHE_MAX_BYTES).
+    # Values of at least TUFIN_CACHE_COMPRESS_MIN_BYTES can be held compressed (decompressed on every hit).
+    TUFIN_CACHE_COMPRESSION: str = "none" # "none", "zlib" or "zstd" (needs pip install zstandard; falls back to zlib)
+    TUFIN_CACHE_COMPRESS_MIN_BYTES: int = 1024 * 1024
+
+    # --- Device Inventory Cache (GET /api/v1/devices) ---
+    # Fresh for TTL seconds; afterwards stale data is served while one background refresh runs.
+    # Entries older than MAX_STALE are never served. Send 'Cache-Control: no-cache' to bypass.
+    TUFIN_INVENTORY_CACHE_ENABLED: bool = True
+    TUFIN_INVENTORY_CACHE_TTL: float = 300.0
+    TUFIN_INVENTORY_CACHE_MAX_STALE: float = 3600.0
+    TUFIN_INVENTORY_CACHE_MAX_ENTRIES: int = 64 # Distinct filter combinations kept
+    TUFIN_INVENTORY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # --- Per-Device Cache (GET /api/v1/devices/{device_id}) ---
+    # Entries are warmed by inventory listings and stay valid while the device's latest_revision
+    # is unchanged; the TTL bounds fields that change without a new revision (e.g. status).
+    TUFIN_DEVICE_CACHE_ENABLED: bool = True
+    TUFIN_DEVICE_CACHE_TTL: float = 900.0
+    TUFIN_DEVICE_CACHE_MAX_ENTRIES: int = 50000
+    TUFIN_DEVICE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
+    # --- Topology Path Cache (GET /api/v1/topology/path) ---
+    # Keyed on the normalized (src, dst, service); dropped when a device on the path gets a new revision.
+    TUFIN_TOPOLOGY_CACHE_ENABLED: bool = True
+    TUFIN_TOPOLOGY_CACHE_TTL: float = 600.0
+    TUFIN_TOPOLOGY_CACHE_MAX_ENTRIES: int = 2048 # LRU eviction beyond this
+    TUFIN_TOPOLOGY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # --- Topology Path Image Cache (GET /api/v1/topology/path/image) ---
+    # Images are stored on disk, named by a hash of the normalized query plus the revisions of the
+    # devices on the path, and served directly from the file. Oldest files are evicted beyond MAX_BYTES.
+    TUFIN_IMAGE_CACHE_ENABLED: bool = True
+    TUFIN_IMAGE_CACHE_DIR: str = "" # Defaults to <system temp dir>/tufin-mcp-path-images
+    TUFIN_IMAGE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    TUFIN_IMAGE_CACHE_TTL: float = 3600.0 # Max age of an image; images are never cached while a device revision is unknown
+
+    # --- GraphQL Rules Cache (POST /api/v1/graphql/rules) ---
+    # Keyed on the canonical TQL filter; cleared whenever any device revision changes.
+    TUFIN_RULES_CACHE_ENABLED: bool = True
+    TUFIN_RULES_CACHE_TTL: float = 300.0
+    TUFIN_RULES_CACHE_MAX_ENTRIES: int = 256 # LRU eviction beyond this
+    TUFIN_RULES_CACHE_MAX_BYTES: int = 512 * 1024 * 1024 # Single results can be tens of MB
+    # POST /api/v1/graphql/rules/stream pages the query with GraphQL first/offset instead
+    TUFIN_RULES_PAGE_SIZE: int = 500 # Rules per GraphQL page
+    TUFIN_RULES_PAGE_CONCURRENCY: int = 2 # Pages in flight at once (shares the "graphql" bulkhead)
+
+    # --- SecureChange Ticket Cache (GET /api/v1/tickets/{ticket_id}) ---
+    # Tickets in a final status are served from memory; open tickets are revalidated on update_date.
+    # Create/update responses are written through.
+    TUFIN_TICKET_CACHE_ENABLED: bool = True
+    TUFIN_TICKET_CACHE_MAX_ENTRIES: int = 10000
+    TUFIN_TICKET_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    TUFIN_TICKET_FINAL_STATUSES: List[str] = ["Ticket Closed", "Ticket Resolved", "Ticket Cancelled", "Ticket Rejected"] # Case-insensitive
+
+    # --- Negative Cache ---
+    # Deterministic upstream errors for device/ticket lookups and rule queries are remembered briefly,
+    # keyed like the positive cache entries (device ID, ticket ID, canonical TQL).
+    TUFIN_NEGATIVE_CACHE_ENABLED: bool = True
+    TUFIN_NEGATIVE_CACHE_TTL: float = 30.0 # Keep short: a missing ticket/device may be created shortly after
+    TUFIN_NEGATIVE_CACHE_MAX_ENTRIES: int = 4096
+    TUFIN_NEGATIVE_CACHE_STATUSES: List[int] = [400, 404] # Only statuses that repeat for the same request
+
+    # --- On-Disk Second-Tier Cache (Optional) ---
+    # SQLite (WAL) file behind the device, topology path, rules and ticket caches; written behind in
+    # batches and loaded at startup so restarts come up warm.
+    TUFIN_L2_CACHE_ENABLED: bool = False
+    TUFIN_L2_CACHE_PATH: str = "" # Empty: tufin-mcp-cache.sqlite3 in the system temp directory
+    TUFIN_L2_CACHE_FLUSH_INTERVAL: float = 1.0 # Seconds between write-behind batches
+    TUFIN_L2_CACHE_COMPACT_INTERVAL: float = 600.0 # Seconds between removals of expired/excess rows
+    TUFIN_L2_CACHE_COMPRESS_MIN_BYTES: int = 1024 # zlib-compress serialized values at least this large
+    TUFIN_L2_CACHE_MAX_PENDING: int = 10000 # Queued writes before merging/collapsing them (bounds memory if the disk stalls)
+
+    # --- Adaptive Concurrency (AIMD, one limiter per upstream) ---
+    # Grows the in-flight limit additively while latency stays near its baseline and cuts it
+    # multiplicatively on errors or latency spikes (e.g. during SecureTrack revision imports).
+    TUFIN_ADAPTIVE_CONCURRENCY_ENABLED: bool = False
+    TUFIN_ADAPTIVE_INITIAL_LIMIT: int = 20
+    TUFIN_ADAPTIVE_MIN_LIMIT: int = 2
+    TUFIN_ADAPTIVE_MAX_LIMIT: int = 100
+    TUFIN_ADAPTIVE_LATENCY_TOLERANCE: float = 2.0 # Congested when recent latency > tolerance x baseline
+    TUFIN_ADAPTIVE_BACKOFF_RATIO: float = 0.75 # Multiplier applied to the limit on congestion
+    TUFIN_ADAPTIVE_MAX_WAIT: Optional[float] = 10.0 # Seconds a call may wait for capacity before 503
 
     # Security Settings (Placeholders - Generate strong secrets)
     # Example: openssl rand -hex 32
@@ -39,6 +225,7 @@ class Settings(BaseSettings):
         "health_check": [], # No role required - handled by exempting
         "access_secure_endpoint": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
         "list_devices": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
+        "export_devices": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
         "get_device": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
         "list_tickets": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
         "create_ticket": [UserRole.ADMIN, UserRole.TICKET_MANAGER],
@@ -51,6 +238,8 @@ class Settings(BaseSettings):
         "import_managed_devices": [UserRole.ADMIN],
         "query_rules_graphql": [UserRole.ADMIN, UserRole.TICKET_MANAGER, UserRole.USER],
         "test_tufin_connection": [UserRole.ADMIN],
+        "view_metrics": [UserRole.ADMIN],
+        "manage_cache": [UserRole.ADMIN],
     }
 
     # Maps allowable Workflow Names to list of roles that can create tickets for them
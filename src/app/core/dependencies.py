@@ -1,5 +1,5 @@
 import logging
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import APIKeyHeader
 
 from .config import settings, UserRole
@@ -80,4 +80,12 @@ def require_permission(permission_id: str):
             f"Permission check passed for '{permission_id}': Key {current_user.api_key[:5]}... (Role: {current_user.role.value})"
         )
         return current_user # Return authenticated user object
-    return permission_checker
\ No newline at end of file
+    return permission_checker
+
+# --- Cache Control ---
+
+def cache_bypass_requested(request: Request) -> bool:
+    """Dependency: True when the client asked for fresh data ('Cache-Control: no-cache' / 'no-store' or 'Pragma: no-cache')."""
+    cache_control = request.headers.get("cache-control", "").lower()
+    directives = {d.strip().split("=", 1)[0] for d in cache_control.split(",")}
+    return bool(directives & {"no-cache", "no-store"}) or "no-cache" in request.headers.get("pragma", "").lower()
@@ -0,0 +1,63 @@
+import json
+import logging
+from typing import Any, Callable, Optional, Union
+
+from fastapi.responses import JSONResponse
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError: # Optional dependency: pip install orjson
+    orjson = None
+
+CODEC_AUTO = "auto"
+CODEC_ORJSON = "orjson"
+CODEC_STDLIB = "stdlib"
+
+class JsonCodec:
+    """A named pair of JSON functions: loads(bytes | str) -> Any and dumps(Any) -> bytes."""
+
+    def __init__(self, name: str, loads: Callable[[Union[bytes, str]], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+def _stdlib_dumps(content: Any) -> bytes:
+    # Same output options as starlette's JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+STDLIB_CODEC = JsonCodec(CODEC_STDLIB, json.loads, _stdlib_dumps)
+ORJSON_CODEC: Optional[JsonCodec] = (
+    JsonCodec(CODEC_ORJSON, orjson.loads, lambda content: orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS))
+    if orjson is not None else None
+)
+
+def get_codec(name: str = CODEC_AUTO) -> JsonCodec:
+    """Returns the requested codec; 'auto' prefers orjson and falls back to the stdlib."""
+    name = name.lower()
+    if name in (CODEC_AUTO, CODEC_ORJSON) and ORJSON_CODEC is not None:
+        return ORJSON_CODEC
+    if name == CODEC_ORJSON:
+        logger.warning("JSON_CODEC='orjson' but orjson is not installed; using the stdlib json module.")
+    elif name not in (CODEC_AUTO, CODEC_STDLIB):
+        logger.warning(f"Unknown JSON_CODEC '{name}', using the stdlib json module.")
+    return STDLIB_CODEC
+
+codec = get_codec(settings.JSON_CODEC)
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decodes JSON (e.g. an upstream response body) with the configured codec."""
+    return codec.loads(data)
+
+def dumps(content: Any) -> bytes:
+    """Encodes JSON with the configured codec."""
+    return codec.dumps(content)
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured codec; used as the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return codec.dumps(content)
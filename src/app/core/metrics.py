@@ -0,0 +1,142 @@
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+
+# Lightweight in-process metrics registry.
+# Kept dependency-free on purpose: values are exposed as JSON via GET /metrics.
+# Swap for prometheus_client if a scraping backend is introduced later.
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _label_str(key: LabelKey) -> str:
+    # Render labels like 'upstream=securetrack,endpoint=get_device' for the JSON snapshot
+    return ",".join(f"{k}={v}" for k, v in key) or "_"
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_label_str(k): v for k, v in self._values.items()}
+
+class Gauge:
+    """Point-in-time value, optionally split by labels."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, **labels) -> Optional[float]:
+        return self._values.get(_label_key(labels))
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_label_str(k): v for k, v in self._values.items()}
+
+# Default buckets in seconds, tuned for upstream HTTP latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Cumulative bucket histogram (Prometheus-style), optionally split by labels."""
+
+    def __init__(self, name: str, description: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["count"] += 1
+            series["sum"] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series["count"] if series else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                _label_str(k): {
+                    "count": s["count"],
+                    "sum": round(s["sum"], 6),
+                    "buckets": {str(b): c for b, c in zip(self.buckets, s["counts"])},
+                }
+                for k, s in self._series.items()
+            }
+
+class MetricsRegistry:
+    """Holds all metrics by name. Re-registering a name returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, description, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' already registered as {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def names(self) -> List[str]:
+        return sorted(self._metrics)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns all metric values, grouped by metric type then name."""
+        result: Dict[str, Dict[str, Any]] = {"counters": {}, "gauges": {}, "histograms": {}}
+        for name in self.names():
+            metric = self._metrics[name]
+            if isinstance(metric, Counter):
+                result["counters"][name] = metric.snapshot()
+            elif isinstance(metric, Gauge):
+                result["gauges"][name] = metric.snapshot()
+            else:
+                result["histograms"][name] = metric.snapshot()
+        return result
+
+# Shared registry instance
+metrics = MetricsRegistry()
@@ -20,15 +20,21 @@ from .core.logging_config import setup_logging
 # Import security dependencies from the new file
 from .core.dependencies import get_authenticated_user, require_permission # Corrected import (removed require_role)
 # Import the Tufin client and lifecycle functions
-from .clients.tufin import TufinApiClient, get_tufin_client, create_tufin_client, close_tufin_client
+from .clients.tufin import TufinApiClient, get_tufin_client, create_tufin_client, close_tufin_client, get_upstream_health
 # Import the secure store instance
 from .core.secure_store import secure_store_instance
 # Import the SecureChange router
 from .api.v1.endpoints import securechange as securechange_router
 # Import the SecureTrack router
 from .api.v1.endpoints import securetrack as securetrack_router
+# Import the cache administration router
+from .api.v1.endpoints import admin as admin_router
 # Import Middleware
 from .middleware.request_context import RequestContextLogMiddleware
+# Import the in-process metrics registry
+from .core.metrics import metrics
+# Import the configurable JSON codec used for responses
+from .core.json_codec import CodecJSONResponse
 
 # --- Rate Limiter Setup --- 
 # Moved to core/limiter.py
@@ -67,7 +73,8 @@ app = FastAPI(
     description="MCP Server providing a unified interface to Tufin SecureTrack and SecureChange APIs.",
     version="0.1.0",
     on_startup=[startup_event], # Register startup event
-    on_shutdown=[shutdown_event] # Register shutdown event
+    on_shutdown=[shutdown_event], # Register shutdown event
+    default_response_class=CodecJSONResponse # orjson-backed when available (see JSON_CODEC)
 )
 
 # --- Add Rate Limiter State and Handler ---
@@ -93,16 +100,39 @@ app.include_router(
     # tags=["SecureTrack"] # Optional tag override
 )
 
+# Include Cache Administration Router (admin only)
+app.include_router(
+    admin_router.router,
+    prefix="/api/v1",
+)
+
 @app.get("/health", tags=["Management"], status_code=status.HTTP_200_OK)
 @limiter.exempt # Exempt health check from rate limiting
-async def health_check():
+async def health_check(response: Response):
     """
-    Simple health check endpoint.
-    Returns 200 OK if the server is running.
+    Health check endpoint.
+    Returns 200 OK if the server is running and no Tufin circuit breaker is open.
+    Returns 503 with status 'degraded' while any upstream breaker is open, so load balancers can react.
     """
     logger.info("Health check endpoint called")
+    upstreams = get_upstream_health()
+    open_upstreams = [name for name, state in upstreams.items() if state.get("state") == "open"]
+    if open_upstreams:
+        logger.warning(f"Health check degraded: circuit open for {open_upstreams}")
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "degraded", "upstreams": upstreams}
     logger.info("Health check processed") # Use structlog logger
-    return {"status": "ok"}
+    return {"status": "ok", "upstreams": upstreams}
+
+# Apply RBAC: Allow only ADMIN role (using permission ID)
+@app.get("/metrics", tags=["Management"], dependencies=[Depends(require_permission("view_metrics"))])
+@limiter.exempt # Exempt metrics from rate limiting so monitoring can poll it
+async def get_metrics():
+    """
+    Returns a JSON snapshot of in-process metrics (Tufin connection pools, etc.).
+    Requires view_metrics permission.
+    """
+    return metrics.snapshot()
 
 # Apply RBAC: Allow any authenticated user (any role defined)
 @app.get("/secure", tags=["Test"], dependencies=[Depends(require_permission("access_secure_endpoint"))])
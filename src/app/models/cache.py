@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+# --- Cache Administration Models ---
+
+class CacheAgeDistribution(BaseModel):
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    max: Optional[float] = None
+    buckets: Dict[str, int] = Field(default_factory=dict, description="Entry counts per age bucket (e.g. '<1m', '1m-10m').")
+
+class CacheNamespaceStats(BaseModel):
+    namespace: str
+    entries: int
+    max_entries: Optional[int] = None
+    size_bytes: int
+    max_bytes: Optional[int] = None
+    ttl: Optional[float] = None
+    hits: int
+    misses: int
+    bypasses: int
+    evictions: int
+    hit_ratio: Optional[float] = Field(None, description="hits / (hits + misses) since startup; null before the first lookup.")
+    age_seconds: CacheAgeDistribution
+
+class CacheListResponse(BaseModel):
+    namespaces: List[CacheNamespaceStats]
+
+class CachePurgeResponse(BaseModel):
+    removed: Dict[str, int] = Field(..., description="Removed entries per namespace.")
+    total_removed: int
+
+class CacheWarmUpResponse(BaseModel):
+    status: str = Field(..., description="'started' or 'already_running'.")
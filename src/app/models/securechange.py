@@ -273,7 +273,7 @@ class TufinTicketListResponse(BaseModel):
     # tickets: Optional[TufinTicketListWrapper] = None 
     ticket: List[TufinTicket] = Field(default=[]) # Assuming list is direct
     # Total field is missing from the list schema provided, relying on next/prev links?
-    # total: Optional[int] = None
+    total: Optional[int] = None # Filled in when Tufin reports it, or after following every next link
     next: Optional[Link] = None
     previous: Optional[Link] = None
 
@@ -78,9 +78,8 @@ class DeviceListResponse(BaseModel):
     devices: List[DeviceResponse]
     total: int 
     count: int # Number of devices in this response
-    # Removed limit/offset as they are not used in the Tufin API based on new info
-    # limit: int
-    # offset: int
+    # Paging is cursor based (limit/offset are not supported by the Tufin API); pass this back as ?cursor=
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; null on the last page.")
 
 # Removed TopologyMapResponse as the API doesn't exist
 
@@ -0,0 +1,1040 @@
+import json
+import asyncio
+import threading
+import pytest
+import httpx
+import respx
+from fastapi import HTTPException
+
+from src.app.core.config import Settings
+from src.app.clients.tufin import TufinApiClient
+from src.app.clients.coalescing import coalesce_key
+from src.app.clients.bulkhead import Bulkhead, BulkheadFullError
+from src.app.clients.adaptive import AdaptiveConcurrencyLimiter
+from src.app.clients.streaming import parse_streamed_list
+from src.app.clients.pool import (
+    POOL_CONNECTIONS_OPENED, POOL_CONNECTIONS_REUSED, POOL_WAIT_SECONDS, _pool_setting, build_upstream_client, make_pool_trace,
+)
+from src.app.cache.topology import TopologyPathCache, topology_key
+from src.app.cache.revisions import RevisionTracker
+from src.app.cache.devices import DeviceCache
+from src.app.cache.images import PathImageCache
+from src.app.cache.rules import canonicalize_tql
+from src.app.cache.base import Codec, LRUCache
+from src.app.cache.persistent import SqliteCacheTier
+from src.app.cache import admin as cache_admin
+from src.app.cache.compression import get_compressor
+from src.app.models.securetrack import TufinDevice, TufinDeviceListResponse, TufinTopologyPathResponse
+from src.app.models.securechange import TicketUpdate
+
+# Unit tests for TufinApiClient internals, with Tufin mocked via respx.
+
+ST_URL = "https://st.test"
+SC_URL = "https://sc.test"
+
+def make_client(**overrides) -> TufinApiClient:
+    """Builds a client against fake hosts; overrides are passed to Settings."""
+    return TufinApiClient(Settings(TUFIN_SECURETRACK_URL=ST_URL, TUFIN_SECURECHANGE_URL=SC_URL, **overrides))
+
+@pytest.mark.asyncio
+async def test_pool_settings_apply_per_upstream_overrides():
+    settings = Settings(
+        TUFIN_SECURETRACK_URL=ST_URL, TUFIN_SECURECHANGE_URL=SC_URL, TUFIN_API_TIMEOUT=20.0,
+        TUFIN_POOL_MAX_CONNECTIONS=100, TUFIN_POOL_OVERRIDES={"graphql": {"max_connections": 8, "pool_timeout": 2.5}},
+    )
+    assert _pool_setting(settings, "graphql", "max_connections", 100) == 8
+    assert _pool_setting(settings, "graphql", "keepalive_expiry", 30.0) == 30.0 # Not overridden
+    assert _pool_setting(settings, "securetrack", "max_connections", 100) == 100 # Other upstreams keep the global value
+
+    graphql, securetrack = build_upstream_client(settings, "graphql"), build_upstream_client(settings, "securetrack")
+    try:
+        assert graphql.timeout.pool == 2.5
+        assert securetrack.timeout.pool == 20.0 # TUFIN_POOL_TIMEOUT unset: bounded by TUFIN_API_TIMEOUT
+    finally:
+        await graphql.aclose()
+        await securetrack.aclose()
+
+@pytest.mark.asyncio
+async def test_pool_trace_counts_opened_and_reused_connections_once_per_request():
+    upstream = "test_pool"
+    opened, reused = POOL_CONNECTIONS_OPENED.value(upstream=upstream), POOL_CONNECTIONS_REUSED.value(upstream=upstream)
+    waits = POOL_WAIT_SECONDS.count(upstream=upstream)
+
+    new_connection = make_pool_trace(upstream)
+    for event in ("connection.connect_tcp.started", "connection.connect_tcp.complete",
+                  "http11.send_request_headers.started", "http11.send_request_body.started"):
+        await new_connection(event, {})
+    reused_connection = make_pool_trace(upstream)
+    for event in ("http2.send_request_headers.started", "http2.send_request_headers.started"):
+        await reused_connection(event, {})
+    await make_pool_trace(upstream)("connection.start_tls.started", {}) # Not a connection-level outcome
+
+    assert POOL_CONNECTIONS_OPENED.value(upstream=upstream) == opened + 1
+    assert POOL_CONNECTIONS_REUSED.value(upstream=upstream) == reused + 1
+    assert POOL_WAIT_SECONDS.count(upstream=upstream) == waits + 2
+
+def test_coalesce_key_normalizes_params():
+    a = coalesce_key("get", "https://st.test/x", {"b": 2, "a": "1", "skip": None})
+    b = coalesce_key("GET", "https://st.test/x", {"a": 1, "b": "2"})
+    assert a == b
+    assert a != coalesce_key("GET", "https://st.test/x", {"a": 1})
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_identical_concurrent_gets_share_one_upstream_call():
+    calls = 0
+
+    async def slow_devices(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"device": [{"id": "1"}], "count": 1, "total": 1})
+
+    respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=slow_devices)
+    client = make_client(TUFIN_INVENTORY_CACHE_ENABLED=False) # Exercise the coalescing layer itself
+    try:
+        results = await asyncio.gather(*[client.list_securetrack_devices() for _ in range(10)])
+    finally:
+        await client.close()
+
+    assert calls == 1
+    assert all(r.total == 1 for r in results)
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_coalescing_respects_endpoint_opt_in():
+    calls = 0
+
+    async def slow_devices(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"device": [], "count": 0, "total": 0})
+
+    respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=slow_devices)
+    client = make_client(TUFIN_COALESCE_ENDPOINTS=[], TUFIN_INVENTORY_CACHE_ENABLED=False)
+    try:
+        await asyncio.gather(*[client.list_securetrack_devices() for _ in range(3)])
+    finally:
+        await client.close()
+
+    assert calls == 3
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_transient_errors_are_retried_with_retry_after():
+    route = respx.get(f"{ST_URL}/securetrack/api/devices/7").mock(side_effect=[
+        httpx.Response(503, headers={"Retry-After": "0"}),
+        httpx.Response(502),
+        httpx.Response(200, json={"id": "7", "name": "fw7"}),
+    ])
+    client = make_client(TUFIN_RETRY_BASE_DELAY=0.001)
+    try:
+        device = await client.get_securetrack_device("7")
+    finally:
+        await client.close()
+
+    assert device.name == "fw7"
+    assert route.call_count == 3
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_non_idempotent_calls_are_not_retried():
+    route = respx.post(f"{SC_URL}/securechangeworkflow/api/securechange/tickets").mock(
+        return_value=httpx.Response(503)
+    )
+    client = make_client(TUFIN_RETRY_BASE_DELAY=0.001)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await client.create_securechange_ticket("Example Firewall Workflow", {"subject": "x"})
+    finally:
+        await client.close()
+
+    assert exc_info.value.status_code == 503
+    assert route.call_count == 1
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_circuit_breaker_opens_and_fails_fast():
+    route = respx.get(f"{ST_URL}/securetrack/api/devices/9").mock(return_value=httpx.Response(500))
+    client = make_client(TUFIN_RETRY_ENABLED=False, TUFIN_BREAKER_MINIMUM_CALLS=3, TUFIN_BREAKER_WINDOW_SIZE=3)
+    try:
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc_info:
+                await client.get_securetrack_device("9")
+            assert exc_info.value.status_code == 500
+        assert client.breaker_states()["securetrack"]["state"] == "open"
+
+        with pytest.raises(HTTPException) as exc_info:
+            await client.get_securetrack_device("9")
+    finally:
+        await client.close()
+
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+    assert route.call_count == 3 # The fourth call never reached Tufin
+    assert client.breaker_states()["securechange"]["state"] == "closed"
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_session_auth_logs_in_once_and_refreshes_on_401():
+    seen = []
+
+    def devices(request):
+        seen.append((request.headers.get("Authorization"), request.headers.get("Cookie")))
+        if request.headers.get("Authorization"):
+            session = f"s{len(seen)}"
+            return httpx.Response(200, json={"id": "1"}, headers={"Set-Cookie": f"JSESSIONID={session}; Path=/"})
+        if request.headers.get("Cookie") == "JSESSIONID=s1" and len(seen) > 3:
+            return httpx.Response(401) # Simulate session expiry on the fourth call
+        return httpx.Response(200, json={"id": "1"})
+
+    respx.get(f"{ST_URL}/securetrack/api/devices/1").mock(side_effect=devices)
+    client = make_client(TUFIN_AUTH_MODE="session", TUFIN_COALESCING_ENABLED=False, TUFIN_DEVICE_CACHE_ENABLED=False)
+    try:
+        for _ in range(4):
+            await client.get_securetrack_device("1")
+    finally:
+        await client.close()
+
+    assert seen[0][0].startswith("Basic ")                      # Login
+    assert seen[1] == (None, "JSESSIONID=s1")                    # Session reused
+    assert seen[2] == (None, "JSESSIONID=s1")
+    assert seen[3] == (None, "JSESSIONID=s1")                    # Rejected with 401
+    assert seen[4][0].startswith("Basic ")                       # Transparent re-login
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_session_auth_keeps_one_session_per_node():
+    logins = {"st1.test": 0, "st2.test": 0}
+
+    def node(request):
+        host = request.url.host
+        if request.headers.get("Authorization"):
+            logins[host] += 1
+            return httpx.Response(200, json={"id": "1"}, headers={"Set-Cookie": f"JSESSIONID={host}; Path=/"})
+        if request.headers.get("Cookie") != f"JSESSIONID={host}":
+            return httpx.Response(401) # A session of the other node is not valid here
+        return httpx.Response(200, json={"id": "1"})
+
+    for host in logins:
+        respx.get(f"https://{host}/securetrack/api/devices/1").mock(side_effect=node)
+    client = make_client(
+        TUFIN_AUTH_MODE="session", TUFIN_COALESCING_ENABLED=False, TUFIN_DEVICE_CACHE_ENABLED=False,
+        TUFIN_HEDGE_ENDPOINTS=[], TUFIN_SECURETRACK_URLS=["https://st1.test", "https://st2.test"],
+    )
+    balancer = client._balancers["securetrack"]
+    picks = iter(balancer.nodes * 3) # Alternate between the nodes
+    balancer.choose = lambda exclude=(): next(picks)
+    try:
+        for _ in range(6):
+            await client.get_securetrack_device("1")
+        auth = client._clients["securetrack"].auth
+        assert auth.has_session("https://st1.test") and auth.has_session("https://st2.test")
+    finally:
+        await client.close()
+
+    assert logins == {"st1.test": 1, "st2.test": 1}
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_queue_is_full():
+    bulkhead = Bulkhead("topology", max_concurrent=1, max_queue=1, max_wait=1.0)
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert bulkhead.in_flight == 1 and bulkhead.queued == 1
+
+    with pytest.raises(BulkheadFullError):
+        async with bulkhead.slot():
+            pass
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert bulkhead.in_flight == 0 and bulkhead.queued == 0
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_grows_on_success_and_cuts_on_errors():
+    limiter = AdaptiveConcurrencyLimiter("securetrack", initial_limit=4, min_limit=1, max_limit=10, backoff_ratio=0.5)
+
+    async def call(failed: bool):
+        async with limiter.slot() as outcome:
+            await asyncio.sleep(0.001)
+            outcome.failed = failed
+
+    for _ in range(10):
+        await asyncio.gather(*[call(False) for _ in range(limiter.limit)])
+    grown = limiter.limit
+    assert grown > 4
+
+    await call(True)
+    assert limiter.limit < grown
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_slow_read_is_hedged_to_second_node():
+    cancelled = asyncio.Event()
+
+    async def slow_node(request):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return httpx.Response(200, json={"id": "1", "name": "slow"})
+
+    respx.get("https://st1.test/securetrack/api/devices/1").mock(side_effect=slow_node)
+    respx.get("https://st2.test/securetrack/api/devices/1").mock(
+        return_value=httpx.Response(200, json={"id": "1", "name": "fast"})
+    )
+    client = make_client(
+        TUFIN_SECURETRACK_URLS=["https://st1.test", "https://st2.test"], TUFIN_HEDGE_DEFAULT_DELAY=0.05
+    )
+    balancer = client._balancers["securetrack"]
+    # Make the slow node the primary pick so the outcome does not depend on the weighted draw
+    balancer.choose = lambda exclude=(): next(n for n in balancer.nodes if n not in list(exclude))
+    try:
+        device = await asyncio.wait_for(client.get_securetrack_device("1"), timeout=2)
+    finally:
+        await client.close()
+
+    assert device.name == "fast"
+    assert cancelled.is_set()
+    assert balancer.nodes[0].in_flight == 0
+
+def test_upstream_states_without_breakers_on_multi_node_upstreams():
+    client = make_client(TUFIN_BREAKER_ENABLED=False, TUFIN_SECURETRACK_URLS=["https://st1.test", "https://st2.test"])
+    states = client.upstream_states()
+    assert states["securetrack"]["state"] == "disabled"
+    assert len(states["securetrack"]["nodes"]) == 2
+
+@pytest.mark.asyncio
+async def test_streamed_list_parses_elements_split_across_chunks():
+    body = (
+        '{"count": 2, "device": [{"id": "1", "name": "fw \u00e9 [1]"}, {"id": "2", "name": "edge"}], '
+        '"total": 12345}'
+    ).encode()
+
+    async def chunks(size):
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+
+    for size in (1, 3, len(body)):
+        parsed = await parse_streamed_list(chunks(size), TufinDeviceListResponse, "device", TufinDevice)
+        assert [d.id for d in parsed.device] == ["1", "2"]
+        assert parsed.device[0].name == "fw \u00e9 [1]"
+        assert (parsed.count, parsed.total) == (2, 12345)
+
+    async def truncated():
+        yield body[:-10]
+
+    with pytest.raises(ValueError):
+        await parse_streamed_list(truncated(), TufinDeviceListResponse, "device", TufinDevice)
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_streamed_responses_hold_their_slots_until_the_body_is_closed():
+    url = f"{ST_URL}/securetrack/api/devices"
+    reading, finish = asyncio.Event(), asyncio.Event()
+
+    async def body():
+        yield b'{"count": 1, "device": [{"id": "1"}'
+        reading.set()
+        await finish.wait()
+        yield b'], "total": 1}'
+
+    respx.get(url).mock(side_effect=lambda request: httpx.Response(200, content=body()))
+    client = make_client(TUFIN_ADAPTIVE_CONCURRENCY_ENABLED=True)
+    bulkhead = client._bulkhead_for("list_securetrack_devices")
+    limiter, breaker = client._limiters["securetrack"], client._breakers["securetrack"]
+    try:
+        parsing = asyncio.create_task(client._request_list_streamed(
+            url, "securetrack", "list_securetrack_devices", TufinDeviceListResponse, "device", TufinDevice, "Devices"
+        ))
+        await asyncio.wait_for(reading.wait(), 1)
+        # Headers are in but the body is still arriving: the call still occupies its slots
+        assert (bulkhead.in_flight, limiter.in_flight) == (1, 1)
+        assert breaker.snapshot()["calls_in_window"] == 0
+
+        finish.set()
+        parsed = await parsing
+        assert [d.id for d in parsed.device] == ["1"]
+        assert (bulkhead.in_flight, limiter.in_flight) == (0, 0)
+        assert breaker.snapshot()["calls_in_window"] == 1
+
+        # A body closed unread releases the slots without recording an outcome
+        reading.clear()
+        response = await client._request("GET", url, endpoint="list_securetrack_devices", stream=True)
+        assert (bulkhead.in_flight, limiter.in_flight) == (1, 1)
+        await response.aclose()
+        assert (bulkhead.in_flight, limiter.in_flight) == (0, 0)
+        assert breaker.snapshot()["calls_in_window"] == 1
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_inventory_cache_serves_stale_while_one_refresh_runs():
+    calls = 0
+
+    async def devices(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"device": [], "count": 0, "total": calls})
+
+    respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=devices)
+    client = make_client(TUFIN_INVENTORY_CACHE_TTL=0.05, TUFIN_INVENTORY_CACHE_MAX_STALE=10)
+    try:
+        assert (await client.list_securetrack_devices()).total == 1
+        assert (await client.list_securetrack_devices()).total == 1 # Fresh hit
+        await asyncio.sleep(0.06)
+        # Stale: served immediately, a single background refresh is started
+        stale = await asyncio.gather(*[client.list_securetrack_devices() for _ in range(5)])
+        assert {r.total for r in stale} == {1}
+        await asyncio.sleep(0.05)
+        assert calls == 2
+        assert (await client.list_securetrack_devices()).total == 2
+        # Cache-Control: no-cache
+        assert (await client.list_securetrack_devices(bypass_cache=True)).total == 3
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_cache_is_warmed_by_listing_and_dropped_on_new_revision():
+    revision = {"value": "10"}
+
+    def listing(request):
+        return httpx.Response(200, json={"device": [{"id": "1", "latest_revision": revision["value"]},
+                                                    {"id": "2", "latest_revision": "7"}], "count": 2, "total": 2})
+
+    detail = respx.get(f"{ST_URL}/securetrack/api/devices/1").mock(
+        side_effect=lambda request: httpx.Response(200, json={"id": "1", "latest_revision": revision["value"]})
+    )
+    respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=listing)
+    client = make_client()
+    try:
+        await client.list_securetrack_devices()
+        assert (await client.get_securetrack_device("1")).latest_revision == "10"
+        assert detail.call_count == 0 # Served from the listing
+
+        revision["value"] = "11"
+        await client.list_securetrack_devices(bypass_cache=True)
+        assert (await client.get_securetrack_device("1")).latest_revision == "11"
+        assert detail.call_count == 0 # Listing replaced the entry with the new revision
+
+        client._revisions.observe("1", "12") # A newer revision seen elsewhere drops the entry
+        await client.get_securetrack_device("1")
+        assert detail.call_count == 1
+    finally:
+        await client.close()
+
+def test_topology_key_normalizes_equivalent_queries():
+    assert topology_key("010.0.0.1", "Web-Srv:443", "TCP/80") == topology_key("10.0.0.1/32", "web-srv:443", "tcp:80")
+    assert topology_key("10.0.0.1,10.0.0.2", "any", "udp:53,tcp:80") == topology_key("10.0.0.2, 10.0.0.1", "ANY", "tcp 80,53/udp")
+    assert topology_key("10.0.0.1", "10.0.0.2", "tcp:80") != topology_key("10.0.0.1", "10.0.0.2", "tcp:443")
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_topology_cache_invalidated_by_device_revision():
+    route = respx.get(f"{ST_URL}/securetrack/api/topology/path").mock(return_value=httpx.Response(
+        200, json={"traffic_allowed": True, "device_info": [{"id": 5, "name": "fw-5"}]}
+    ))
+    client = make_client()
+    try:
+        client._revisions.observe("5", "100")
+        await client.get_topology_path("10.0.0.1", "10.0.0.2", "tcp:80")
+        await client.get_topology_path("10.0.0.1", "10.0.0.2", "TCP/80")
+        assert route.call_count == 1
+
+        client._revisions.observe("5", "101") # New policy on a device along the path
+        await client.get_topology_path("10.0.0.1", "10.0.0.2", "tcp:80")
+        assert route.call_count == 2
+    finally:
+        await client.close()
+
+def test_topology_invalidation_uses_the_device_index_without_decoding_entries():
+    tracker = RevisionTracker()
+    cache = TopologyPathCache(tracker, max_entries=3, compressor=get_compressor("zlib", min_bytes=1))
+    for device_id in ("1", "2", "3"):
+        tracker.observe(device_id, "r1")
+
+    def path(*device_ids):
+        return TufinTopologyPathResponse.model_validate({"traffic_allowed": True, "device_info": [{"id": int(d)} for d in device_ids]})
+
+    cache.put("10.0.0.1", "10.0.0.2", "tcp:80", path("1", "2"))
+    cache.put("10.0.0.1", "10.0.0.3", "tcp:80", path("2"))
+    cache.put("10.0.0.1", "10.0.0.4", "tcp:80", path("3"))
+    cache.store.peek = cache.store.get = None # Invalidation must not read (decompress and decode) entries
+
+    tracker.observe("2", "r2")
+    assert len(cache.store) == 1 and sorted(cache._keys_by_device) == ["3"]
+
+    # Evicted and cleared entries leave the reverse index as well
+    for n in range(5, 9):
+        cache.put("10.0.0.1", f"10.0.0.{n}", "tcp:80", path("1"))
+    assert cache._keys_by_device.keys() == {"1"} and len(cache._keys_by_device["1"]) == 3
+    cache.store.clear()
+    assert not cache._keys_by_device and not cache._devices_by_key
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_path_image_served_from_disk_and_rekeyed_on_revision(tmp_path):
+    path = respx.get(f"{ST_URL}/securetrack/api/topology/path").mock(return_value=httpx.Response(
+        200, json={"traffic_allowed": True, "device_info": [{"id": 5}]}
+    ))
+    image = respx.get(f"{ST_URL}/securetrack/api/topology/path_image").mock(
+        return_value=httpx.Response(200, content=b"\x89PNG-bytes")
+    )
+    # Without the topology cache a hit must still not query the path
+    client = make_client(TUFIN_IMAGE_CACHE_DIR=str(tmp_path), TUFIN_TOPOLOGY_CACHE_ENABLED=False)
+    try:
+        client._revisions.observe("5", "1")
+        first = await client.get_topology_path_image_file("10.0.0.1", "10.0.0.2", "tcp:80")
+        second = await client.get_topology_path_image_file("10.0.0.1", "10.0.0.2", "TCP/80")
+        assert first == second and first.read_bytes() == b"\x89PNG-bytes"
+        assert image.call_count == 1 and path.call_count == 1
+
+        client._revisions.observe("5", "2")
+        third = await client.get_topology_path_image_file("10.0.0.1", "10.0.0.2", "tcp:80")
+        assert third.read_bytes() == b"\x89PNG-bytes" and image.call_count == 2
+    finally:
+        await client.close()
+
+    # A restarted process serves the image although it has not seen the device yet, and still drops
+    # it once the device turns out to have a newer revision than the one stored with the image
+    restarted = make_client(TUFIN_IMAGE_CACHE_DIR=str(tmp_path))
+    try:
+        assert await restarted.get_topology_path_image_file("10.0.0.1", "10.0.0.2", "tcp:80") == third
+        restarted._revisions.observe("5", "3")
+        await restarted.get_topology_path_image_file("10.0.0.1", "10.0.0.2", "tcp:80")
+        assert image.call_count == 3
+    finally:
+        await restarted.close()
+
+@pytest.mark.asyncio
+async def test_path_images_expire_after_ttl(tmp_path):
+    cache = PathImageCache(str(tmp_path), ttl=0.05)
+    await cache.put("ab" * 32, b"png")
+    assert await cache.get("ab" * 32) is not None
+    await asyncio.sleep(0.06)
+    assert await cache.get("ab" * 32) is None
+    assert len(cache) == 0 and not list(tmp_path.glob("*/*.png"))
+    # A restart keeps the original creation time, not the last access
+    await cache.put("cd" * 32, b"png")
+    await cache.get("cd" * 32)
+    await asyncio.sleep(0.06)
+    assert await PathImageCache(str(tmp_path), ttl=0.05).get("cd" * 32) is None
+
+@pytest.mark.asyncio
+async def test_path_image_cache_evicts_least_recently_used(tmp_path):
+    cache = PathImageCache(str(tmp_path), max_bytes=25)
+    a = await cache.put("a" * 64, b"x" * 10)
+    await cache.put("b" * 64, b"x" * 10)
+    await cache.get("a" * 64) # a is now the most recently used
+    await cache.put("c" * 64, b"x" * 10)
+    assert await cache.get("b" * 64) is None
+    assert a.exists() and cache.size_bytes == 20
+    # A new instance picks up the files left on disk
+    assert len(PathImageCache(str(tmp_path), max_bytes=25)) == 2
+
+def test_canonical_tql_ignores_case_spacing_and_clause_order():
+    assert canonicalize_tql("action = 'accept' and disabled=false") == canonicalize_tql("( disabled = false AND action = 'accept' )")
+    assert canonicalize_tql("a=1 OR b=2 AND c=3") != canonicalize_tql("c=3 AND b=2 OR a=1") # Mixed precedence keeps its order
+    assert canonicalize_tql("name = 'Allow'") != canonicalize_tql("name = 'allow'") # Quoted values are kept verbatim
+
+def test_canonical_tql_keeps_between_ranges_together():
+    a = canonicalize_tql("a between 1 and 5 and b between 2 and 7")
+    assert a != canonicalize_tql("a between 1 and 7 and b between 2 and 5")
+    assert a == canonicalize_tql("b BETWEEN 2 AND 7 AND a BETWEEN 1 AND 5")
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_rule_queries_cached_until_revision_change():
+    route = respx.post(f"{ST_URL}/sg/api/v1/graphql").mock(return_value=httpx.Response(
+        200, json={"data": {"rules": {"count": 0, "values": []}}}
+    ))
+    client = make_client()
+    try:
+        client._revisions.observe("5", "100")
+        await client.query_rules_graphql("action = 'accept' AND disabled = false")
+        await client.query_rules_graphql("disabled=false and action='accept'")
+        assert route.call_count == 1
+
+        client._revisions.observe("5", "101")
+        await client.query_rules_graphql("action = 'accept' AND disabled = false")
+        assert route.call_count == 2
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_ticket_cache_serves_closed_and_revalidates_open_tickets():
+    tickets_url = f"{SC_URL}/securechangeworkflow/api/securechange/tickets"
+    closed = respx.get(f"{tickets_url}/1").mock(return_value=httpx.Response(
+        200, json={"id": 1, "status": "Ticket Closed", "update_date": {"value": "2024-01-01"}}
+    ))
+    open_ticket = respx.get(f"{tickets_url}/2").mock(return_value=httpx.Response(
+        200, json={"id": 2, "status": "In Progress", "update_date": {"value": "2024-01-01"}, "subject": "old"}
+    ))
+    client = make_client()
+    try:
+        await client.get_securechange_ticket(1)
+        await client.get_securechange_ticket(1)
+        assert closed.call_count == 1
+
+        first = await client.get_securechange_ticket(2)
+        assert await client.get_securechange_ticket(2) is first # Same update_date: cached model reused
+        assert open_ticket.call_count == 2
+
+        # Updates are written through
+        respx.put(f"{tickets_url}/2").mock(return_value=httpx.Response(
+            200, json={"id": 2, "status": "In Progress", "update_date": {"value": "2024-01-02"}, "subject": "new"}
+        ))
+        updated = await client.update_securechange_ticket(2, TicketUpdate(subject="new"))
+        open_ticket.mock(return_value=httpx.Response(
+            200, json={"id": 2, "status": "In Progress", "update_date": {"value": "2024-01-02"}, "subject": "new"}
+        ))
+        assert await client.get_securechange_ticket(2) is updated
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_not_found_and_invalid_tql_are_negative_cached():
+    missing = respx.get(f"{ST_URL}/securetrack/api/devices/999").mock(return_value=httpx.Response(404, text="not found"))
+    graphql = respx.post(f"{ST_URL}/sg/api/v1/graphql").mock(return_value=httpx.Response(
+        200, json={"errors": [{"message": "Invalid TQL"}]}
+    ))
+    client = make_client()
+    try:
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                await client.get_securetrack_device("999")
+            assert exc.value.status_code == 404
+        assert missing.call_count == 1
+        with pytest.raises(HTTPException):
+            await client.get_securetrack_device("999", bypass_cache=True)
+        assert missing.call_count == 2
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc:
+                await client.query_rules_graphql("action = ")
+            assert exc.value.status_code == 400 # GraphQL errors are no longer turned into a 500
+        assert graphql.call_count == 1
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_l2_cache_warms_a_restarted_client(tmp_path):
+    route = respx.get(f"{ST_URL}/securetrack/api/devices/5").mock(return_value=httpx.Response(
+        200, json={"id": "5", "name": "fw-5", "latest_revision": "100"}
+    ))
+    respx.post(f"{ST_URL}/sg/api/v1/graphql").mock(return_value=httpx.Response(
+        200, json={"data": {"rules": {"count": 0, "values": []}}}
+    ))
+    l2 = dict(TUFIN_L2_CACHE_ENABLED=True, TUFIN_L2_CACHE_PATH=str(tmp_path / "cache.sqlite3"), TUFIN_L2_CACHE_COMPRESS_MIN_BYTES=16)
+    client = make_client(**l2)
+    await client.start()
+    try:
+        await client.get_securetrack_device("5")
+        await client.query_rules_graphql("action = 'accept'")
+    finally:
+        await client.close() # Flushes pending writes
+
+    restarted = make_client(**l2)
+    await restarted.start()
+    try:
+        assert (await restarted.get_securetrack_device("5")).name == "fw-5"
+        assert route.call_count == 1
+        assert restarted._rules_cache.get("action='accept'") is not None
+        assert await restarted._l2_tier.compact() == 0
+    finally:
+        await restarted.close()
+
+@pytest.mark.asyncio
+async def test_l2_writes_reuse_compressed_bytes_and_serialize_off_the_event_loop(tmp_path):
+    encoded = []
+    codec = Codec(lambda value: encoded.append(value) or value, lambda data: data)
+    cache = LRUCache("test_l2_writes", codec=codec, compressor=get_compressor("zlib", min_bytes=64))
+    tier = SqliteCacheTier(str(tmp_path / "cache.sqlite3"))
+    tier.bind(cache)
+    try:
+        cache.set("large", {"values": ["x" * 200]})
+        cache.set("small", {"id": 1})
+        assert len(encoded) == 2 # Only the in-memory sizing; the tier did not serialize on the event loop
+        large, small = tier._pending[0][3], tier._pending[1][3]
+        assert large[1:] == cache.get_entry("large").compressed_data and callable(small)
+        await tier.flush()
+        assert len(encoded) == 3 # The small value, in the writer thread
+
+        restarted = LRUCache("test_l2_writes", codec=codec)
+        tier.bind(restarted)
+        assert await tier.load("test_l2_writes") == 2
+        assert restarted.get("large") == {"values": ["x" * 200]} and restarted.get("small") == {"id": 1}
+    finally:
+        await tier.close()
+
+@pytest.mark.asyncio
+async def test_l2_requeues_failed_writes_bounds_the_queue_and_skips_outdated_namespaces(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LRUCache("test_l2_failures")
+    tier = SqliteCacheTier(path, max_pending=3)
+    tier.bind(cache)
+    apply = tier._apply
+
+    def broken(ops):
+        raise OSError("disk full")
+
+    cache.set("a", 1)
+    await tier.flush()
+    tier._apply = broken
+    cache.delete("a")
+    await tier.flush()
+    assert [op[0] for op in tier._pending] == ["delete"] # Kept for the next batch
+    tier._apply = apply
+    await tier.flush()
+    assert not tier._pending and tier._select("test_l2_failures", 10) == []
+
+    for value in range(4):
+        cache.set("b", value) # Over the bound: merged into the last write per key
+    assert len(tier._pending) == 1
+    for key in "cde":
+        cache.set(key, 0) # Still over the bound after merging: the namespace collapses into one clear
+    assert [op[0] for op in tier._pending] == ["clear"]
+
+    # Writes that cannot be flushed before shutdown mark the namespace as outdated for the next start
+    cache.set("g", 1)
+    tier._apply = broken
+    await tier.close()
+    restarted = SqliteCacheTier(path)
+    restarted.bind(LRUCache("test_l2_failures"))
+    try:
+        assert await restarted.load("test_l2_failures") == 0
+        await restarted.flush()
+        assert not (tmp_path / "cache.sqlite3.dirty").exists()
+    finally:
+        await restarted.close()
+
+def test_device_listings_reserialize_only_changed_devices():
+    cache = DeviceCache(RevisionTracker())
+    encoded = []
+    encode = cache.store.codec.encode
+    cache.store.codec = Codec(lambda device: encoded.append(device.id) or encode(device), cache.store.codec.decode)
+    devices = [TufinDevice(id=str(i), latest_revision="1") for i in range(1, 4)]
+
+    cache.put_many(devices)
+    cache.put_many(devices) # Unchanged listing: nothing is serialized again
+    cache.put_many([TufinDevice(id="2", latest_revision="2")])
+    assert encoded == ["1", "2", "3", "2"]
+    assert cache.get("2").latest_revision == "2"
+
+@pytest.mark.asyncio
+async def test_lru_cache_digests_on_request_and_serializes_large_values_off_the_loop():
+    threads = []
+    codec = Codec(lambda value: threads.append(threading.current_thread()) or value, lambda data: data)
+    plain, digested = LRUCache("test_no_digest", codec=codec), LRUCache("test_digest", codec=codec, digest=True)
+    plain.set("a", {"x": 1})
+    await digested.set_async("a", {"x": 1})
+    assert plain.get_entry("a").digest is None and digested.get_entry("a").digest is not None
+    assert threads[0] is threading.main_thread() and threads[1] is not threading.main_thread()
+
+def test_lru_cache_evicts_by_serialized_bytes_and_compresses_large_values():
+    cache = LRUCache("test_bytes", max_entries=100, max_bytes=1000)
+    cache.set("small", {"id": 1})
+    cache.set("large", {"values": ["x" * 600]})
+    cache.set("larger", {"values": ["y" * 700]}) # Evicts by bytes, oldest first
+    assert cache.get("small") is None and cache.get("large") is None
+    assert cache.size_bytes <= 1000
+    cache.set("huge", {"values": ["z" * 2000]}) # Larger than the whole bound: not cached
+    assert cache.get("huge") is None and cache.get("larger") is not None
+
+    compressed = LRUCache("test_compressed", max_bytes=1000, compressor=get_compressor("zlib", min_bytes=100))
+    compressed.set("rules", {"values": ["z" * 2000]})
+    assert compressed.size_bytes < 100
+    assert compressed.get("rules") == {"values": ["z" * 2000]}
+
+@pytest.mark.asyncio
+async def test_cache_admin_reports_stats_and_purges_by_prefix():
+    cache = LRUCache("test_admin", max_entries=10)
+    for key in ("5", "51", "6", "12", "120"):
+        cache.set(key, {"id": key})
+    cache.record("hit")
+    cache.record("miss")
+    stats = next(s for s in cache_admin.all_stats() if s["namespace"] == "test_admin")
+    assert stats["entries"] == 5 and stats["age_seconds"]["buckets"]["<1m"] == 5
+    assert stats["hit_ratio"] == 0.5
+
+    assert await cache_admin.purge("test_admin", key="12") == {"test_admin": 1}
+    assert "120" in cache and "12" not in cache
+    assert await cache_admin.purge("test_admin", prefix="5") == {"test_admin": 2}
+    assert list(cache.keys()) == ["6", "120"]
+    with pytest.raises(KeyError):
+        await cache_admin.purge("no_such_namespace")
+
+@pytest.mark.asyncio
+async def test_cache_admin_lists_and_purges_path_images(tmp_path):
+    cache = PathImageCache(str(tmp_path))
+    for digest in ("ab" * 32, "cd" * 32):
+        await cache.put(digest, b"png")
+    stats = next(s for s in cache_admin.all_stats() if s["namespace"] == "topology_image")
+    assert stats["entries"] == 2 and stats["max_entries"] is None and stats["size_bytes"] == 6
+
+    assert await cache_admin.purge("topology_image", key="ab" * 32) == {"topology_image": 1}
+    assert await cache_admin.purge("topology_image") == {"topology_image": 1}
+    assert len(cache) == 0 and not list(tmp_path.glob("*/*.png"))
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_pages_follow_cursor_and_filter_locally():
+    devices = [
+        {"id": str(i), "name": f"fw-{i}", "vendor": "Cisco" if i % 2 else "PaloAlto", "domain_id": "1"}
+        for i in range(1, 26)
+    ]
+    route = respx.get(f"{ST_URL}/securetrack/api/devices").mock(return_value=httpx.Response(
+        200, json={"device": devices, "count": 25, "total": 25}
+    ))
+    client = make_client()
+    try:
+        seen, cursor = [], None
+        while True:
+            page = await client.list_securetrack_devices_page({"vendor": "cisco", "domain_id": "1"}, limit=5, cursor=cursor)
+            seen += [device.id for device in page.devices]
+            assert page.total == 13
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert seen == [str(i) for i in range(1, 26, 2)] # Numeric ID order, no duplicates or gaps
+        assert route.call_count == 1 # Every page is served from the cached, indexed inventory
+
+        page = await client.list_securetrack_devices_page(name_contains="FW-2", limit=100)
+        assert [device.id for device in page.devices] == ["2"] + [str(i) for i in range(20, 26)]
+        with pytest.raises(ValueError):
+            await client.list_securetrack_devices_page(cursor="not-a-cursor")
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_index_is_rebuilt_only_when_the_listing_changes():
+    inventory = [{"id": str(i), "vendor": "cisco"} for i in range(1, 50)]
+    route = respx.get(f"{ST_URL}/securetrack/api/devices").mock(
+        side_effect=lambda request: httpx.Response(200, json={"device": inventory, "count": len(inventory), "total": len(inventory)})
+    )
+    # Compressed entries decode to a new object on every read
+    client = make_client(TUFIN_CACHE_COMPRESSION="zlib", TUFIN_CACHE_COMPRESS_MIN_BYTES=1)
+    # Too large for the inventory cache: the index holds the snapshot itself
+    uncacheable = make_client(TUFIN_INVENTORY_CACHE_MAX_BYTES=100)
+    try:
+        for c in (client, uncacheable):
+            calls = route.call_count
+            first = await c.list_securetrack_devices_page(limit=5)
+            index = c._device_index
+            await c.list_securetrack_devices_page(limit=5, cursor=first.next_cursor)
+            assert c._device_index is index and route.call_count == calls + 1 # Pages never fetch the inventory
+            if c is client:
+                await c.list_securetrack_devices_page(limit=5, bypass_cache=True) # Re-fetched, same content
+                assert c._device_index is index
+
+            inventory.append({"id": str(100 + len(inventory)), "vendor": "cisco"})
+            page = await c.list_securetrack_devices_page(limit=5, bypass_cache=True)
+            assert c._device_index is not index and page.total == len(inventory)
+    finally:
+        await client.close()
+        await uncacheable.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_pages_forward_filters_upstream_without_an_inventory_cache():
+    route = respx.get(f"{ST_URL}/securetrack/api/devices").mock(return_value=httpx.Response(200, json={
+        "device": [{"id": "3", "name": "fw-3", "vendor": "Cisco", "model": "asa"}, {"id": "1", "name": "fw-1", "vendor": "Cisco"}],
+        "count": 2, "total": 2,
+    }))
+    client = make_client(TUFIN_INVENTORY_CACHE_ENABLED=False)
+    try:
+        page = await client.list_securetrack_devices_page({"vendor": "Cisco", "model": "asa"}, name_contains="fw", limit=5)
+    finally:
+        await client.close()
+
+    params = route.calls[0].request.url.params
+    assert params["vendor"] == "Cisco" and params["name"] == "fw" and "model" not in params
+    assert [device.id for device in page.devices] == ["3"] and client._device_index is None
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_list_pages_are_fetched_concurrently_and_merged_in_order():
+    inventory = [{"id": str(i)} for i in range(1, 24)]
+    in_flight = peak = 0
+
+    async def page(request):
+        nonlocal in_flight, peak
+        start, count = int(request.url.params["start"]), int(request.url.params["count"])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02 if start % 10 else 0.05) # Later pages finish first
+        in_flight -= 1
+        chunk = inventory[start:start + min(count, 5)] # Server caps pages at 5 devices
+        return httpx.Response(200, json={"device": chunk, "count": len(chunk), "total": len(inventory)})
+
+    route = respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=page)
+    client = make_client(TUFIN_DEVICE_PAGE_SIZE=10, TUFIN_DEVICE_PAGE_CONCURRENCY=2, TUFIN_INVENTORY_CACHE_ENABLED=False)
+    try:
+        result = await client.list_securetrack_devices()
+    finally:
+        await client.close()
+
+    assert [device.id for device in result.device] == [str(i) for i in range(1, 24)]
+    assert result.total == result.count == 23
+    assert route.call_count == 5
+    assert peak == 2
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_ticket_listing_follows_next_links_and_reports_total():
+    tickets_url = f"{SC_URL}/securechangeworkflow/api/securechange/tickets"
+
+    def page(request):
+        start = int(request.url.params.get("start", 0))
+        body = {"ticket": [{"id": start + i, "subject": f"T{start + i}"} for i in range(1, 4)]}
+        if start < 6:
+            # Tufin links to its own (internal) host name; pages are fetched from the configured URL
+            body["next"] = {"@href": f"https://sc-internal:8443/securechangeworkflow/api/securechange/tickets?start={start + 3}&count=3"}
+        return httpx.Response(200, json=body)
+
+    route = respx.get(tickets_url).mock(side_effect=page)
+    client = make_client(TUFIN_STREAM_PARSE_ENDPOINTS=[])
+    try:
+        first = await client.list_securechange_tickets()
+        assert len(first.ticket) == 3 and first.total is None and first.next is not None
+
+        everything = await client.list_securechange_tickets(all_pages=True)
+        assert [t.id for t in everything.ticket] == list(range(1, 10))
+        assert everything.total == 9 and everything.next is None
+        assert route.call_count == 4
+
+        partial = await client.list_securechange_tickets(max_items=4)
+        assert [t.id for t in partial.ticket] == list(range(1, 7)) # Whole pages
+        assert partial.total is None and "start=6" in partial.next.href
+        assert route.call_count == 6
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_ticket_next_links_resolve_against_a_base_url_with_a_path():
+    base = "https://sc.test/sc"
+    links = {
+        0: "securechangeworkflow/api/securechange/tickets?start=3&count=3", # Relative to the base path
+        3: "https://sc-internal:8443/sc/securechangeworkflow/api/securechange/tickets?start=6&count=3",
+    }
+
+    def page(request):
+        start = int(request.url.params.get("start", 0))
+        body = {"ticket": [{"id": start + i, "subject": f"T{start + i}"} for i in range(1, 4)]}
+        if start in links:
+            body["next"] = {"@href": links[start]}
+        return httpx.Response(200, json=body)
+
+    route = respx.get(f"{base}/securechangeworkflow/api/securechange/tickets").mock(side_effect=page)
+    client = TufinApiClient(Settings(TUFIN_SECURETRACK_URL=ST_URL, TUFIN_SECURECHANGE_URL=base, TUFIN_STREAM_PARSE_ENDPOINTS=[]))
+    try:
+        everything = await client.list_securechange_tickets(all_pages=True)
+    finally:
+        await client.close()
+
+    assert [t.id for t in everything.ticket] == list(range(1, 10))
+    assert route.call_count == 3
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_device_export_streams_pages_or_the_cached_inventory():
+    inventory = [{"id": str(i)} for i in range(1, 12)]
+    requested = []
+
+    def page(request):
+        start, count = int(request.url.params["start"]), int(request.url.params["count"])
+        requested.append(start)
+        chunk = inventory[start:start + count]
+        return httpx.Response(200, json={"device": chunk, "count": len(chunk), "total": len(inventory)})
+
+    route = respx.get(f"{ST_URL}/securetrack/api/devices").mock(side_effect=page)
+    client = make_client(TUFIN_DEVICE_PAGE_SIZE=3, TUFIN_DEVICE_PAGE_CONCURRENCY=2)
+    try:
+        chunks = [[d.id for d in chunk] async for chunk in client.iter_securetrack_devices()]
+        assert chunks == [["1", "2", "3"], ["4", "5", "6"], ["7", "8", "9"], ["10", "11"]]
+
+        # Stopping early never requests more than the first page plus the prefetch window
+        requested.clear()
+        export = client.iter_securetrack_devices()
+        await export.__anext__()
+        await export.aclose()
+        await asyncio.sleep(0.01) # Let shared (coalesced) page requests settle
+        assert requested[0] == 0 and len(requested) <= 3
+
+        await client.list_securetrack_devices()
+        calls = route.call_count
+        exported = [d.id async for chunk in client.iter_securetrack_devices() for d in chunk]
+        assert exported == [str(i) for i in range(1, 12)]
+        assert route.call_count == calls # Served from the cached inventory
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_rule_query_streams_pages_with_first_and_offset():
+    rules = [{"id": f"r{i}", "action": "accept"} for i in range(7)]
+    offsets = []
+
+    def page(request):
+        variables = json.loads(request.content)["variables"]
+        offset, first = variables.get("offset", 0), variables.get("first", len(rules)) # Unpaged query: everything
+        offsets.append(offset)
+        chunk = rules[offset:offset + first]
+        return httpx.Response(200, json={"data": {"rules": {"count": len(rules), "values": chunk}}})
+
+    route = respx.post(f"{ST_URL}/sg/api/v1/graphql").mock(side_effect=page)
+    client = make_client(TUFIN_RULES_PAGE_SIZE=3, TUFIN_RULES_PAGE_CONCURRENCY=2)
+    try:
+        chunks = [chunk async for chunk in client.iter_rules_graphql("action = 'accept'")]
+        assert [count for count, _ in chunks] == [7, 7, 7]
+        assert [rule["id"] for _, chunk in chunks for rule in chunk] == [r["id"] for r in rules]
+        assert sorted(offsets) == [0, 3, 6]
+        assert client._rules_cache.get("action = 'accept'") is None # Streamed results are not cached
+
+        # A cached result is replayed in chunks without querying Tufin
+        await client.query_rules_graphql("action = 'accept'")
+        calls = route.call_count
+        replayed = [chunk async for chunk in client.iter_rules_graphql("action='accept'")]
+        assert route.call_count == calls
+        assert [len(chunk) for _, chunk in replayed] == [3, 3, 1]
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_rule_stream_dedupes_only_rules_with_an_id():
+    pages = {
+        0: [{"id": "r1"}, {"name": "no id 1"}, {"id": "r2"}],
+        3: [{"id": "r2"}, {"name": "no id 2"}, {"id": None, "name": "no id 3"}], # r2 moved across the page boundary
+    }
+
+    def page(request):
+        offset = json.loads(request.content)["variables"].get("offset", 0)
+        return httpx.Response(200, json={"data": {"rules": {"count": 6, "values": pages[offset]}}})
+
+    respx.post(f"{ST_URL}/sg/api/v1/graphql").mock(side_effect=page)
+    client = make_client(TUFIN_RULES_PAGE_SIZE=3, TUFIN_RULES_CACHE_ENABLED=False)
+    try:
+        rules = [rule async for _, chunk in client.iter_rules_graphql("action = 'accept'") for rule in chunk]
+    finally:
+        await client.close()
+
+    assert [rule.get("id") or rule["name"] for rule in rules] == ["r1", "no id 1", "r2", "no id 2", "no id 3"]
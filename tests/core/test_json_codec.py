@@ -0,0 +1,23 @@
+import pytest
+
+from src.app.core.json_codec import ORJSON_CODEC, STDLIB_CODEC, CodecJSONResponse, get_codec
+
+# The configured codec must be a drop-in replacement for the stdlib json module.
+
+PAYLOAD = {"devices": [{"id": "1", "name": "fw-é", "offline": False, "parent_id": None}], "total": 1}
+
+@pytest.mark.parametrize("codec", [c for c in (STDLIB_CODEC, ORJSON_CODEC) if c is not None], ids=lambda c: c.name)
+def test_codecs_round_trip_identically(codec):
+    encoded = codec.dumps(PAYLOAD)
+    assert encoded == STDLIB_CODEC.dumps(PAYLOAD)
+    assert codec.loads(encoded) == PAYLOAD
+    assert codec.loads(encoded.decode()) == PAYLOAD
+
+def test_unknown_codec_falls_back_to_stdlib():
+    assert get_codec("stdlib") is STDLIB_CODEC
+    assert get_codec("does-not-exist") is STDLIB_CODEC
+
+def test_response_class_renders_json():
+    response = CodecJSONResponse(PAYLOAD)
+    assert response.media_type == "application/json"
+    assert STDLIB_CODEC.loads(response.body) == PAYLOAD